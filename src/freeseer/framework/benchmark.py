@@ -0,0 +1,314 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import logging
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import gobject
+
+import pygst
+pygst.require("0.10")
+import gst
+
+from freeseer import __version__
+from freeseer import settings
+from freeseer.framework.config.profile import ProfileManager
+from freeseer.framework.multimedia import Multimedia
+from freeseer.framework.plugin import IOutput
+from freeseer.framework.plugin import PluginManager
+from freeseer.framework.resilience import NETWORK_SINKS
+
+log = logging.getLogger(__name__)
+
+# Seconds recorded before measuring, so that start up costs don't skew the results
+WARMUP = 2
+
+
+class BenchmarkProfile(object):
+    """A throwaway profile recording test sources to a temporary directory.
+
+    The default plugin configuration records the video and audio test
+    sources, so benchmarks need neither devices nor a display.
+    """
+
+    def __init__(self):
+        self.base_folder = tempfile.mkdtemp(prefix='freeseer-benchmark-')
+        self.profile_manager = ProfileManager(os.path.join(self.base_folder, 'profiles'))
+        self.profile = self.profile_manager.get('benchmark')
+        self.config = self.profile.get_config('freeseer.conf', settings.FreeseerConfig, ['Global'], read_only=True)
+        self.config.videodir = os.path.join(self.base_folder, 'videos')
+        os.mkdir(self.config.videodir)
+        self.config.audio_feedback = False
+        self.config.video_preview = False
+        self.config.record_to_stream = False
+        # Keep the network sinks in the pipeline, to be replaced by replace_network_sinks()
+        self.config.resilient_streaming = False
+        self.plugman = PluginManager(self.profile)
+
+        # Live sources produce buffers in real time, so a pipeline that can't
+        # keep up shows in its frame rate
+        self.set_plugin_options("Video Test Source", "VideoInput", live=True, pattern="smpte")
+
+    def has_plugin_option(self, name, category, option):
+        plugin = self.plugman.get_plugin_by_name(name, category).plugin_object
+        plugin.load_config(self.plugman)
+        return plugin.config is not None and hasattr(plugin.config, option)
+
+    def set_plugin_options(self, name, category, **values):
+        """Saves values to the configuration of a plugin, returning False if it has no such options."""
+        if not all(self.has_plugin_option(name, category, option) for option in values):
+            return False
+        plugin = self.plugman.get_plugin_by_name(name, category).plugin_object
+        for option, value in values.items():
+            setattr(plugin.config, option, value)
+        plugin.config.save()
+        return True
+
+    def set_output(self, name):
+        """Records to a single output plugin."""
+        plugin = self.plugman.get_plugin_by_name(name, "Output").plugin_object
+        if plugin.get_recordto() == IOutput.STREAM:
+            self.config.record_to_file = False
+            self.config.record_to_stream = True
+            self.config.record_to_stream_plugin = name
+        else:
+            self.config.record_to_file = True
+            self.config.record_to_stream = False
+            self.config.record_to_file_plugin = name
+
+    def cleanup(self):
+        shutil.rmtree(self.base_folder, ignore_errors=True)
+
+
+def run_main_loop(seconds):
+    """Runs the GLib main loop for the given number of seconds."""
+    loop = gobject.MainLoop()
+    gobject.timeout_add(int(seconds * 1000), loop.quit)
+    loop.run()
+
+
+def measure_cpu(seconds):
+    """Runs the main loop for seconds and returns the CPU time used per second of wall time."""
+    start_times = os.times()
+    start = time.time()
+    run_main_loop(seconds)
+    end_times = os.times()
+    elapsed = time.time() - start
+
+    cpu = (end_times[0] - start_times[0]) + (end_times[1] - start_times[1])
+    return cpu / elapsed
+
+
+def get_memory_usage():
+    """Returns the resident memory of the process in bytes."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError):
+        # Peak rather than current usage, in kilobytes on Linux but bytes on OS X
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def get_environment():
+    """Describes the machine and software the benchmark ran on, to tell comparable results apart."""
+    return {
+        'freeseer': __version__,
+        'gstreamer': '.'.join(str(part) for part in gst.version()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.sysconf('SC_NPROCESSORS_ONLN') if hasattr(os, 'sysconf') else None,
+    }
+
+
+def replace_network_sinks(media):
+    """Swaps the network sinks of stream outputs for fakesinks so no server is needed."""
+    for bin in media.output_bins.values():
+        for sink in list(bin.sinks()):
+            if sink.get_factory().get_name() not in NETWORK_SINKS:
+                continue
+            peer = sink.get_static_pad('sink').get_peer()
+            parent = sink.get_parent()
+            peer.unlink(sink.get_static_pad('sink'))
+            parent.remove(sink)
+
+            fakesink = gst.element_factory_make('fakesink')
+            fakesink.set_property('sync', False)
+            parent.add(fakesink)
+            peer.link(fakesink.get_static_pad('sink'))
+
+
+def stop_and_wait(media, timeout=Multimedia.STOP_TIMEOUT):
+    """Stops media with stop_async() and returns the seconds until the recording was finalized."""
+    loop = gobject.MainLoop()
+    start = time.time()
+    finished = []
+
+    def on_finished(file_path, size, duration):
+        finished.append(time.time() - start)
+        loop.quit()
+
+    if media.stop_async(on_finished, timeout):
+        gobject.timeout_add(int((timeout + 1) * 1000), loop.quit)
+        loop.run()
+    return finished[0] if finished else None
+
+
+def benchmark_pipeline(benchmark, name, duration=10):
+    """Records with the current configuration of benchmark and returns its measurements.
+
+    name is used for the recorded file. The pipeline records for WARMUP
+    seconds, then for duration seconds while being measured.
+
+    Every combination runs in the same process, so the CPU usage is that of
+    the whole process (1.0 being one core) and memory is what the process
+    grew by while loading and running this pipeline.
+    """
+    baseline_memory = get_memory_usage()
+    media = Multimedia(benchmark.config, benchmark.plugman, cli=True)
+    if not media.load_backend(filename=name):
+        return None
+    replace_network_sinks(media)
+
+    media.record()
+    run_main_loop(WARMUP)
+
+    start = media.get_pipeline_stats()['pads'].get('video', {}).get('buffers', 0)
+    started_at = time.time()
+    cpu = measure_cpu(duration)
+    elapsed = time.time() - started_at
+    end = media.get_pipeline_stats()['pads'].get('video', {}).get('buffers', 0)
+    memory_added = get_memory_usage() - baseline_memory
+    drops = sum(media.get_output_drops().values())
+
+    return {
+        'fps': (end - start) / elapsed,
+        'process_cpu': cpu,
+        'memory_added': memory_added,
+        'drops': drops,
+        'conversions': len(media.get_color_conversions()),
+        'start_latency': media.start_latency,
+        'stop_latency': stop_and_wait(media),
+    }
+
+
+def benchmark_matrix(duration=10, mixers=None, outputs=None, resolutions=None):
+    """Benchmarks every VideoMixer x Output x resolution combination with test sources.
+
+    mixers, outputs and resolutions restrict the plugins and resolutions
+    benchmarked. Resolutions only apply to mixers with a resolution option;
+    other mixers run once with resolution None. Combinations are run in a
+    fixed order so that runs are comparable.
+
+    Returns a dictionary with the environment and a list of results.
+    """
+    benchmark = BenchmarkProfile()
+    results = []
+    try:
+        if mixers is None:
+            mixers = sorted(plugin.name for plugin in benchmark.plugman.get_videomixer_plugins())
+        if outputs is None:
+            outputs = sorted(plugin.name for plugin in benchmark.plugman.get_output_plugins()
+                             if plugin.plugin_object.get_recordto() in [IOutput.FILE, IOutput.STREAM])
+        if resolutions is None:
+            resolutions = ['240p', '480p', '720p', '1080p']
+
+        run = 0
+        for mixer in mixers:
+            benchmark.config.videomixer = mixer
+            mixer_resolutions = [None]
+            if benchmark.has_plugin_option(mixer, "VideoMixer", 'resolution'):
+                mixer_resolutions = resolutions
+
+            for resolution in mixer_resolutions:
+                if resolution is not None:
+                    benchmark.set_plugin_options(mixer, "VideoMixer", resolution=resolution)
+
+                for output in outputs:
+                    benchmark.set_output(output)
+                    run += 1
+                    log.info("Benchmarking %s, %s, %s", mixer, output, resolution)
+
+                    result = {
+                        'mixer': mixer,
+                        'output': output,
+                        'resolution': resolution,
+                        'duration': duration,
+                    }
+                    measurements = benchmark_pipeline(benchmark, u'run{0}'.format(run), duration)
+                    if measurements is None:
+                        log.error("Failed to load %s with %s.", mixer, output)
+                        result['error'] = 'Failed to load the pipeline'
+                    else:
+                        result.update(measurements)
+                    results.append(result)
+    finally:
+        benchmark.cleanup()
+
+    return {'environment': get_environment(), 'results': results}
+
+
+def benchmark_rooms(max_rooms=4, duration=10):
+    """Records up to max_rooms rooms concurrently in this process, adding one room at a time.
+
+    After each room is added the pipelines record for duration seconds.
+    Returns a dictionary with the environment and, for each number of rooms,
+    the process CPU usage (1.0 being one core) and the CPU added by the last
+    room.
+    """
+    benchmark = BenchmarkProfile()
+    rooms = []
+    results = []
+    try:
+        for count in range(1, max_rooms + 1):
+            media = Multimedia(benchmark.config, benchmark.plugman, cli=True)
+            if not media.load_backend(filename=u'room{0}'.format(count)):
+                log.error("Failed to load room %d, stopping the benchmark.", count)
+                break
+            media.record()
+            rooms.append(media)
+
+            cpu = measure_cpu(duration)
+            previous = results[-1]['cpu'] if results else 0.0
+            results.append({
+                'rooms': count,
+                'cpu': cpu,
+                'cpu_per_room': cpu / count,
+                'cpu_added': cpu - previous,
+            })
+            log.info("%d room(s): %.2f CPU", count, cpu)
+    finally:
+        for media in rooms:
+            media.stop()
+        benchmark.cleanup()
+
+    return {'environment': get_environment(), 'results': results}
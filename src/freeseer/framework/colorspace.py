@@ -0,0 +1,112 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+
+import logging
+
+import pygst
+pygst.require("0.10")
+import gst
+
+log = logging.getLogger(__name__)
+
+# Planar YUV 4:2:0 takes half the memory of 32 bit RGB per frame and is what
+# the encoders want, so it is the format carried between elements when possible
+PREFERRED_CAPS = 'video/x-raw-yuv, format=(fourcc)I420'
+
+CONVERTERS = ['ffmpegcolorspace']
+
+
+def find_converters(bin):
+    """Returns the colorspace converters inside bin."""
+    return [element for element in bin.recurse() if element.get_factory().get_name() in CONVERTERS]
+
+
+def insert_after(element, new_element):
+    """Adds new_element to the parent of element and links it between element and its downstream peer."""
+    parent = element.get_parent()
+    src = element.get_static_pad('src')
+    new_src = new_element.get_static_pad('src')
+    parent.add(new_element)
+
+    # The converter may be the last element of its bin, feeding a ghost pad
+    ghost = None
+    for pad in parent.src_pads():
+        if isinstance(pad, gst.GhostPad) and pad.get_target() == src:
+            ghost = pad
+
+    if ghost is not None:
+        ghost.set_target(new_src)
+    else:
+        peer = src.get_peer()
+        if peer is not None:
+            src.unlink(peer)
+            new_src.link(peer)
+    src.link(new_element.get_static_pad('sink'))
+
+
+def plan_formats(bins, preferred=PREFERRED_CAPS):
+    """Pins the output of the colorspace converters in bins to the preferred format.
+
+    A converter is only pinned when everything downstream of it accepts the
+    preferred format. Converters further downstream then receive the format
+    they would produce and pass buffers through untouched, so frames are
+    converted once, as close to the source as possible. Must be called once
+    the whole pipeline is linked, as it queries the caps downstream elements
+    accept.
+
+    Returns the names of the converters pinned.
+    """
+    caps = gst.caps_from_string(preferred)
+    pinned = []
+    for bin in bins:
+        for converter in find_converters(bin):
+            allowed = converter.get_static_pad('src').peer_get_caps()
+            if allowed is None or allowed.intersect(caps).is_empty():
+                log.debug("Leaving %s unpinned, downstream does not accept %s", converter.get_path_string(), preferred)
+                continue
+
+            capsfilter = gst.element_factory_make('capsfilter')
+            capsfilter.set_property('caps', caps)
+            insert_after(converter, capsfilter)
+            pinned.append(converter.get_path_string())
+
+    log.debug("Pinned colorspace converters to %s: %s", preferred, pinned)
+    return pinned
+
+
+def get_conversions(bin):
+    """Returns (converter name, input caps, output caps) for each converter in bin actually converting frames.
+
+    Only converters that negotiated caps are considered, so this is only
+    meaningful once the pipeline is pre-rolled.
+    """
+    conversions = []
+    for converter in find_converters(bin):
+        sink_caps = converter.get_static_pad('sink').get_negotiated_caps()
+        src_caps = converter.get_static_pad('src').get_negotiated_caps()
+        if sink_caps is None or src_caps is None or sink_caps.is_equal(src_caps):
+            continue
+        conversions.append((converter.get_path_string(), sink_caps.to_string(), src_caps.to_string()))
+    return conversions
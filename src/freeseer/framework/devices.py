@@ -0,0 +1,232 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+
+import atexit
+import logging
+import os
+import re
+import subprocess
+import sys
+
+import gobject
+
+import pygst
+pygst.require("0.10")
+import gst
+
+log = logging.getLogger(__name__)
+
+
+def enumerate_video():
+    """Returns (name, device) pairs for the cameras and frame grabbers of the platform."""
+    devices = []
+
+    if sys.platform.startswith("linux"):
+        videosrc = gst.element_factory_make("v4l2src", "videosrc")
+        videosrc.probe_property_name('device')
+        for device in videosrc.probe_get_values_name('device'):
+            videosrc.set_property('device', device)
+            devices.append((videosrc.get_property('device-name'), device))
+
+    elif sys.platform in ["win32", "cygwin"]:
+        videosrc = gst.element_factory_make("dshowvideosrc", "videosrc")
+        videosrc.probe_property_name('device-name')
+        for device in videosrc.probe_get_values_name('device-name'):
+            devices.append((device, device))
+
+    return devices
+
+
+def enumerate_firewire():
+    """Returns (name, device) pairs for the FireWire devices."""
+    devices = []
+    i = 1
+    while os.path.exists("/dev/fw{}".format(i)):
+        devices.append(("/dev/fw{}".format(i), "/dev/fw{}".format(i)))
+        i += 1
+    return devices
+
+
+def enumerate_pulse():
+    """Returns (name, device) pairs for the PulseAudio sources."""
+    audiosrc = gst.element_factory_make("pulsesrc", "audiosrc")
+    audiosrc.probe_property_name('device')
+    names = audiosrc.probe_get_values_name('device')
+    # TODO: should be getting actual device description, but .get_property('device-name') does not work
+    return zip(names, names)
+
+
+class HotplugMonitor(object):
+    """Runs a command that prints a line per device event, passing each line to callback.
+
+    Lines are read from the GLib main loop. Does nothing if the command is not
+    installed.
+    """
+
+    def __init__(self, command, callback):
+        self.callback = callback
+        self.watch = None
+        try:
+            self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=open(os.devnull, 'w'))
+        except OSError:
+            log.debug("%s is not available, devices won't be refreshed on its events.", command[0])
+            self.process = None
+            return
+        self.watch = gobject.io_add_watch(self.process.stdout, gobject.IO_IN | gobject.IO_HUP, self._on_output)
+
+    def _on_output(self, source, condition):
+        line = source.readline() if condition & gobject.IO_IN else ''
+        if not line:
+            self.watch = None
+            return False
+        self.callback(line)
+        return True
+
+    def stop(self):
+        if self.watch is not None:
+            gobject.source_remove(self.watch)
+            self.watch = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+
+class DeviceRegistry(object):
+    """Caches the capture devices of each kind, so that hardware is only probed once.
+
+    Devices are enumerated the first time they are asked for, then again only
+    after a udev or PulseAudio event says devices of that kind came or went.
+    What is found out by opening a device, like the capture modes of a
+    camera, is cached the same way. Listeners are told which kind of device
+    changed.
+    """
+
+    UDEV_COMMAND = ['udevadm', 'monitor', '--udev',
+                    '--subsystem-match=video4linux', '--subsystem-match=sound', '--subsystem-match=firewire']
+    PULSE_COMMAND = ['pactl', 'subscribe']
+
+    # udev subsystem -> kinds of devices it adds and removes
+    UDEV_SUBSYSTEMS = {
+        'video4linux': ['video'],
+        'sound': ['pulse'],
+        'firewire': ['firewire'],
+    }
+
+    UDEV_EVENT = re.compile(r'^UDEV\s.*\s(add|remove)\s.*\((\w+)\)\s*$')
+    PULSE_EVENT = re.compile(r"^Event '(new|remove)' on source #")
+
+    def __init__(self, enumerators, monitor=True):
+        self.enumerators = enumerators
+        self.monitor = monitor
+        self.listeners = []
+        self._devices = {}
+        # (kind, device) -> result of probing the device
+        self._capabilities = {}
+        self._monitors = None
+
+    def get_devices(self, kind):
+        """Returns the (name, device) pairs of kind, enumerating them only if they aren't cached."""
+        self.start_monitoring()
+
+        if kind not in self._devices:
+            try:
+                self._devices[kind] = list(self.enumerators[kind]())
+            except (gst.ElementNotFoundError, OSError, IOError) as e:
+                log.warning("Failed to list %s devices: %s", kind, e)
+                self._devices[kind] = []
+            log.debug("Found %d %s device(s)", len(self._devices[kind]), kind)
+        return list(self._devices[kind])
+
+    def get_capabilities(self, kind, device, probe):
+        """Returns probe(device), probing the device only if the result isn't cached.
+
+        Empty results aren't cached, as they usually mean the device couldn't
+        be opened, e.g. because it is capturing.
+        """
+        self.start_monitoring()
+
+        key = (kind, device)
+        if key not in self._capabilities:
+            capabilities = probe(device)
+            if not capabilities:
+                return capabilities
+            self._capabilities[key] = capabilities
+        return self._capabilities[key]
+
+    def get_default(self, kind):
+        """Returns the first device of kind, or an empty string if there are none."""
+        devices = self.get_devices(kind)
+        if not devices:
+            return ''
+        return devices[0][1]
+
+    def refresh(self, kinds=None):
+        """Forgets the devices of kinds (all kinds by default), telling the listeners."""
+        if kinds is None:
+            kinds = self.enumerators.keys()
+        for kind in kinds:
+            self._devices.pop(kind, None)
+            for key in [key for key in self._capabilities if key[0] == kind]:
+                del self._capabilities[key]
+            for listener in self.listeners:
+                listener(kind)
+
+    def add_listener(self, listener):
+        """Calls listener with the kind of device whenever devices of that kind may have changed."""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def start_monitoring(self):
+        if self._monitors is not None or not self.monitor or not sys.platform.startswith("linux"):
+            return
+        self._monitors = [
+            HotplugMonitor(self.UDEV_COMMAND, self.on_udev_event),
+            HotplugMonitor(self.PULSE_COMMAND, self.on_pulse_event),
+        ]
+        atexit.register(self.stop_monitoring)
+
+    def stop_monitoring(self):
+        for monitor in self._monitors or []:
+            monitor.stop()
+        self._monitors = None
+
+    def on_udev_event(self, line):
+        match = self.UDEV_EVENT.match(line)
+        if match is not None:
+            self.refresh(self.UDEV_SUBSYSTEMS.get(match.group(2), []))
+
+    def on_pulse_event(self, line):
+        if self.PULSE_EVENT.match(line):
+            self.refresh(['pulse'])
+
+
+device_registry = DeviceRegistry({
+    'video': enumerate_video,
+    'firewire': enumerate_firewire,
+    'pulse': enumerate_pulse,
+})
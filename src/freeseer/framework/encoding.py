@@ -0,0 +1,252 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import logging
+import multiprocessing
+
+import gobject
+
+import pygst
+pygst.require("0.10")
+import gst
+
+log = logging.getLogger(__name__)
+
+# Encoder presets, from the cheapest to encode to the most compact
+PRESETS = ['realtime', 'balanced', 'archival']
+
+# Encoder properties trading encoding speed for compression, per preset
+PRESET_PROPERTIES = {
+    'vp8enc': {
+        'realtime': {'speed': 7, 'max-keyframe-distance': 60},
+        'balanced': {'speed': 4, 'max-keyframe-distance': 120},
+        'archival': {'speed': 1, 'max-keyframe-distance': 240},
+    },
+    'theoraenc': {
+        'realtime': {'speed-level': 2, 'keyframe-freq': 64},
+        'balanced': {'speed-level': 1, 'keyframe-freq': 128},
+        'archival': {'speed-level': 0, 'keyframe-freq': 256},
+    },
+    # speed-preset: 3 is veryfast, 6 medium and 7 slow
+    'x264enc': {
+        'realtime': {'speed-preset': 3, 'key-int-max': 60},
+        'balanced': {'speed-preset': 6, 'key-int-max': 120},
+        'archival': {'speed-preset': 7, 'key-int-max': 240},
+    },
+}
+
+# Video encoders that encode frames flagged as gaps like any other frame.
+# Theora writes gaps as duplicate frames; these get static frames dropped instead.
+GAP_DROPPING_ENCODERS = ['vp8enc', 'x264enc']
+
+# The property setting the number of threads an encoder uses
+THREAD_PROPERTIES = {
+    'vp8enc': 'threads',
+    'x264enc': 'threads',
+}
+
+
+def get_cpu_count():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def get_thread_budget(encoders, cpus=None):
+    """Returns the threads each of encoders concurrent encoders may use without oversubscribing the CPUs."""
+    if cpus is None:
+        cpus = get_cpu_count()
+    return max(1, cpus // max(encoders, 1))
+
+
+def get_preset_properties(factory, preset, threads=1):
+    """Returns the properties of encoder factory for preset, using up to threads threads.
+
+    Unknown encoders and presets get no properties, besides the number of
+    threads for encoders that have such a property.
+    """
+    properties = dict(PRESET_PROPERTIES.get(factory, {}).get(preset, {}))
+    if factory in THREAD_PROPERTIES:
+        properties[THREAD_PROPERTIES[factory]] = threads
+    return properties
+
+
+def set_encoder_properties(encoder, properties):
+    """Sets properties on encoder, skipping those it doesn't have and clamping integers to their range.
+
+    Preset properties may be missing from, or out of range for, older
+    versions of an encoder.
+    """
+    pspecs = dict((pspec.name, pspec) for pspec in gobject.list_properties(encoder))
+    for name, value in properties.items():
+        if name not in pspecs:
+            log.warning("%s has no %s property, ignoring it.", encoder.get_factory().get_name(), name)
+            continue
+        pspec = pspecs[name]
+        if isinstance(value, int) and not isinstance(value, bool) and hasattr(pspec, 'minimum'):
+            value = max(pspec.minimum, min(pspec.maximum, value))
+        encoder.set_property(name, value)
+
+
+def drop_gaps(encoder):
+    """Drops frames flagged as gaps (e.g. static slides) in front of encoder, if it doesn't skip them itself."""
+    if encoder.get_factory().get_name() in GAP_DROPPING_ENCODERS:
+        encoder.get_static_pad('sink').add_buffer_probe(_drop_gap_buffer)
+
+
+def _drop_gap_buffer(pad, buffer):
+    return not buffer.flag_is_set(gst.BUFFER_FLAG_GAP)
+
+
+class EncoderSpec(object):
+    """Describes an encoder needed by an output plugin.
+
+    factory is the GStreamer encoder element, properties the element
+    properties to set on it and converters the raw format converters (e.g.
+    audioconvert) to put in front of it. Outputs asking for equal specs
+    share a single encoder.
+    """
+
+    def __init__(self, factory, properties=None, converters=None):
+        self.factory = factory
+        self.properties = properties or {}
+        self.converters = converters or []
+
+    def get_key(self):
+        return (self.factory, tuple(sorted(self.properties.items())), tuple(self.converters))
+
+    def __eq__(self, other):
+        return isinstance(other, EncoderSpec) and self.get_key() == other.get_key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.get_key())
+
+    def __repr__(self):
+        return 'EncoderSpec({0!r}, {1!r}, {2!r})'.format(self.factory, self.properties, self.converters)
+
+    def make_bin(self):
+        """Returns a bin of queue > converters > encoder with "sink" and "src" ghost pads."""
+        bin = gst.Bin()
+
+        elements = [gst.element_factory_make('queue')]
+        elements.extend(gst.element_factory_make(converter) for converter in self.converters)
+
+        encoder = gst.element_factory_make(self.factory, 'encoder')
+        set_encoder_properties(encoder, self.properties)
+        drop_gaps(encoder)
+        elements.append(encoder)
+
+        for element in elements:
+            bin.add(element)
+        gst.element_link_many(*elements)
+
+        bin.add_pad(gst.GhostPad('sink', elements[0].get_static_pad('sink')))
+        bin.add_pad(gst.GhostPad('src', encoder.get_static_pad('src')))
+        return bin
+
+
+class EncoderStage(object):
+    """A shared encoder, fed from a raw tee, with a tee fanning its output out to every output using it."""
+
+    def __init__(self, spec, player, source_tee):
+        self.spec = spec
+        self.player = player
+        self.source_tee = source_tee
+        self.users = 0
+
+        self.bin = spec.make_bin()
+        self.tee = gst.element_factory_make('tee')
+        player.add(self.bin)
+        player.add(self.tee)
+        self.bin.link(self.tee)
+        self.bin.sync_state_with_parent()
+        self.tee.sync_state_with_parent()
+
+        self.source_pad = source_tee.get_request_pad('src%d')
+        log.debug("Created shared encoder %s", spec)
+
+    def link_source(self):
+        """Starts feeding the encoder from the raw tee."""
+        self.source_pad.link(self.bin.get_static_pad('sink'))
+
+    def request_keyframe(self):
+        """Asks the encoder to start a new keyframe as soon as possible."""
+        event = gst.event_new_custom(gst.EVENT_CUSTOM_UPSTREAM, gst.Structure('GstForceKeyUnit'))
+        self.bin.get_static_pad('src').send_event(event)
+
+    def release(self):
+        """Removes the encoder and its tee from the pipeline."""
+        if self.source_pad.is_linked():
+            self.source_pad.unlink(self.bin.get_static_pad('sink'))
+        self.source_tee.release_request_pad(self.source_pad)
+        for element in [self.bin, self.tee]:
+            element.set_state(gst.STATE_NULL)
+            self.player.remove(element)
+        log.debug("Released shared encoder %s", self.spec)
+
+
+class KeyframeGate(object):
+    """Drops delta units going through a pad while closed, opening again at the next keyframe.
+
+    Outputs joining a running encoder start closed so their stream starts on
+    a keyframe; leaky queues of encoded data close the gate when they drop
+    buffers so the output skips ahead instead of sending broken frames.
+    """
+
+    def __init__(self, pad, closed=False):
+        self.closed = closed
+        pad.add_buffer_probe(self._on_buffer)
+
+    def close(self, *args):
+        self.closed = True
+
+    def _on_buffer(self, pad, buffer):
+        if self.closed:
+            if buffer.flag_is_set(gst.BUFFER_FLAG_DELTA_UNIT):
+                return False
+            self.closed = False
+        return True
+
+
+def make_output_bin(encoders, muxer_bin):
+    """Returns a self-contained output bin: private encoders feeding muxer_bin.
+
+    Used for output plugins that only describe their encoders, where the
+    output is used on its own rather than through Multimedia's shared
+    encoders.
+    """
+    bin = gst.Bin()
+    bin.add(muxer_bin)
+
+    for kind, spec in encoders.items():
+        encoder = spec.make_bin()
+        bin.add(encoder)
+        encoder.get_static_pad('src').link(muxer_bin.get_static_pad(kind + 'sink'))
+        bin.add_pad(gst.GhostPad(kind + 'sink', encoder.get_static_pad('sink')))
+
+    return bin
@@ -0,0 +1,128 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import time
+import zlib
+
+import pygst
+pygst.require("0.10")
+import gst
+
+
+class ChangeDetector(object):
+    """Drops video buffers that are identical to the previous one.
+
+    Unchanged frames are detected by checksumming the whole buffer, which is
+    far cheaper than converting and encoding it. One buffer is let through at
+    least every max_interval seconds so that downstream elements (videorate,
+    muxers waiting to interleave audio) never stall on a static screen.
+
+    With blocks set, only that many blocks of block_size bytes spread evenly
+    over the frame are checksummed, and a frame where at most threshold of
+    them changed counts as unchanged. Changes falling between the sampled
+    blocks (e.g. the mouse pointer) then show up at the next forced frame.
+
+    With mark_gaps set, unchanged frames are passed on flagged as GAP rather
+    than dropped, keeping timestamps continuous for encoders that can write
+    a gap as a duplicate of the previous frame (theoraenc's dup-on-gap).
+    """
+
+    DEFAULT_MAX_INTERVAL = 0.5
+    DEFAULT_BLOCK_SIZE = 256
+
+    def __init__(self, max_interval=DEFAULT_MAX_INTERVAL, blocks=0, block_size=DEFAULT_BLOCK_SIZE, threshold=0,
+                 mark_gaps=False):
+        self.max_interval = max_interval
+        self.mark_gaps = mark_gaps
+        self.blocks = blocks
+        self.block_size = block_size
+        self.threshold = threshold
+        self.frames = 0
+        self.skipped = 0
+
+        self._last_signature = None
+        self._last_passed = None
+        self._offsets = {}
+
+    def get_offsets(self, size):
+        """Returns the start of each sampled block in a frame of size bytes."""
+        if size not in self._offsets:
+            step = max(size // self.blocks, 1)
+            # Sample the middle of each stretch rather than its start, which
+            # for most layouts is the left edge of the picture
+            margin = max((step - self.block_size) // 2, 0)
+            self._offsets[size] = [offset + margin for offset in range(0, size, step)][:self.blocks]
+        return self._offsets[size]
+
+    def get_signature(self, data):
+        """Returns the checksums compared between frames."""
+        if not self.blocks:
+            return [zlib.crc32(data)]
+        return [zlib.crc32(data[offset:offset + self.block_size]) for offset in self.get_offsets(len(data))]
+
+    def is_similar(self, signature):
+        if self._last_signature is None or len(signature) != len(self._last_signature):
+            return False
+        changed = sum(1 for current, last in zip(signature, self._last_signature) if current != last)
+        return changed <= self.threshold
+
+    def attach(self, pad):
+        """Starts filtering the buffers going through pad."""
+        pad.add_buffer_probe(self._on_buffer)
+
+    def is_changed(self, data, timestamp):
+        """Returns True if the frame holding data, at timestamp seconds, should be passed on."""
+        self.frames += 1
+        signature = self.get_signature(data)
+
+        # Skipped frames are compared against the last frame passed on, so
+        # that small changes adding up eventually get through
+        if (self.is_similar(signature) and self._last_passed is not None and
+                timestamp - self._last_passed < self.max_interval):
+            self.skipped += 1
+            return False
+
+        self._last_signature = signature
+        self._last_passed = timestamp
+        return True
+
+    def get_stats(self):
+        return {'frames': self.frames, 'skipped': self.skipped}
+
+    def process_buffer(self, buffer):
+        """Returns True if buffer should be passed on, flagging it as a gap if it's unchanged and mark_gaps is set."""
+        if buffer.timestamp != gst.CLOCK_TIME_NONE:
+            timestamp = float(buffer.timestamp) / gst.SECOND
+        else:
+            timestamp = time.time()
+
+        if self.is_changed(buffer, timestamp):
+            return True
+        if self.mark_gaps:
+            buffer.flag_set(gst.BUFFER_FLAG_GAP)
+            return True
+        return False
+
+    def _on_buffer(self, pad, buffer):
+        return self.process_buffer(buffer)
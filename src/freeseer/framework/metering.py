@@ -0,0 +1,96 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+# Levels at or below this are reported as silence.
+SILENCE_DB = -100.0
+
+
+class AudioMeter(object):
+    """Per-channel RMS and peak levels (in dB) of the audio being recorded.
+
+    The levels are measured by a single `level` element placed between the
+    audio mixer and the audio tee, and shared by the GUI, CLI and REST
+    frontends. The element posts one message per interval, so updates are
+    decimated to the meter rate where they are measured.
+    """
+
+    DEFAULT_RATE = 10  # updates per second
+
+    def __init__(self, rate=DEFAULT_RATE):
+        self.rate = rate
+        self.subscribers = []
+        self.reset()
+
+    def reset(self):
+        """Clears the last measured levels."""
+        self.rms = []
+        self.peak = []
+
+    def get_interval(self):
+        """Returns the time between two updates in nanoseconds, as used by the level element."""
+        rate = max(1, int(self.rate))
+        return 1000000000 // rate
+
+    def subscribe(self, callback):
+        """Registers callback(meter) to be called each time the levels are updated."""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def update(self, structure):
+        """Reads the levels out of a `level` message structure and notifies subscribers."""
+        self.rms = [max(float(value), SILENCE_DB) for value in structure['rms']]
+        self.peak = [max(float(value), SILENCE_DB) for value in structure['peak']]
+
+        for callback in self.subscribers:
+            callback(self)
+
+    def get_rms(self):
+        """Returns the loudest channel's RMS level in dB."""
+        return max(self.rms) if self.rms else SILENCE_DB
+
+    def get_peak(self):
+        """Returns the loudest channel's peak level in dB."""
+        return max(self.peak) if self.peak else SILENCE_DB
+
+    def get_percent(self):
+        """Returns the RMS level on the 0-100 scale used by the audio feedback slider."""
+        return db_to_percent(self.get_rms())
+
+    def get_levels(self):
+        """Returns the current levels as a dictionary for the CLI and REST frontends."""
+        return {
+            'rms': self.rms,
+            'peak': self.peak,
+            'percent': self.get_percent(),
+        }
+
+
+def db_to_percent(db):
+    """Maps a level from -50dB..0dB onto 0..100, clamping values outside that range."""
+    percent = (int(round(db)) + 50) * 2
+    return min(max(percent, 0), 100)
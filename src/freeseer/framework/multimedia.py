@@ -25,6 +25,8 @@
 import datetime
 import logging
 import os
+import tempfile
+import time
 
 import gobject
 gobject.threads_init()
@@ -32,6 +34,11 @@ import pygst
 pygst.require("0.10")
 import gst
 
+from freeseer.framework import colorspace
+from freeseer.framework.encoding import EncoderStage, KeyframeGate, get_thread_budget
+from freeseer.framework.metering import AudioMeter
+from freeseer.framework.pipeline_stats import PipelineStats
+from freeseer.framework.resilience import make_resilient
 from freeseer.framework.presentation import Presentation
 from freeseer.framework.plugin import IOutput
 from freeseer.framework.util import get_record_name
@@ -44,6 +51,15 @@ class Multimedia:
     RECORD = 'RECORD'
     PAUSE = 'PAUSE'
     STOP = 'STOP'
+    PREVIEW = 'PREVIEW'
+    STOPPING = 'STOPPING'
+
+    # Seconds stop_async() waits for the outputs to finish before forcing the pipeline down
+    STOP_TIMEOUT = 10
+
+    # Recording locations claimed by the pipelines of this process, so that
+    # rooms loaded at the same time never pick the same file
+    claimed_locations = set()
 
     def __init__(self, config, plugman, window_id=None, audio_feedback=None, cli=False):
         self.config = config
@@ -52,18 +68,61 @@ class Multimedia:
         self.audio_feedback_event = audio_feedback
         self.cli = cli
 
+        self.current_state = Multimedia.NULL
+
+        # Audio levels shared by the frontends, updated by the audio_level element
+        self.audio_meter = AudioMeter(self.config.audio_meter_rate)
+
+        # Pre-rolled pipeline for the next recording, see prepare_standby()
+        self.standby = None
+
+        # Seconds between the last record() call and the pipeline reaching PLAYING
+        self.start_latency = None
+        self._record_requested_at = None
+
+        # Pending stop_async() completion, see _finish_stop()
+        self._stop_callback = None
+        self._stop_timer = None
+
+        # Transcodes intermediate recordings once finalized, see set_transcoder()
+        self.transcoder = None
+
+        self._init_player()
+
+        log.debug("Gstreamer initialized.")
+
+    def _init_player(self):
+        """Creates an empty player pipeline along with its bus handlers and entry points."""
         self.record_audio = False
         self.record_video = False
-
-        self.current_state = Multimedia.NULL
+        self.audio_input_plugins = []
+        self.video_input_plugins = []
+        self.output_plugins = []
+        self.output_bins = {}
+        self.output_links = {}
+        # Output bin -> the plugin that made it
+        self.output_owners = {}
+        self.encoder_stages = {}
+        self.keyframe_gates = {}
+        self.preroll_queues = []
+        # (queue, pad, probe id) of the stream outputs held back while previewing
+        self.held_stream_pads = []
+        self.compressed_tees = {}
+        self.compressed_outputs = []
+        self.encoder_threads = 1
+        self.transcode_formats = []
+        self.stream_senders = {}
+        self.draining_outputs = []
+        self.presentation = None
+        self.metadata = None
+        self.file_output_plugin = None
+        self.file_output_bin = None
+        self.file_path = None
+        self.locations = []
 
         # Initialize Player
         self.player = gst.Pipeline('player')
-        bus = self.player.get_bus()
-        bus.add_signal_watch()
-        bus.enable_sync_message_emission()
-        bus.connect('message', self.on_message)
-        bus.connect('sync-message::element', self.on_sync_message)
+        self._connect_bus()
 
         # Initialize Entry Points
         self.audio_tee = gst.element_factory_make('tee', 'audio_tee')
@@ -71,7 +130,31 @@ class Multimedia:
         self.player.add(self.audio_tee)
         self.player.add(self.video_tee)
 
-        log.debug("Gstreamer initialized.")
+        # Single audio meter for every output, fed by the audio mixer
+        self.audio_level = gst.element_factory_make('level', 'audio_level')
+        self.audio_level.set_property('interval', self.audio_meter.get_interval())
+        self.audio_level.set_property('message', True)
+        self.player.add(self.audio_level)
+        self.audio_level.link(self.audio_tee)
+
+        self.pipeline_stats = PipelineStats(self.player)
+        self.pipeline_stats.watch_pad('audio', self.audio_tee.get_static_pad('sink'))
+        self.pipeline_stats.watch_pad('video', self.video_tee.get_static_pad('sink'))
+
+    def _connect_bus(self):
+        bus = self.player.get_bus()
+        bus.add_signal_watch()
+        bus.enable_sync_message_emission()
+        self.bus_handlers = [bus.connect('message', self.on_message),
+                             bus.connect('sync-message::element', self.on_sync_message)]
+
+    def _disconnect_bus(self):
+        bus = self.player.get_bus()
+        for handler in self.bus_handlers:
+            bus.disconnect(handler)
+        bus.disable_sync_message_emission()
+        bus.remove_signal_watch()
+        self.bus_handlers = []
 
     ##
     ## GST Player Functions
@@ -80,7 +163,18 @@ class Multimedia:
         t = message.type
 
         if t == gst.MESSAGE_EOS:
-            self.stop()
+            if self.current_state == Multimedia.STOPPING:
+                self._finish_stop()
+            else:
+                self.stop()
+
+        elif t == gst.MESSAGE_STATE_CHANGED:
+            if message.src == self.player and self._record_requested_at is not None:
+                old, new, pending = message.parse_state_changed()
+                if new == gst.STATE_PLAYING:
+                    self.start_latency = time.time() - self._record_requested_at
+                    self._record_requested_at = None
+                    log.info("Recording start latency: %.3fs", self.start_latency)
 
         elif t == gst.MESSAGE_ERROR:
             err, debug = message.parse_error()
@@ -89,17 +183,10 @@ class Multimedia:
         elif message.structure is not None:
             s = message.structure.get_name()
 
-            if s == 'level' and self.audio_feedback_event is not None:
-                msg = message.structure.to_string()
-                rms_dB = float(msg.split(',')[6].split('{')[1].rstrip('}'))
-
-                # This is an inaccurate representation of decibels into percent
-                # conversion, this code should be revisited.
-                try:
-                    percent = (int(round(rms_dB)) + 50) * 2
-                except OverflowError:
-                    percent = 0
-                self.audio_feedback_event(percent)
+            if s == 'level':
+                self.audio_meter.update(message.structure)
+                if self.audio_feedback_event is not None:
+                    self.audio_feedback_event(self.audio_meter.get_percent())
 
     def on_sync_message(self, bus, message):
         if message.structure is None:
@@ -115,6 +202,10 @@ class Multimedia:
         """Sets the Window ID which GStreamer should paint on"""
         self.window_id = window_id
 
+    def get_pipeline_stats(self):
+        """Returns a snapshot of the throughput, queue and drop statistics of the pipeline"""
+        return self.pipeline_stats.snapshot()
+
     def set_audio_feedback_handler(self, audio_feedback):
         """Sets the handler for Audio Feedback levels"""
         self.audio_feedback_event = audio_feedback
@@ -173,8 +264,32 @@ class Multimedia:
     def record(self):
         """
         Start recording.
+
+        If a standby pipeline was prepared, it replaces the stopped pipeline
+        and only has to be switched to PLAYING. When previewing, the
+        pre-rolled buffers are written to the file output first.
         """
-        self.player.set_state(gst.STATE_PLAYING)
+        requested_at = time.time()
+        self._finish_pending_stop()
+
+        if self.standby is not None and self.current_state in [Multimedia.NULL, Multimedia.STOP]:
+            self._promote_standby()
+
+        if self.current_state == Multimedia.PREVIEW:
+            self._release_preroll()
+            self._release_stream_outputs()
+
+        if self.player.get_state(0)[1] == gst.STATE_PLAYING:
+            # Already running (previewing), no state change to wait for
+            self._record_requested_at = None
+            self.start_latency = time.time() - requested_at
+            log.info("Recording start latency: %.3fs", self.start_latency)
+        else:
+            self._record_requested_at = requested_at
+            self.player.set_state(gst.STATE_PLAYING)
+
+        if self.config.pipeline_stats_log:
+            self.pipeline_stats.start_log(self.config.pipeline_stats_log, self.config.pipeline_stats_interval)
         self.current_state = Multimedia.RECORD
         log.debug("Recording started.")
 
@@ -186,26 +301,343 @@ class Multimedia:
         self.current_state = Multimedia.PAUSE
         log.debug("Gstreamer paused.")
 
+    def preview(self):
+        """
+        Start the pipeline without recording.
+
+        The file output is held back while its queues keep the last
+        preroll_time seconds (up to preroll_memory_limit MB) of what it would
+        have recorded, so record() starts the recording that far back. Outputs
+        using shared encoders are pre-rolled encoded.
+
+        Stream outputs get nothing until record(), so the talk isn't broadcast
+        before it starts.
+
+        Falls back to pause() if pre-roll is disabled or not possible with the
+        file output policy. Returns True if the pipeline is pre-rolling.
+        """
+        if self.config.preroll_time <= 0 or self.file_output_bin is None:
+            self.pause()
+            return False
+
+        queues = [queue for tee, teepad, queue in self.output_links[self.file_output_bin]]
+        if any(queue.get_factory().get_name() != 'queue' for queue in queues):
+            log.warning("Pre-roll is not available with the %s output policy.", OutputPolicy.SPILL)
+            self.pause()
+            return False
+
+        max_bytes = self.config.preroll_memory_limit * 1024 * 1024 // max(len(queues), 1)
+        self.preroll_queues = []
+        for queue in queues:
+            queue.set_property('leaky', OutputPolicy.LEAKY_DOWNSTREAM)
+            queue.set_property('max-size-time', self.config.preroll_time * gst.SECOND)
+            queue.set_property('max-size-bytes', max_bytes)
+
+            # Buffers dropped from the front of encoded data start the recording on a keyframe
+            handler = None
+            if queue in self.keyframe_gates:
+                handler = queue.connect('overrun', self.keyframe_gates[queue].close)
+            self.preroll_queues.append((queue, handler))
+
+            queue.get_static_pad('src').set_blocked_async(True, self._on_preroll_pad_blocked)
+
+        for bin in self.output_plugins:
+            self._hold_stream_output(bin)
+
+        self.player.set_state(gst.STATE_PLAYING)
+        self.current_state = Multimedia.PREVIEW
+        log.debug("Pre-rolling %s seconds of the file output.", self.config.preroll_time)
+        return True
+
+    def get_preroll_memory(self):
+        """Returns the number of bytes held in the pre-roll buffer."""
+        return sum(queue.get_property('current-level-bytes') for queue, handler in self.preroll_queues)
+
+    def _release_preroll(self):
+        """Sets the file output queues back to their output policy and lets the pre-rolled buffers through."""
+        policy = self.get_output_policy(self.file_output_plugin)
+        for queue, handler in self.preroll_queues:
+            if handler is not None:
+                queue.disconnect(handler)
+            if policy != OutputPolicy.LEAKY:
+                queue.set_property('leaky', 0)
+            queue.set_property('max-size-bytes', 0)
+            queue.set_property('max-size-time', max(OutputPolicy.MAX_QUEUE_TIME, queue.get_property('max-size-time')))
+            queue.get_static_pad('src').set_blocked_async(False, self._on_preroll_pad_blocked)
+        self.preroll_queues = []
+
+    def _release_output_preroll(self, bin):
+        """Lets a bin's pre-rolled buffers through and stops tracking its pre-roll queues."""
+        queues = [queue for tee, teepad, queue in self.output_links.get(bin, [])]
+        for queue, handler in self.preroll_queues:
+            if queue in queues:
+                if handler is not None:
+                    queue.disconnect(handler)
+                queue.get_static_pad('src').set_blocked_async(False, self._on_preroll_pad_blocked)
+        self.preroll_queues = [entry for entry in self.preroll_queues if entry[0] not in queues]
+
+    def _hold_stream_output(self, bin):
+        """Drops what the tees send a stream output's bin until _release_stream_outputs()."""
+        plugin = self.output_owners.get(bin)
+        if plugin is None or plugin.get_recordto() != IOutput.STREAM:
+            return
+        # Dropped in front of the queues, so that they don't fill up or spill meanwhile
+        for tee, teepad, queue in self.output_links.get(bin, []):
+            pad = queue.get_static_pad('sink')
+            self.held_stream_pads.append((queue, pad, pad.add_buffer_probe(self._drop_held_buffer)))
+
+    def _drop_held_buffer(self, pad, buffer):
+        return False
+
+    def _unhold_stream_output(self, bin):
+        """Stops holding back a stream output's bin, e.g. when it is detached."""
+        queues = [queue for tee, teepad, queue in self.output_links.get(bin, [])]
+        for queue, pad, probe in self.held_stream_pads:
+            if queue in queues:
+                pad.remove_buffer_probe(probe)
+        self.held_stream_pads = [held for held in self.held_stream_pads if held[0] not in queues]
+
+    def _release_stream_outputs(self):
+        """Lets the held back stream outputs go live, starting encoded streams on a keyframe."""
+        for queue, pad, probe in self.held_stream_pads:
+            if queue in self.keyframe_gates:
+                self.keyframe_gates[queue].close()
+                for stage in self.encoder_stages.values():
+                    if stage.tee is pad.get_peer().get_parent_element():
+                        stage.request_keyframe()
+            pad.remove_buffer_probe(probe)
+        self.held_stream_pads = []
+
+    def _on_preroll_pad_blocked(self, pad, blocked):
+        log.debug("Pre-roll queue %s %s.", pad.get_parent().get_name(), "held" if blocked else "released")
+
     def stop(self):
         """
         Stop recording.
+
+        The pipeline is torn down right away, so muxers don't get to finalize
+        their files; see stop_async(). Does nothing while stop_async() is
+        waiting for the outputs to finish.
+        """
+        if self.current_state not in [Multimedia.NULL, Multimedia.STOP, Multimedia.STOPPING]:
+            self._teardown()
+
+    def stop_async(self, callback=None, timeout=STOP_TIMEOUT):
         """
-        if self.current_state != Multimedia.NULL and self.current_state != Multimedia.STOP:
-            self.player.set_state(gst.STATE_NULL)
+        Stop recording after every output has finalized its file.
 
-            self.unload_audiomixer()
-            self.unload_videomixer()
-            self.unload_output_plugins()
+        Sends EOS through the pipeline and returns right away; the pipeline is
+        torn down once the EOS has reached every sink, or after timeout
+        seconds. callback(file_path, size, duration) is then called from the
+        main loop with the recorded file, its size in bytes and the recorded
+        duration in seconds (file_path is None without a file output).
 
-            self.current_state = Multimedia.STOP
+        Returns True if the stop is pending, False if the pipeline was
+        stopped right away.
+        """
+        if self.current_state == Multimedia.STOPPING:
+            log.warning("Already stopping.")
+            return True
 
+        if self.current_state not in [Multimedia.RECORD, Multimedia.PAUSE]:
+            # Nothing was recorded, no file to finalize
+            duration = self._get_duration()
+            self.stop()
+            if callback is not None:
+                callback(*self._get_stop_result(duration))
+            return False
+
+        if self.current_state == Multimedia.PAUSE:
+            # EOS only flows through a playing pipeline
+            self.player.set_state(gst.STATE_PLAYING)
+
+        self.current_state = Multimedia.STOPPING
+        self._stop_callback = callback
+        self._stop_timer = gobject.timeout_add(int(timeout * 1000), self._on_stop_timeout)
+        self.player.send_event(gst.event_new_eos())
+        log.debug("Waiting for the outputs to finish.")
+        return True
+
+    def _on_stop_timeout(self):
+        self._stop_timer = None
+        log.warning("Outputs did not finish within the stop timeout, the recording may not be finalized.")
+        self._finish_stop()
+        return False
+
+    def _finish_stop(self):
+        """Tears down the pipeline after stop_async() and reports the recording to its callback."""
+        if self._stop_timer is not None:
+            gobject.source_remove(self._stop_timer)
+            self._stop_timer = None
+
+        callback = self._stop_callback
+        self._stop_callback = None
+
+        duration = self._get_duration()
+        record_audio, record_video = self.record_audio, self.record_video
+        self._teardown()
+        log.debug("Outputs finished.")
+
+        result = self._get_stop_result(duration)
+        self.queue_transcode(result[0], record_audio, record_video)
+        if callback is not None:
+            callback(*result)
+
+    def _finish_pending_stop(self):
+        """Completes a stop_async() still waiting for EOS, before the pipeline is reused."""
+        if self.current_state == Multimedia.STOPPING:
+            log.warning("Pipeline reused before it finished stopping, forcing it down.")
+            self._finish_stop()
+
+    def _get_duration(self):
+        """Returns the position of the pipeline in seconds, or None if it can't be queried."""
+        try:
+            position, format = self.player.query_position(gst.FORMAT_TIME, None)
+        except gst.QueryError:
+            return None
+        return float(position) / gst.SECOND
+
+    def _get_stop_result(self, duration):
+        file_path = self.file_path
+        size = 0
+        if file_path:
             try:
-                if not os.path.getsize(self.file_path):
-                    os.remove(self.file_path)
+                size = os.path.getsize(file_path)
             except OSError:
                 pass
+        return file_path, size, duration
+
+    def _teardown(self):
+        """Sets the pipeline to NULL and unloads every plugin."""
+        self.player.set_state(gst.STATE_NULL)
+        self.pipeline_stats.stop_log()
+
+        self.unload_audiomixer()
+        self.unload_videomixer()
+        self.unload_output_plugins()
 
-            log.debug("Gstreamer stopped.")
+        self.current_state = Multimedia.STOP
+        self.audio_meter.reset()
+        self._remove_empty_file()
+
+        log.debug("Gstreamer stopped.")
+
+    def _remove_empty_file(self):
+        """Removes the file output's file if nothing was recorded to it."""
+        try:
+            if self.file_path and not os.path.getsize(self.file_path):
+                os.remove(self.file_path)
+        except OSError:
+            pass
+
+    ##
+    ## Warm Standby
+    ##
+
+    # Attributes that make up a loaded pipeline, handed over as a unit when a
+    # standby pipeline is promoted.
+    PIPELINE_ATTRIBUTES = [
+        'player',
+        'audio_tee',
+        'audio_level',
+        'pipeline_stats',
+        'video_tee',
+        'output_plugins',
+        'output_bins',
+        'output_links',
+        'output_owners',
+        'encoder_stages',
+        'keyframe_gates',
+        'preroll_queues',
+        'held_stream_pads',
+        'compressed_tees',
+        'compressed_outputs',
+        'encoder_threads',
+        'transcode_formats',
+        'stream_senders',
+        'presentation',
+        'metadata',
+        'draining_outputs',
+        'file_output_plugin',
+        'file_output_bin',
+        'record_audio',
+        'record_video',
+        'audiomixer',
+        'videomixer',
+        'audio_input_plugins',
+        'video_input_plugins',
+        'file_path',
+        'locations',
+    ]
+
+    def prepare_standby(self, presentation=None, filename=None):
+        """Builds and pre-rolls the pipeline for the next recording.
+
+        The pipeline is built in a separate gst.Pipeline while the current
+        one keeps recording and is set to PAUSED, so every element is created,
+        linked and configured by the time record() is called.
+
+        Inputs that can only be opened once (e.g. a webcam in use by the
+        current recording) fail to pre-roll; in that case the standby is
+        dropped and the next recording loads the backend as usual.
+
+        Returns the same result as load_backend(), or False on failure.
+        """
+        self.discard_standby()
+
+        standby = Multimedia(self.config, self.plugman, self.window_id, self.audio_feedback_event, self.cli)
+        result = standby.load_backend(presentation, filename)
+        if not result:
+            log.error("Failed to load the standby pipeline.")
+            standby._disconnect_bus()
+            return False
+
+        if standby.player.set_state(gst.STATE_PAUSED) == gst.STATE_CHANGE_FAILURE:
+            log.warning("Standby pipeline could not be pre-rolled, it will be loaded when recording starts.")
+            standby.player.set_state(gst.STATE_NULL)
+            standby._disconnect_bus()
+            return False
+
+        standby.current_state = Multimedia.PAUSE
+        self.standby = standby
+        log.debug("Standby pipeline pre-rolled.")
+        return result
+
+    def discard_standby(self):
+        """Tears down the standby pipeline if one was prepared."""
+        if self.standby is not None:
+            self.standby.player.set_state(gst.STATE_NULL)
+            self.standby._disconnect_bus()
+            self.standby.release_locations()
+            # Pre-rolling already created the file
+            self.standby._remove_empty_file()
+            self.standby = None
+            log.debug("Standby pipeline discarded.")
+
+    def _promote_standby(self):
+        """Replaces the current (stopped) pipeline with the pre-rolled standby pipeline."""
+        standby = self.standby
+        self.standby = None
+
+        standby._disconnect_bus()
+        self._disconnect_bus()
+        self.player.set_state(gst.STATE_NULL)
+
+        for attribute in self.PIPELINE_ATTRIBUTES:
+            setattr(self, attribute, getattr(standby, attribute, None))
+
+        self._connect_bus()
+        self.current_state = standby.current_state
+        log.debug("Standby pipeline promoted.")
+
+    def preview_standby(self):
+        """Starts pre-rolling the standby pipeline, see preview().
+
+        Returns True if the standby pipeline is pre-rolling.
+        """
+        if self.standby is None:
+            return False
+        return self.standby.preview()
 
     def prepare_metadata(self, presentation):
         """Returns a dictionary of tags and tag values.
@@ -224,7 +656,63 @@ class Multimedia:
     ## Plugin Loading
     ##
 
+    def get_plugin_instance(self, name, category):
+        """Returns a new instance of a plugin for this pipeline, or None if there is no such plugin.
+
+        The plugin objects loaded by the plugin manager are shared by every
+        Multimedia in the process; the instances keep the state of a single
+        pipeline (location, tags, config) so several can record at once.
+        """
+        plugin_info = self.plugman.get_plugin_by_name(name, category)
+        if plugin_info is None:
+            return None
+        return plugin_info.plugin_object.new_instance()
+
+    def set_output_location(self, plugin, presentation=None, filename=None):
+        """Sets the record location of an output plugin.
+
+        Returns the record name and the presentation it was made for, or
+        (None, None) if neither a presentation nor a filename was provided.
+        """
+        extension = plugin.get_extension()
+
+        # Create a filename to record to.
+        claimed = Multimedia.claimed_locations
+        if presentation is None and filename is not None:
+            record_name = get_record_name(extension, filename=filename, path=self.config.videodir, reserved=claimed)
+            presentation = Presentation(filename)
+        elif presentation is not None:
+            record_name = get_record_name(extension, presentation=presentation, path=self.config.videodir, reserved=claimed)
+        else:
+            # Invalid combination you must pass in a presentation or a filename
+            logging.error("Failed to configure recording name. No presentation or filename provided.")
+            return None, None
+
+        # This is to ensure that we don't log a message when extension is None
+        if extension is not None:
+            log.info('Set record name to %s', record_name)
+
+        record_location = os.path.abspath(self.config.videodir + '/' + record_name)
+        plugin.set_recording_location(record_location)
+
+        if extension is not None:
+            claimed.add(record_location)
+            self.locations.append(record_location)
+
+        return record_name, presentation
+
+    def release_locations(self):
+        """Gives up the recording locations claimed by set_output_location()."""
+        for location in self.locations:
+            Multimedia.claimed_locations.discard(location)
+        self.locations = []
+
     def load_backend(self, presentation=None, filename=None):
+        self._finish_pending_stop()
+
+        # A freshly loaded backend makes any prepared standby pipeline stale.
+        self.discard_standby()
+
         log.debug("Loading Output plugins...")
 
         filename_for_frontend = None
@@ -234,8 +722,15 @@ class Multimedia:
         self.update_video_quality()
         self.update_audio_quality()
 
+        self.transcode_formats = []
         if self.config.record_to_file:
-            p = self.plugman.get_plugin_by_name(self.config.record_to_file_plugin, "Output")
+            file_plugin = self.config.record_to_file_plugin
+            if self.config.capture_intermediate:
+                # Record cheaply now, the renditions are made once the file is finalized
+                file_plugin = self.config.intermediate_plugin
+                self.transcode_formats = [format.strip() for format in self.config.transcode_formats.split(',')
+                                          if format.strip()]
+            p = self.plugman.get_plugin_by_name(file_plugin, "Output")
             load_plugins.append(p)
 
         if self.config.record_to_stream:
@@ -251,36 +746,26 @@ class Multimedia:
             load_plugins.append(p)
 
         plugins = []
-        for plugin in load_plugins:
-            log.debug("Loading Output: %s", plugin.plugin_object.get_name())
+        for plugin_info in load_plugins:
+            plugin = plugin_info.plugin_object.new_instance()
+            log.debug("Loading Output: %s", plugin.get_name())
 
-            extension = plugin.plugin_object.get_extension()
-
-            # Create a filename to record to.
-            if presentation is None and filename is not None:
-                record_name = get_record_name(extension, filename=filename, path=self.config.videodir)
-                presentation = Presentation(filename)
-            elif presentation is not None:
-                record_name = get_record_name(extension, presentation=presentation, path=self.config.videodir)
-            else:
-                # Invalid combination you must pass in a presentation or a filename
-                logging.error("Failed to configure recording name. No presentation or filename provided.")
+            record_name, presentation = self.set_output_location(plugin, presentation, filename)
+            if record_name is None:
                 return False
 
             # This is to ensure that we don't log a message when extension is None
-            if extension is not None:
-                log.info('Set record name to %s', record_name)
+            if plugin.get_extension() is not None:
                 filename_for_frontend = record_name
 
             # Prepare metadata.
             metadata = self.prepare_metadata(presentation)
             #self.populate_metadata(data)
+            self.presentation = presentation
+            self.metadata = metadata
 
-            record_location = os.path.abspath(self.config.videodir + '/' + record_name)
-            plugin.plugin_object.set_recording_location(record_location)
-
-            plugin.plugin_object.load_config(self.plugman)
-            plugins.append(plugin.plugin_object)
+            plugin.load_config(self.plugman)
+            plugins.append(plugin)
 
         if not self.load_output_plugins(plugins,
                                         self.config.enable_audio_recording,
@@ -291,7 +776,7 @@ class Multimedia:
 
         if self.config.enable_audio_recording:
             log.debug("Loading Audio Recording plugins...")
-            audiomixer = self.plugman.get_plugin_by_name(self.config.audiomixer, "AudioMixer").plugin_object
+            audiomixer = self.get_plugin_instance(self.config.audiomixer, "AudioMixer")
             if audiomixer is not None:
                 audiomixer.load_config(self.plugman)
 
@@ -301,7 +786,7 @@ class Multimedia:
                 audioinputs = audiomixer.get_inputs()
                 for name, instance in audioinputs:
                     log.debug("Loading Audio Mixer Input: %s-%d", name, instance)
-                    audio_input = self.plugman.get_plugin_by_name(name, "AudioInput").plugin_object
+                    audio_input = self.get_plugin_instance(name, "AudioInput")
                     audio_input.set_instance(instance)
                     audio_input.load_config(self.plugman)
                     audiomixer_inputs.append(audio_input.get_audioinput_bin())
@@ -313,7 +798,7 @@ class Multimedia:
 
         if self.config.enable_video_recording:
             log.debug("Loading Video Recording plugins...")
-            videomixer = self.plugman.get_plugin_by_name(self.config.videomixer, "VideoMixer").plugin_object
+            videomixer = self.get_plugin_instance(self.config.videomixer, "VideoMixer")
             if videomixer is not None:
                 videomixer.load_config(self.plugman)
 
@@ -323,9 +808,10 @@ class Multimedia:
                 videoinputs = videomixer.get_inputs()
                 for name, instance in videoinputs:
                     log.debug("Loading Video Mixer Input: %s-%d", name, instance)
-                    video_input = self.plugman.get_plugin_by_name(name, "VideoInput").plugin_object
+                    video_input = self.get_plugin_instance(name, "VideoInput")
                     video_input.set_instance(instance)
                     video_input.load_config(self.plugman)
+                    video_input.set_output_size(videomixer.get_output_size())
                     videomixer_inputs.append(video_input.get_videoinput_bin())
 
                 if not self.load_videomixer(videomixer, videomixer_inputs):
@@ -334,46 +820,524 @@ class Multimedia:
                     self.unload_audiomixer()
                     return False
 
+                if self.config.plan_video_formats:
+                    self.plan_video_formats()
+
+        if self.record_video:
+            if not self.link_compressed_outputs():
+                self.unload_output_plugins()
+                self.unload_audiomixer()
+                self.unload_videomixer()
+                return False
+        elif self.compressed_outputs:
+            log.warning("Not recording video, outputs taking a compressed video stream get none.")
+            self.compressed_outputs = []
+
         if filename_for_frontend is not None:
             self.file_path = os.path.join(self.config.videodir, filename_for_frontend)
         return True, filename_for_frontend
 
     def load_output_plugins(self, plugins, record_audio, record_video, metadata):
         self.output_plugins = []
+        self.output_bins = {}
+        self.output_links = {}
+        self.file_output_plugin = None
+        self.file_output_bin = None
+        self.budget_encoder_threads(plugins, record_audio, record_video)
         for plugin in plugins:
-            type = plugin.get_type()
-            bin = plugin.get_output_bin(record_audio, record_video, metadata)
+            bin = self.add_output_bin(plugin, record_audio, record_video, metadata)
 
             if not bin:
-                log.error("Failed to load Output plugin: bin returned None")
                 self.unload_output_plugins()
                 return False
 
-            if type == IOutput.AUDIO:
-                if record_audio:
-                    self.player.add(bin)
-                    self.audio_tee.link(bin)
-                    self.output_plugins.append(bin)
-            elif type == IOutput.VIDEO:
-                if record_video:
-                    self.player.add(bin)
-                    self.video_tee.link(bin)
-                    self.output_plugins.append(bin)
-            elif type == IOutput.BOTH:
-                self.player.add(bin)
-                if record_audio:
-                    self.audio_tee.link_pads("src%d", bin, "audiosink")
-                if record_video:
-                    self.video_tee.link_pads("src%d", bin, "videosink")
-                self.output_plugins.append(bin)
+            self.output_plugins.append(bin)
+
+            if plugin.get_recordto() == IOutput.FILE:
+                self.file_output_plugin = plugin
+                self.file_output_bin = bin
 
         return True
 
+    def budget_encoder_threads(self, plugins, record_audio, record_video):
+        """Shares the CPUs between the video encoders the output plugins need.
+
+        Outputs asking for the same encoder share it, so each distinct video
+        encoder counts once, while outputs encoding in their own bin count
+        one each. Audio encoders are cheap and left out.
+        """
+        for plugin in plugins:
+            plugin.set_encoder_threads(1)
+
+        specs = set()
+        private = 0
+        for plugin in plugins:
+            encoders = plugin.get_encoders(record_audio, record_video)
+            if encoders is not None:
+                if 'video' in encoders:
+                    specs.add(encoders['video'])
+            elif record_video and plugin.own_video_encoder:
+                private += 1
+
+        encoders = len(specs) + private
+        self.encoder_threads = get_thread_budget(encoders)
+        for plugin in plugins:
+            plugin.set_encoder_threads(self.encoder_threads)
+        log.debug("%d video encoder(s), %d thread(s) each", encoders, self.encoder_threads)
+
+    def add_output_bin(self, plugin, record_audio, record_video, metadata, segment_start=None):
+        """Creates an output plugin's bin, adds it to the player and links it to the tees.
+
+        Outputs that declare their encoders only provide a muxer bin and are
+        fed by the shared encoder stages. Returns the bin, or None on failure.
+        """
+        encoders = plugin.get_encoders(record_audio, record_video)
+        if encoders is None:
+            bin = plugin.get_output_bin(record_audio, record_video, metadata)
+        else:
+            bin = plugin.get_muxer_bin(record_audio, record_video, metadata)
+
+        if not bin:
+            log.error("Failed to load Output plugin: bin returned None")
+            return None
+
+        if plugin.get_recordto() == IOutput.STREAM and self.config.resilient_streaming:
+            # Network failures take down a separate sender pipeline rather than this one
+            senders = make_resilient(bin, plugin.get_name(), self.config.stream_spool_size * 1024 * 1024)
+            if senders:
+                self.stream_senders[bin] = senders
+
+        self.player.add(bin)
+        bin.sync_state_with_parent()
+        self.output_links[bin] = self.link_output_bin(plugin, bin, record_audio, record_video,
+                                                      segment_start, encoders)
+        self.pipeline_stats.watch_output(plugin.get_name(), bin, self.output_links[bin])
+        self.output_bins[plugin.get_name()] = bin
+        self.output_owners[bin] = plugin
+
+        # Compressed streams come from the video inputs, which are loaded after the outputs
+        if plugin.get_compressed_caps() is not None:
+            self.compressed_outputs.append((plugin, bin, segment_start))
+            if self.record_video and not self.link_compressed_outputs():
+                return None
+        return bin
+
+    def link_compressed_outputs(self):
+        """Links the outputs waiting for a compressed stream to the video input producing it.
+
+        Video inputs offering their stream before decoding it do so on a
+        "compressedsrc" pad, fanned out by a tee so that it can feed several
+        outputs. Returns False if no input produces the stream an output needs.
+        """
+        while self.compressed_outputs:
+            plugin, bin, segment_start = self.compressed_outputs.pop(0)
+            caps = gst.caps_from_string(plugin.get_compressed_caps())
+            tee = self.get_compressed_tee(caps)
+            if tee is None:
+                log.error("No video input produces the %s stream needed by %s.", caps.to_string(), plugin.get_name())
+                return False
+
+            queue = self.make_policy_queue(self.get_output_policy(plugin))
+            self.player.add(queue)
+            queue.sync_state_with_parent()
+            queue.get_static_pad("src").link(bin.get_static_pad("compressedsink"))
+
+            teepad = tee.get_request_pad("src%d")
+            if segment_start is not None:
+                queue.get_static_pad("sink").send_event(
+                    gst.event_new_new_segment(False, 1.0, gst.FORMAT_TIME, segment_start, -1, 0))
+                teepad.add_buffer_probe(self._drop_buffers_before, segment_start)
+            teepad.link(queue.get_static_pad("sink"))
+            self.output_links.setdefault(bin, []).append((tee, teepad, queue))
+            self.pipeline_stats.watch_output_link(plugin.get_name(), tee, teepad, queue)
+        return True
+
+    def get_compressed_tee(self, caps):
+        """Returns the tee fanning out the compressed stream of the first video input producing caps, or None."""
+        for input in self.video_input_plugins:
+            pad = input.get_static_pad("compressedsrc")
+            if pad is None or pad.get_caps().intersect(caps).is_empty():
+                continue
+
+            if input not in self.compressed_tees:
+                tee = gst.element_factory_make("tee")
+                self.player.add(tee)
+                tee.sync_state_with_parent()
+                pad.link(tee.get_static_pad("sink"))
+                self.compressed_tees[input] = tee
+            return self.compressed_tees[input]
+        return None
+
+    def link_output_bin(self, plugin, bin, record_audio, record_video, segment_start=None, encoders=None):
+        """Links an output bin to the tees and returns the list of (tee, tee pad, queue) links made.
+
+        Every link goes through a queue set up according to the output's
+        OutputPolicy, so an output that falls behind can't hold up the tees
+        (and with them every other output) unless its policy says so.
+
+        encoders maps "audio"/"video" to the EncoderSpec the bin expects in
+        front of the matching pad; those pads are linked to the tee of a
+        shared encoder stage instead of the raw tee, see get_encoder_stage().
+
+        When segment_start is given, the bin is being linked to a running
+        pipeline: it receives a new segment starting at segment_start and
+        buffers from before that time are not passed on to it.
+        """
+        type = plugin.get_type()
+        pads = []
+        if type == IOutput.AUDIO:
+            if record_audio:
+                pads.append(('audio', self.audio_tee, bin.sink_pads().next()))
+        elif type == IOutput.VIDEO:
+            if record_video:
+                pads.append(('video', self.video_tee, bin.sink_pads().next()))
+        elif type == IOutput.BOTH:
+            if record_audio:
+                pads.append(('audio', self.audio_tee, bin.get_static_pad("audiosink")))
+            if record_video:
+                pads.append(('video', self.video_tee, bin.get_static_pad("videosink")))
+
+        policy = self.get_output_policy(plugin)
+
+        links = []
+        new_stages = []
+        for kind, tee, sinkpad in pads:
+            queue = self.make_policy_queue(policy)
+            self.player.add(queue)
+            queue.sync_state_with_parent()
+            queue.get_static_pad("src").link(sinkpad)
+
+            if encoders is not None and kind in encoders:
+                stage = self.get_encoder_stage(kind, encoders[kind], tee)
+                joining = stage.users > 0 and segment_start is not None
+                if stage.users == 0:
+                    new_stages.append(stage)
+                elif joining:
+                    # Start on the running encoder's next keyframe
+                    stage.request_keyframe()
+                gate = KeyframeGate(queue.get_static_pad("src"), closed=joining)
+                self.keyframe_gates[queue] = gate
+                if policy == OutputPolicy.LEAKY:
+                    queue.connect('overrun', gate.close)
+                stage.users += 1
+                tee = stage.tee
+
+            teepad = tee.get_request_pad("src%d")
+            if segment_start is not None:
+                queue.get_static_pad("sink").send_event(
+                    gst.event_new_new_segment(False, 1.0, gst.FORMAT_TIME, segment_start, -1, 0))
+                teepad.add_buffer_probe(self._drop_buffers_before, segment_start)
+            teepad.link(queue.get_static_pad("sink"))
+            links.append((tee, teepad, queue))
+
+        # Only feed new encoders once their outputs are linked
+        for stage in new_stages:
+            if segment_start is not None:
+                stage.bin.get_static_pad("sink").send_event(
+                    gst.event_new_new_segment(False, 1.0, gst.FORMAT_TIME, segment_start, -1, 0))
+                stage.source_pad.add_buffer_probe(self._drop_buffers_before, segment_start)
+            stage.link_source()
+        return links
+
+    def get_encoder_stage(self, kind, spec, source_tee):
+        """Returns the encoder stage encoding source_tee's stream according to spec, creating it if needed.
+
+        Outputs asking for the same encoder with the same settings share a
+        single stage, so each stream is only encoded once however many
+        outputs use it.
+        """
+        key = (kind, spec)
+        if key not in self.encoder_stages:
+            self.encoder_stages[key] = EncoderStage(spec, self.player, source_tee)
+        return self.encoder_stages[key]
+
+    def release_encoder_stage(self, tee):
+        """Drops one user of the encoder stage feeding tee, removing the stage when it has none left."""
+        for key, stage in self.encoder_stages.items():
+            if stage.tee is tee:
+                stage.users -= 1
+                if stage.users <= 0:
+                    stage.release()
+                    del self.encoder_stages[key]
+                return
+
+    def get_output_policy(self, plugin):
+        """Returns the OutputPolicy to use for an output plugin."""
+        recordto = plugin.get_recordto()
+        if recordto == IOutput.FILE:
+            return self.config.record_to_file_policy
+        elif recordto == IOutput.STREAM:
+            return self.config.record_to_stream_policy
+        else:
+            # Previews and feedback are only useful if they're live
+            return OutputPolicy.LEAKY
+
+    def make_policy_queue(self, policy):
+        """Creates the queue that isolates an output from the tees."""
+        if policy == OutputPolicy.SPILL:
+            queue = gst.element_factory_make('queue2')
+            queue.set_property('temp-template', os.path.join(tempfile.gettempdir(), 'freeseer-spill-XXXXXX'))
+            queue.set_property('max-size-buffers', 0)
+            queue.set_property('max-size-bytes', 0)
+            queue.set_property('max-size-time', 0)
+        else:
+            queue = gst.element_factory_make('queue')
+            queue.set_property('max-size-buffers', 0)
+            queue.set_property('max-size-bytes', 0)
+            queue.set_property('max-size-time', OutputPolicy.MAX_QUEUE_TIME)
+            if policy == OutputPolicy.LEAKY:
+                queue.set_property('leaky', OutputPolicy.LEAKY_DOWNSTREAM)
+        return queue
+
+    def get_stream_status(self):
+        """Returns the connection state, bitrate, reconnects and spooled bytes of each stream destination."""
+        return dict((sender.name, sender.get_stats())
+                    for senders in self.stream_senders.values() for sender in senders)
+
+    def get_output_drops(self):
+        """Returns the number of buffers each output dropped because it fell behind."""
+        return self.pipeline_stats.get_drops()
+
     def unload_output_plugins(self):
-        for plugin in self.output_plugins:
-            self.video_tee.unlink(plugin)
-            self.audio_tee.unlink(plugin)
-            self.player.remove(plugin)
+        for bin in self.output_plugins + self.draining_outputs:
+            self.unlink_output_bin(bin)
+            self.player.remove(bin)
+        self.pipeline_stats.clear_outputs()
+        self.release_locations()
+        self.output_plugins = []
+        self.output_bins = {}
+        self.preroll_queues = []
+        self.held_stream_pads = []
+        self.compressed_outputs = []
+        self.draining_outputs = []
+        self.file_output_plugin = None
+        self.file_output_bin = None
+        self.presentation = None
+        self.metadata = None
+
+    def unlink_output_bin(self, bin):
+        """Unlinks an output bin from the tees, releasing the tee pads and queues that fed it."""
+        for sender in self.stream_senders.pop(bin, []):
+            sender.stop()
+
+        plugin = self.output_owners.pop(bin, None)
+        if plugin is not None:
+            plugin.release_output_bin(bin)
+            # Unless the output was attached again while this bin was draining
+            if self.output_bins.get(plugin.get_name()) is None:
+                self.pipeline_stats.remove_output(plugin.get_name())
+
+        self._unhold_stream_output(bin)
+
+        for tee, teepad, queue in self.output_links.pop(bin, []):
+            peer = teepad.get_peer()
+            if peer is not None:
+                teepad.unlink(peer)
+            tee.release_request_pad(teepad)
+            queue.set_state(gst.STATE_NULL)
+            self.player.remove(queue)
+            self.keyframe_gates.pop(queue, None)
+            self.release_encoder_stage(tee)
+
+    def _drop_buffers_before(self, pad, buffer, start):
+        return buffer.timestamp == gst.CLOCK_TIME_NONE or buffer.timestamp >= start
+
+    ##
+    ## Rollover
+    ##
+    def rollover(self, presentation=None, filename=None):
+        """Switches the file output over to a new talk without stopping the pipeline.
+
+        Inputs, mixers, tees and the remaining outputs keep running. A new
+        file output bin, tagged for the new talk, is linked to the tees and
+        then the old bin's tee pads are blocked, unlinked and the old bin is
+        sent an EOS so its file is finalized before it's removed. Both bins
+        are fed while the swap happens, so no buffers are lost. When the
+        output uses shared encoders the new bin waits for the next keyframe,
+        which the encoder is asked to produce right away.
+
+        Returns the same result as load_backend(), or False if the pipeline
+        is not currently recording to a file.
+        """
+        if self.current_state != Multimedia.RECORD or self.file_output_bin is None:
+            log.error("Rollover needs a pipeline that is recording to a file.")
+            return False
+
+        plugin = self.file_output_plugin
+        record_name, presentation = self.set_output_location(plugin, presentation, filename)
+        if record_name is None:
+            return False
+
+        metadata = self.prepare_metadata(presentation)
+        old_bin = self.file_output_bin
+        running_time = self.player.get_clock().get_time() - self.player.get_base_time()
+
+        bin = self.add_output_bin(plugin, self.record_audio, self.record_video, metadata, running_time)
+        if not bin:
+            return False
+
+        self.output_plugins[self.output_plugins.index(old_bin)] = bin
+        self.file_output_bin = bin
+        self.presentation = presentation
+        self.metadata = metadata
+
+        self.drain_output_bin(old_bin, self.file_path)
+
+        self.file_path = os.path.join(self.config.videodir, record_name)
+        log.info("Rolled over to %s", record_name)
+        return True, record_name
+
+    ##
+    ## Hot Attach/Detach
+    ##
+    def is_loaded(self):
+        """Returns True if the backend is loaded and outputs can be attached or detached."""
+        return self.metadata is not None
+
+    def get_output_names(self):
+        """Returns the names of the output plugins attached to the pipeline."""
+        return self.output_bins.keys()
+
+    def attach_output(self, name):
+        """Adds an output plugin to the loaded pipeline, also while recording.
+
+        The other outputs keep running: new tee pads are requested for the
+        output's bin and, if the pipeline is recording, the bin starts with a
+        new segment at the current running time.
+
+        Returns True if the output was attached.
+        """
+        if not self.is_loaded():
+            log.error("Failed to attach output %s: backend is not loaded.", name)
+            return False
+
+        if name in self.output_bins:
+            log.warning("Output %s is already attached.", name)
+            return False
+
+        plugin = self.get_plugin_instance(name, "Output")
+        if plugin is None:
+            log.error("Failed to attach output %s: no such Output plugin.", name)
+            return False
+
+        if self.set_output_location(plugin, self.presentation)[0] is None:
+            return False
+        plugin.load_config(self.plugman)
+        # Running encoders keep their threads, use the same budget so equal settings still share them
+        plugin.set_encoder_threads(self.encoder_threads)
+
+        segment_start = None
+        if self.current_state in [Multimedia.RECORD, Multimedia.PREVIEW]:
+            segment_start = self.player.get_clock().get_time() - self.player.get_base_time()
+
+        bin = self.add_output_bin(plugin, self.record_audio, self.record_video, self.metadata, segment_start)
+        if not bin:
+            return False
+
+        self.output_plugins.append(bin)
+        if self.current_state == Multimedia.PREVIEW:
+            self._hold_stream_output(bin)
+
+        if plugin.get_recordto() == IOutput.FILE and self.file_output_bin is None:
+            self.file_output_plugin = plugin
+            self.file_output_bin = bin
+
+        log.info("Output %s attached.", name)
+        return True
+
+    def detach_output(self, name):
+        """Removes an output plugin from the pipeline, also while recording.
+
+        While recording, the output's tee pads are blocked and unlinked and
+        the output is sent an EOS so that it can finish cleanly; the other
+        outputs see no gap.
+
+        Returns True if the output was detached.
+        """
+        bin = self.output_bins.pop(name, None)
+        if bin is None:
+            log.warning("Output %s is not attached.", name)
+            return False
+
+        self.output_plugins.remove(bin)
+        if bin is self.file_output_bin:
+            self.file_output_plugin = None
+            self.file_output_bin = None
+            self.file_path = None
+
+        if self.current_state in [Multimedia.RECORD, Multimedia.PREVIEW]:
+            # Blocked pre-roll queues would hold back the EOS that finishes the bin
+            self._release_output_preroll(bin)
+            self._unhold_stream_output(bin)
+            self.drain_output_bin(bin)
+        else:
+            self.unlink_output_bin(bin)
+            bin.set_state(gst.STATE_NULL)
+            self.player.remove(bin)
+
+        log.info("Output %s detached.", name)
+        return True
+
+    def drain_output_bin(self, bin, file_path=None):
+        """Detaches an output bin from the tees and removes it once it has handled EOS.
+
+        file_path is the file the bin records to, queued for transcoding once
+        it is finalized.
+        """
+        self.draining_outputs.append(bin)
+
+        sinks = list(bin.sinks())
+        pending = set(sinks)
+
+        def on_sink_event(pad, event, sink):
+            if event.type == gst.EVENT_EOS and sink in pending:
+                pending.discard(sink)
+                if not pending:
+                    gobject.idle_add(self._remove_drained_output, bin, file_path)
+            return True
+
+        for sink in sinks:
+            sink.get_static_pad('sink').add_event_probe(on_sink_event, sink)
+
+        for tee, teepad, queue in self.output_links[bin]:
+            teepad.set_blocked_async(True, self._on_draining_pad_blocked, bin)
+
+    def _on_draining_pad_blocked(self, teepad, blocked, bin):
+        if not blocked:
+            return
+        peer = teepad.get_peer()
+        if peer is not None:
+            teepad.unlink(peer)
+            peer.send_event(gst.event_new_eos())
+        # Left blocked, the tee would stall every other branch on its next buffer;
+        # unlinked, the pad's buffers are discarded until the pad is released
+        teepad.set_blocked_async(False, self._on_draining_pad_blocked, bin)
+
+    def _remove_drained_output(self, bin, file_path):
+        if bin in self.draining_outputs:
+            self.draining_outputs.remove(bin)
+            self.unlink_output_bin(bin)
+            bin.set_state(gst.STATE_NULL)
+            self.player.remove(bin)
+            log.debug("Drained output removed from the pipeline.")
+            self.queue_transcode(file_path, self.record_audio, self.record_video)
+        return False
+
+    ##
+    ## Transcode Later
+    ##
+    def set_transcoder(self, transcoder):
+        """Sets the transcode.TranscodeQueue that makes renditions of intermediate recordings."""
+        self.transcoder = transcoder
+
+    def queue_transcode(self, file_path, record_audio, record_video):
+        """Hands a finalized intermediate recording over to the transcoder."""
+        if not self.transcode_formats or not file_path or not os.path.exists(file_path):
+            return
+        if self.transcoder is None:
+            log.warning("No transcoder, %s is left as an intermediate recording.", file_path)
+            return
+        self.transcoder.add(file_path, self.transcode_formats, record_audio, record_video)
 
     def load_audiomixer(self, mixer, inputs):
         self.record_audio = True
@@ -386,7 +1350,7 @@ class Multimedia:
             return False
 
         self.player.add(self.audiomixer)
-        self.audiomixer.link(self.audio_tee)
+        self.audiomixer.link(self.audio_level)
 
         mixer.load_inputs(self.player, self.audiomixer, inputs)
 
@@ -398,8 +1362,9 @@ class Multimedia:
                 self.audio_tee.unlink(plugin)
                 self.player.remove(plugin)
 
-            self.audiomixer.unlink(self.audio_tee)
+            self.audiomixer.unlink(self.audio_level)
             self.player.remove(self.audiomixer)
+        self.audio_input_plugins = []
         self.record_audio = False
 
     def load_videomixer(self, mixer, inputs):
@@ -415,11 +1380,35 @@ class Multimedia:
         self.player.add(self.videomixer)
         self.videomixer.link(self.video_tee)
 
+        frame_filter = mixer.get_frame_filter()
+        if frame_filter is not None:
+            self.pipeline_stats.watch_filter('video', frame_filter)
+
         mixer.load_inputs(self.player, self.videomixer, inputs)
 
         return True
 
+    def plan_video_formats(self):
+        """Makes the video inputs and mixer convert frames to I420 once, as early as the pipeline allows.
+
+        Each plugin converts colors on its own, so unplanned frames may be
+        converted several times between the source and the encoders.
+        Outputs attached later must accept what the mixer was pinned to, which
+        every output shipped with Freeseer does.
+        """
+        return colorspace.plan_formats(self.video_input_plugins + [self.videomixer])
+
+    def get_color_conversions(self):
+        """Returns the colorspace conversions the running pipeline actually does, see colorspace.get_conversions()"""
+        return colorspace.get_conversions(self.player)
+
     def unload_videomixer(self):
+        for input, tee in self.compressed_tees.items():
+            input.get_static_pad("compressedsrc").unlink(tee.get_static_pad("sink"))
+            tee.set_state(gst.STATE_NULL)
+            self.player.remove(tee)
+        self.compressed_tees = {}
+
         if self.record_video is True:
             for plugin in self.video_input_plugins:
                 self.video_tee.unlink(plugin)
@@ -427,9 +1416,27 @@ class Multimedia:
 
             self.videomixer.unlink(self.video_tee)
             self.player.remove(self.videomixer)
+        self.video_input_plugins = []
         self.record_video = False
 
 
+class OutputPolicy:
+    """Class to hold constants for how outputs are isolated from each other
+
+    BOUNDED outputs get a fixed size queue and block the tees when it is full,
+    so they never lose data but can hold up other outputs. LEAKY outputs drop
+    their oldest buffers instead. SPILL outputs buffer to a temporary file on
+    disk for as long as they are behind.
+    """
+    BOUNDED = 'bounded'
+    LEAKY = 'leaky'
+    SPILL = 'spill'
+    policies = [BOUNDED, LEAKY, SPILL]
+
+    MAX_QUEUE_TIME = 3 * gst.SECOND
+    LEAKY_DOWNSTREAM = 2
+
+
 class Quality:
     """Class to hold constants for Audio/Video quality"""
     qualities = ["High", "Medium", "Low", "Custom"]
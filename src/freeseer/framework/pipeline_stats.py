@@ -0,0 +1,320 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import json
+import logging
+import logging.handlers
+import time
+
+import gobject
+
+import pygst
+pygst.require("0.10")
+import gst
+
+log = logging.getLogger(__name__)
+
+
+class BufferCounter(object):
+    """Counts the buffers going through a pad.
+
+    Totals cover the whole recording, rates are measured over windows of
+    RATE_WINDOW seconds. Timestamps are in seconds.
+    """
+
+    RATE_WINDOW = 1.0
+    # A buffer starting later than the end of the previous one by more than this is a gap
+    GAP_TOLERANCE = 0.005
+    # A buffer arriving this long after its timestamp (in running time) is late
+    LATE_THRESHOLD = 0.2
+
+    def __init__(self):
+        self.buffers = 0
+        self.bytes = 0
+        self.gaps = 0
+        self.late = 0
+        self.drift = 0.0
+        self.buffers_per_sec = 0.0
+        self.bytes_per_sec = 0.0
+
+        self._next_timestamp = None
+        self._window_start = None
+        self._window_buffers = 0
+        self._window_bytes = 0
+
+    def add(self, size, timestamp=None, duration=None, running_time=None, discont=False, now=None):
+        """Accounts for one buffer of size bytes."""
+        if now is None:
+            now = time.time()
+
+        self.buffers += 1
+        self.bytes += size
+
+        if self._window_start is None:
+            self._window_start = now
+        self._window_buffers += 1
+        self._window_bytes += size
+
+        elapsed = now - self._window_start
+        if elapsed >= self.RATE_WINDOW:
+            self.buffers_per_sec = self._window_buffers / elapsed
+            self.bytes_per_sec = self._window_bytes / elapsed
+            self._window_start = now
+            self._window_buffers = 0
+            self._window_bytes = 0
+
+        if timestamp is None:
+            return
+
+        if self.buffers > 1:
+            if discont or (self._next_timestamp is not None and
+                           timestamp - self._next_timestamp > self.GAP_TOLERANCE):
+                self.gaps += 1
+
+        if running_time is not None:
+            self.drift = running_time - timestamp
+            if self.drift > self.LATE_THRESHOLD:
+                self.late += 1
+
+        self._next_timestamp = timestamp + duration if duration is not None else None
+
+    def get_stats(self, now=None):
+        """Returns the counters as a dictionary."""
+        if now is None:
+            now = time.time()
+
+        buffers_per_sec = self.buffers_per_sec
+        bytes_per_sec = self.bytes_per_sec
+
+        # Let the rates fall off when buffers stop flowing
+        if self._window_start is not None:
+            elapsed = now - self._window_start
+            if elapsed >= self.RATE_WINDOW:
+                buffers_per_sec = self._window_buffers / elapsed
+                bytes_per_sec = self._window_bytes / elapsed
+
+        return {
+            'buffers': self.buffers,
+            'bytes': self.bytes,
+            'buffers_per_sec': buffers_per_sec,
+            'bytes_per_sec': bytes_per_sec,
+            'gaps': self.gaps,
+            'late': self.late,
+            'drift': self.drift,
+        }
+
+
+class QueueMonitor(object):
+    """Reports how full a queue element is and how often it overran.
+
+    With count_drops, the buffers going in and out of the queue are counted
+    too; whatever went in but neither came out nor is still queued was
+    dropped by the queue.
+    """
+
+    def __init__(self, queue, count_drops=False):
+        self.queue = queue
+        self.overruns = 0
+        self.count_drops = count_drops
+        self.buffers_in = 0
+        self.buffers_out = 0
+
+        if gobject.signal_lookup('overrun', queue):
+            queue.connect('overrun', self._on_overrun)
+
+        if count_drops:
+            queue.get_static_pad('sink').add_buffer_probe(self._on_buffer_in)
+            queue.get_static_pad('src').add_buffer_probe(self._on_buffer_out)
+
+    def _on_overrun(self, queue):
+        self.overruns += 1
+
+    def _on_buffer_in(self, pad, buffer):
+        self.buffers_in += 1
+        return True
+
+    def _on_buffer_out(self, pad, buffer):
+        self.buffers_out += 1
+        return True
+
+    def get_dropped(self):
+        if not self.count_drops:
+            return 0
+        return max(0, self.buffers_in - self.buffers_out - self.queue.get_property('current-level-buffers'))
+
+    def get_stats(self):
+        fill = 0.0
+        for level, limit in [('current-level-buffers', 'max-size-buffers'),
+                             ('current-level-bytes', 'max-size-bytes'),
+                             ('current-level-time', 'max-size-time')]:
+            maximum = self.queue.get_property(limit)
+            if maximum:
+                fill = max(fill, float(self.queue.get_property(level)) / maximum)
+
+        return {
+            'buffers': self.queue.get_property('current-level-buffers'),
+            'bytes': self.queue.get_property('current-level-bytes'),
+            'time': float(self.queue.get_property('current-level-time')) / gst.SECOND,
+            'fill': fill,
+            'overruns': self.overruns,
+            'dropped': self.get_dropped(),
+        }
+
+
+class PipelineStats(object):
+    """Pad probe instrumentation for the pipeline built by Multimedia.
+
+    Buffer probes on the tee inputs and on every tee branch count buffers,
+    bytes, gaps, late buffers and timestamp drift; the queues inside output
+    bins report their fill level and overruns. snapshot() returns all of it
+    as a dictionary and start_log() periodically writes snapshots to a
+    rotating log file.
+    """
+
+    LOG_MAX_BYTES = 1024 * 1024
+    LOG_BACKUP_COUNT = 3
+
+    def __init__(self, player):
+        self.player = player
+        self.counters = {}
+        self.queues = {}
+        self.filters = {}
+        # Output name -> names of the queues isolating it from the tees
+        self.output_queues = {}
+        self.started = time.time()
+
+        self._log_handler = None
+        self._log_timer = None
+
+    def watch_pad(self, name, pad):
+        counter = BufferCounter()
+        self.counters[name] = counter
+        pad.add_buffer_probe(self._on_buffer, counter)
+
+    def watch_queue(self, name, queue, count_drops=False):
+        self.queues[name] = QueueMonitor(queue, count_drops)
+
+    def watch_filter(self, name, frame_filter):
+        """Reports the frames seen and skipped by a framefilter.ChangeDetector."""
+        self.filters[name] = frame_filter
+
+    def watch_output(self, name, bin, links):
+        """Instruments the tee branches feeding an output bin and the queues inside it.
+
+        links are the (tee, tee pad, queue) links made by Multimedia.link_output_bin().
+        """
+        self.output_queues[name] = []
+        for tee, teepad, queue in links:
+            self.watch_output_link(name, tee, teepad, queue)
+
+        for element in bin.recurse():
+            if element.get_factory().get_name() in ['queue', 'queue2']:
+                self.watch_queue('{0}/{1}'.format(name, element.get_name()), element)
+
+    def watch_output_link(self, name, tee, teepad, queue):
+        """Instruments one tee branch feeding an output, e.g. a compressed stream linked later on."""
+        branch = '{0}/{1}'.format(name, queue.get_static_pad('src').get_peer().get_name())
+        self.watch_pad(branch, teepad)
+        self.watch_queue(branch + '-queue', queue, count_drops=True)
+        self.output_queues.setdefault(name, []).append(branch + '-queue')
+
+    def remove_output(self, name):
+        """Forgets about an output that was taken out of the pipeline."""
+        prefix = name + '/'
+        for counters in [self.counters, self.queues]:
+            for key in [key for key in counters if key.startswith(prefix)]:
+                del counters[key]
+        self.output_queues.pop(name, None)
+
+    def clear_outputs(self):
+        """Forgets about the outputs, keeping the tee input counters."""
+        for name in self.counters.keys():
+            if '/' in name:
+                del self.counters[name]
+        self.queues = {}
+        self.output_queues = {}
+
+    def get_drops(self):
+        """Returns the number of buffers dropped by the queue in front of each output."""
+        return dict((name, sum(self.queues[queue].get_dropped() for queue in queues))
+                    for name, queues in self.output_queues.items())
+
+    def _running_time(self):
+        clock = self.player.get_clock()
+        if clock is None:
+            return None
+        return float(clock.get_time() - self.player.get_base_time()) / gst.SECOND
+
+    def _on_buffer(self, pad, buffer, counter):
+        timestamp = None
+        duration = None
+        if buffer.timestamp != gst.CLOCK_TIME_NONE:
+            timestamp = float(buffer.timestamp) / gst.SECOND
+            if buffer.duration != gst.CLOCK_TIME_NONE:
+                duration = float(buffer.duration) / gst.SECOND
+
+        counter.add(buffer.size, timestamp, duration, self._running_time(),
+                    buffer.flag_is_set(gst.BUFFER_FLAG_DISCONT))
+        return True
+
+    def snapshot(self):
+        """Returns the current statistics of every instrumented pad and queue."""
+        now = time.time()
+        return {
+            'time': now,
+            'uptime': now - self.started,
+            'pads': dict((name, counter.get_stats(now)) for name, counter in self.counters.items()),
+            'queues': dict((name, queue.get_stats()) for name, queue in self.queues.items()),
+            'filters': dict((name, frame_filter.get_stats()) for name, frame_filter in self.filters.items()),
+            'drops': self.get_drops(),
+        }
+
+    ##
+    ## Rolling log
+    ##
+    def start_log(self, path, interval=5):
+        """Writes a JSON snapshot to path every interval seconds, rotating the file as it grows."""
+        if self._log_handler is not None:
+            return
+
+        self._log_handler = logging.handlers.RotatingFileHandler(path, maxBytes=self.LOG_MAX_BYTES,
+                                                                 backupCount=self.LOG_BACKUP_COUNT)
+        self._log_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        self._log_timer = gobject.timeout_add(int(interval * 1000), self._write_log)
+        log.debug("Logging pipeline statistics to %s", path)
+
+    def stop_log(self):
+        if self._log_handler is None:
+            return
+
+        gobject.source_remove(self._log_timer)
+        self._write_log()
+        self._log_handler.close()
+        self._log_handler = None
+        self._log_timer = None
+
+    def _write_log(self):
+        record = logging.LogRecord(__name__, logging.INFO, __file__, 0, json.dumps(self.snapshot()), None, None)
+        self._log_handler.handle(record)
+        return True
@@ -21,6 +21,7 @@
 
 # For support, questions, suggestions or any other inquiries, visit:
 # http://wiki.github.com/Freeseer/freeseer/
+import copy
 import logging
 import os
 import sys
@@ -257,6 +258,20 @@ class IBackendPlugin(IPlugin):
     def get_name(self):
         return self.name
 
+    def new_instance(self):
+        """
+        Returns a copy of the plugin to build the bins of a single pipeline.
+
+        Plugins are shared by every pipeline in the process, so state set
+        while building bins (recording location, tags, instance, config) is
+        kept on the copy instead. Plugins holding other mutable per-run state
+        should override this to reset it.
+        """
+        plugin = copy.copy(self)
+        plugin.widget = None
+        plugin.widget_config_loaded = False
+        return plugin
+
     def get_supported_os(self):
         """
         Returns a list of OSes supported by the plugin
@@ -374,13 +389,25 @@ class IAudioMixer(IBackendPlugin):
 class IVideoInput(IBackendPlugin):
     CATEGORY = "VideoInput"
 
+    # (width, height) of the video the mixer makes out of this input, or None if unknown
+    output_size = None
+
     def __init__(self):
         IBackendPlugin.__init__(self)
 
+    def set_output_size(self, size):
+        """
+        Sets the size of the mixed video, so that the input doesn't capture frames larger than needed.
+        """
+        self.output_size = size
+
     def get_videoinput_bin(self):
         """
         Returns the Gstreamer Bin for the video input plugin.
         MUST be overridded when creating a video input plugin.
+
+        Sources producing compressed video may also offer the stream before
+        decoding on a "compressedsrc" pad, for outputs recording it as is.
         """
         raise NotImplementedError
 
@@ -430,6 +457,19 @@ class IVideoMixer(IBackendPlugin):
         """
         return False
 
+    def get_frame_filter(self):
+        """
+        Returns the ChangeDetector skipping static frames in the bin last returned by get_videomixer_bin(),
+        or None if the mixer passes every frame on.
+        """
+        return None
+
+    def get_output_size(self):
+        """
+        Returns the (width, height) of the mixed video, or None if it keeps the size of its inputs.
+        """
+        return None
+
 
 class IOutput(IBackendPlugin):
     #
@@ -455,6 +495,10 @@ class IOutput(IBackendPlugin):
     extension = None
     location = None
     configurable = False
+    # Threads each encoder of the output may use, set by Multimedia to share the CPUs between outputs
+    encoder_threads = 1
+    # Whether get_output_bin() encodes video itself rather than using get_encoders()
+    own_video_encoder = False
 
     metadata_order = [
         "title",
@@ -477,13 +521,56 @@ class IOutput(IBackendPlugin):
     def get_output_bin(self, audio=True, video=True, metadata=None):
         """
         Returns the Gstreamer Bin for the output plugin.
-        MUST be overridded when creating an output plugin.
+        MUST be overridded when creating an output plugin, unless the plugin
+        implements get_encoders() and get_muxer_bin().
+        """
+        encoders = self.get_encoders(audio, video)
+        if encoders is None:
+            raise NotImplementedError
+
+        from freeseer.framework.encoding import make_output_bin
+        return make_output_bin(encoders, self.get_muxer_bin(audio, video, metadata))
+
+    def get_encoders(self, audio=True, video=True):
+        """
+        Returns a dictionary mapping "audio" and/or "video" to the EncoderSpec
+        of the encoder the output needs, or None if the output plugin does its
+        own encoding in get_output_bin().
+
+        Outputs asking for the same encoder settings share a single encoder.
+        """
+        return None
+
+    def get_muxer_bin(self, audio=True, video=True, metadata=None):
+        """
+        Returns the Gstreamer Bin taking the encoded streams described by
+        get_encoders() on its "audiosink" and "videosink" pads.
         """
         raise NotImplementedError
 
+    def get_compressed_caps(self):
+        """
+        Returns the caps of a compressed stream the output records as is from
+        a video input, taken on the "compressedsink" pad of its bin, or None.
+
+        The bin must still take the raw streams on its other pads, if only to
+        discard them.
+        """
+        return None
+
     def get_extension(self):
         return self.extension
 
+    def release_output_bin(self, bin):
+        """
+        Called when a bin returned by get_output_bin() or get_muxer_bin() is
+        taken out of the pipeline, to release what the plugin started for it.
+        """
+        pass
+
+    def set_encoder_threads(self, threads):
+        self.encoder_threads = threads
+
     def set_recording_location(self, location):
         self.location = location
 
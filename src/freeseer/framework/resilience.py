@@ -0,0 +1,353 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+
+import logging
+import struct
+import tempfile
+import threading
+
+import gobject
+
+import pygst
+pygst.require("0.10")
+import gst
+
+from freeseer.framework.pipeline_stats import BufferCounter
+
+log = logging.getLogger(__name__)
+
+# Sinks sending to a server, that fail when the network goes down
+NETWORK_SINKS = ['rtmpsink', 'shout2send', 'tcpclientsink']
+
+
+class StreamSpool(object):
+    """A bounded spool of encoded buffers in a temporary file.
+
+    Buffers are kept as (flags, data) records and read back in the order
+    they were written. The spool only starts, and starts again after being
+    full or discard_to_keyframe(), at a keyframe so that what is read back
+    can be decoded. When it would grow over max_bytes the backlog is
+    dropped, keeping the stream as close to live as possible.
+    """
+
+    # keyframe, flags, size
+    HEADER = struct.Struct('<BII')
+
+    def __init__(self, max_bytes, folder=None):
+        self.max_bytes = max_bytes
+        self.file = tempfile.TemporaryFile(prefix='freeseer-spool-', dir=folder)
+        self.clear()
+
+    def clear(self):
+        self.file.seek(0)
+        self.file.truncate()
+        self.read_offset = 0
+        self.write_offset = 0
+        self.buffers = 0
+        self.waiting_for_keyframe = True
+
+    def get_size(self):
+        return self.write_offset - self.read_offset
+
+    def is_empty(self):
+        return self.buffers == 0
+
+    def write(self, data, keyframe, flags=0):
+        """Appends a buffer, returning False if it was dropped."""
+        if self.waiting_for_keyframe and not keyframe:
+            return False
+
+        record_size = self.HEADER.size + len(data)
+        if self.get_size() + record_size > self.max_bytes:
+            log.warning("Stream spool is full, dropping %d bytes of backlog.", self.get_size())
+            self.clear()
+            if not keyframe:
+                return False
+
+        self.waiting_for_keyframe = False
+        self.file.seek(self.write_offset)
+        self.file.write(self.HEADER.pack(keyframe, flags, len(data)))
+        self.file.write(data)
+        self.write_offset += record_size
+        self.buffers += 1
+        return True
+
+    def read(self):
+        """Removes and returns the oldest (flags, data) record, or None if the spool is empty."""
+        if self.is_empty():
+            return None
+
+        self.file.seek(self.read_offset)
+        keyframe, flags, size = self.HEADER.unpack(self.file.read(self.HEADER.size))
+        data = self.file.read(size)
+        self._advance(size)
+        return flags, data
+
+    def discard_to_keyframe(self):
+        """Drops the records before the oldest keyframe, so that reading resumes at one."""
+        while not self.is_empty():
+            self.file.seek(self.read_offset)
+            keyframe, flags, size = self.HEADER.unpack(self.file.read(self.HEADER.size))
+            if keyframe:
+                return
+            self._advance(size)
+        self.waiting_for_keyframe = True
+
+    def _advance(self, size):
+        self.read_offset += self.HEADER.size + size
+        self.buffers -= 1
+        if self.is_empty():
+            # Reuse the file from the start rather than letting it grow
+            waiting = self.waiting_for_keyframe
+            self.clear()
+            self.waiting_for_keyframe = waiting
+
+    def close(self):
+        self.file.close()
+
+
+class ResilientSender(object):
+    """Sends an output's encoded stream to a network sink in a pipeline of its own.
+
+    The output bin ends in an appsink; buffers are pushed to an appsrc
+    feeding the network sink. When the sink fails only this small pipeline
+    goes down: buffers are spooled to disk while it reconnects, with a
+    delay doubling up to MAX_DELAY seconds, and the backlog is sent ahead
+    of the live stream once it is back. Every connection starts with the
+    stream headers of the caps.
+    """
+
+    # States
+    CONNECTING = 'connecting'
+    DRAINING = 'draining'
+    LIVE = 'live'
+    STOPPED = 'stopped'
+
+    MIN_DELAY = 1
+    MAX_DELAY = 30
+    # A connection up this long resets the reconnect delay
+    STABLE_TIME = 10
+    # Bytes queued in the appsrc before live buffers go to the spool instead
+    MAX_QUEUED_BYTES = 4 * 1024 * 1024
+    # Milliseconds between two rounds of sending the backlog
+    DRAIN_INTERVAL = 50
+
+    def __init__(self, name, sink, spool_size, spool_folder=None):
+        self.name = name
+        self.sink = sink
+        self.spool = StreamSpool(spool_size, spool_folder)
+        self.lock = threading.Lock()
+        self.state = ResilientSender.CONNECTING
+        self.caps = None
+        self.delay = ResilientSender.MIN_DELAY
+        self.reconnects = 0
+        self.sent = BufferCounter()
+        self._retry_timer = None
+        self._stable_timer = None
+        self._drain_source = None
+
+        self.appsrc = gst.element_factory_make('appsrc')
+        self.appsrc.set_property('format', gst.FORMAT_TIME)
+        self.appsrc.set_property('max-bytes', ResilientSender.MAX_QUEUED_BYTES)
+        if 'sync' in [pspec.name for pspec in gobject.list_properties(sink)]:
+            # Send the backlog as fast as the server takes it
+            sink.set_property('sync', False)
+
+        self.pipeline = gst.Pipeline('sender-' + name)
+        self.pipeline.add(self.appsrc, sink)
+        self.appsrc.link(sink)
+
+        bus = self.pipeline.get_bus()
+        bus.add_signal_watch()
+        self._bus_watch = bus.connect('message', self._on_message)
+
+    def connect_appsink(self, appsink):
+        appsink.set_property('emit-signals', True)
+        appsink.set_property('sync', False)
+        appsink.connect('new-buffer', self._on_new_buffer)
+        appsink.connect('eos', self._on_eos)
+
+    def get_stats(self):
+        with self.lock:
+            sent = self.sent.get_stats()
+            return {
+                'state': self.state,
+                'reconnects': self.reconnects,
+                'bytes_sent': sent['bytes'],
+                'bitrate': sent['bytes_per_sec'] * 8,
+                'spooled_bytes': self.spool.get_size(),
+            }
+
+    ##
+    ## Streaming thread of the output bin
+    ##
+    def _on_new_buffer(self, appsink):
+        buffer = appsink.emit('pull-buffer')
+        if buffer.flag_is_set(gst.BUFFER_FLAG_IN_CAPS):
+            # Stream headers, sent again at the start of every connection
+            return
+
+        with self.lock:
+            if self.caps is None:
+                self.caps = buffer.get_caps()
+                gobject.idle_add(self._connect)
+
+            if self.state == ResilientSender.LIVE:
+                if self.appsrc.get_property('current-level-bytes') < ResilientSender.MAX_QUEUED_BYTES:
+                    self._push(buffer)
+                    return
+
+                # The server isn't keeping up, queue the stream up behind what the appsrc holds
+                self.state = ResilientSender.DRAINING
+                self.spool.waiting_for_keyframe = False
+                self._drain_source = gobject.timeout_add(ResilientSender.DRAIN_INTERVAL, self._drain)
+
+            if self.state != ResilientSender.STOPPED:
+                self.spool.write(buffer.data, not buffer.flag_is_set(gst.BUFFER_FLAG_DELTA_UNIT), buffer.flags)
+
+    def _on_eos(self, appsink):
+        with self.lock:
+            if self.state == ResilientSender.LIVE:
+                self.appsrc.emit('end-of-stream')
+
+    def _push(self, buffer):
+        self.sent.add(buffer.size)
+        self.appsrc.emit('push-buffer', buffer)
+
+    ##
+    ## Main loop
+    ##
+    def _connect(self):
+        with self.lock:
+            self._retry_timer = None
+            if self.state == ResilientSender.STOPPED:
+                return False
+
+            self.appsrc.set_property('caps', self.caps)
+            self.pipeline.set_state(gst.STATE_PLAYING)
+            structure = self.caps[0]
+            if structure.has_field('streamheader'):
+                for header in structure['streamheader']:
+                    self.appsrc.emit('push-buffer', header)
+
+            # Live buffers keep going to the spool until the backlog is sent
+            self.state = ResilientSender.DRAINING
+            self._drain_source = gobject.timeout_add(ResilientSender.DRAIN_INTERVAL, self._drain)
+            self._stable_timer = gobject.timeout_add(ResilientSender.STABLE_TIME * 1000, self._on_stable)
+        log.info("%s: connecting to the server.", self.name)
+        return False
+
+    def _drain(self):
+        """Sends the spooled backlog, a bit at a time, then goes live."""
+        with self.lock:
+            if self.state != ResilientSender.DRAINING:
+                self._drain_source = None
+                return False
+
+            while self.appsrc.get_property('current-level-bytes') < ResilientSender.MAX_QUEUED_BYTES:
+                record = self.spool.read()
+                if record is None:
+                    self.state = ResilientSender.LIVE
+                    self._drain_source = None
+                    log.info("%s: streaming live.", self.name)
+                    return False
+                flags, data = record
+                buffer = gst.Buffer(data)
+                buffer.flags = flags
+                self._push(buffer)
+        return True
+
+    def _on_stable(self):
+        with self.lock:
+            self._stable_timer = None
+            self.delay = ResilientSender.MIN_DELAY
+        return False
+
+    def _on_message(self, bus, message):
+        if message.type != gst.MESSAGE_ERROR:
+            return
+
+        err, debug = message.parse_error()
+        with self.lock:
+            if self.state in [ResilientSender.CONNECTING, ResilientSender.STOPPED]:
+                return
+            log.warning("%s: stream failed (%s), reconnecting in %d seconds.", self.name, err, self.delay)
+
+            self.state = ResilientSender.CONNECTING
+            self._cancel_timers()
+            self.pipeline.set_state(gst.STATE_NULL)
+            # Whatever the failed pipeline held is lost, resume at the next complete keyframe
+            self.spool.discard_to_keyframe()
+
+            self.reconnects += 1
+            self._retry_timer = gobject.timeout_add(self.delay * 1000, self._connect)
+            self.delay = min(self.delay * 2, ResilientSender.MAX_DELAY)
+
+    def _cancel_timers(self):
+        """Removes the pending main loop callbacks, with the lock held."""
+        for source in [self._retry_timer, self._stable_timer, self._drain_source]:
+            if source is not None:
+                gobject.source_remove(source)
+        self._retry_timer = None
+        self._stable_timer = None
+        self._drain_source = None
+
+    def stop(self):
+        with self.lock:
+            self.state = ResilientSender.STOPPED
+            self._cancel_timers()
+            self.pipeline.set_state(gst.STATE_NULL)
+            self.spool.close()
+
+        bus = self.pipeline.get_bus()
+        bus.disconnect(self._bus_watch)
+        bus.remove_signal_watch()
+
+
+def make_resilient(bin, name, spool_size, spool_folder=None):
+    """Moves each network sink of an output bin to a ResilientSender, putting an appsink in its place.
+
+    Outputs sending to several servers fail and reconnect separately for
+    each of them. Senders are named after the output and, with several
+    sinks, the sink. Returns the list of senders.
+    """
+    sinks = [sink for sink in bin.recurse() if sink.get_factory().get_name() in NETWORK_SINKS]
+
+    senders = []
+    for sink in sinks:
+        peer = sink.get_static_pad('sink').get_peer()
+        parent = sink.get_parent()
+        peer.unlink(sink.get_static_pad('sink'))
+        parent.remove(sink)
+
+        appsink = gst.element_factory_make('appsink')
+        parent.add(appsink)
+        peer.link(appsink.get_static_pad('sink'))
+
+        sender_name = name if len(sinks) == 1 else '{0}/{1}'.format(name, sink.get_name())
+        sender = ResilientSender(sender_name, sink, spool_size, spool_folder)
+        sender.connect_appsink(appsink)
+        senders.append(sender)
+    return senders
@@ -0,0 +1,273 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+
+import atexit
+import json
+import logging
+import os
+import subprocess
+import tempfile
+
+import gobject
+
+from freeseer.framework.encoding import get_preset_properties, get_thread_budget
+
+log = logging.getLogger(__name__)
+
+GST_LAUNCH = 'gst-launch-0.10'
+
+# Rendition format -> (video encoder, audio encoder, muxer)
+FORMATS = {
+    'ogg': ('theoraenc', 'vorbisenc', 'oggmux'),
+    'webm': ('vp8enc', 'vorbisenc', 'webmmux'),
+}
+
+# Transcoding happens after the talk, so it can afford the slowest, most compact settings
+PRESET = 'archival'
+
+# Characters of a failed gst-launch's error output that are logged
+MAX_ERROR_LENGTH = 2000
+
+# Job states
+PENDING = 'pending'
+RUNNING = 'running'
+FAILED = 'failed'
+
+
+def get_rendition_path(source, format, reserved=()):
+    """Returns the path of the format rendition of the intermediate file source.
+
+    A number is added to the name rather than overwriting an existing file
+    or a path in reserved, e.g. the rendition of an earlier take.
+    """
+    base = os.path.splitext(source)[0]
+    destination = '{0}.{1}'.format(base, format)
+    count = 0
+    while os.path.exists(destination) or destination in reserved:
+        destination = '{0}-{1}.{2}'.format(base, count, format)
+        count += 1
+    return destination
+
+
+def get_launch_args(source, destination, format, audio=True, video=True, threads=1):
+    """Returns the gst-launch command line transcoding source into a format rendition at destination."""
+    videoenc, audioenc, muxer = FORMATS[format]
+
+    args = [GST_LAUNCH, '-q', 'filesrc', 'location=' + source, '!', 'decodebin2', 'name=decoder',
+            muxer, 'name=muxer', '!', 'filesink', 'location=' + destination]
+
+    if video:
+        properties = get_preset_properties(videoenc, PRESET, threads)
+        args += ['decoder.', '!', 'queue', '!', 'ffmpegcolorspace', '!', videoenc]
+        args += ['{0}={1}'.format(name, value) for name, value in sorted(properties.items())]
+        args += ['!', 'queue', '!', 'muxer.']
+    if audio:
+        args += ['decoder.', '!', 'queue', '!', 'audioconvert', '!', 'audioresample', '!', audioenc,
+                 '!', 'queue', '!', 'muxer.']
+    return args
+
+
+def _lower_priority():
+    os.nice(10)
+
+
+class TranscodeQueue(object):
+    """Turns finished intermediate recordings into renditions, a few gst-launch processes at a time.
+
+    Jobs are kept in a JSON file at path, so that transcoding carries on
+    after a restart; jobs that were running are started again. Worker
+    processes run at a lower priority than the recording and are watched
+    from the GLib main loop. Once every rendition of an intermediate file
+    is done the intermediate is deleted, while a failed job keeps it.
+    """
+
+    def __init__(self, path, workers=1, delete_intermediates=True):
+        self.path = path
+        self.workers = max(1, workers)
+        self.delete_intermediates = delete_intermediates
+        self.jobs = []
+        self.processes = {}
+        # pid -> temporary file collecting the process' error output
+        self.error_files = {}
+        self.listeners = []
+        self.started = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as queue_file:
+                self.jobs = json.load(queue_file)
+        except (IOError, OSError, ValueError):
+            self.jobs = []
+
+        for job in self.jobs:
+            if job['state'] == RUNNING:
+                job['state'] = PENDING
+
+    def save(self):
+        with open(self.path, 'w') as queue_file:
+            json.dump(self.jobs, queue_file, indent=2)
+
+    def add_listener(self, callback):
+        """Calls callback(job, success) each time a job finishes."""
+        self.listeners.append(callback)
+
+    def add(self, source, formats, audio=True, video=True):
+        """Queues the transcoding of the intermediate file source into each of formats."""
+        for format in formats:
+            if format not in FORMATS:
+                log.error("Unknown transcoding format %s, skipping it.", format)
+                continue
+            if os.path.splitext(source)[1] == '.' + format:
+                log.warning("%s is already a %s file, not transcoding it.", source, format)
+                continue
+            destination = get_rendition_path(source, format, self.get_destinations())
+            self.jobs.append({
+                'source': source,
+                'destination': destination,
+                'format': format,
+                'audio': audio,
+                'video': video,
+                'state': PENDING,
+            })
+            log.info("Queued %s for transcoding to %s", source, format)
+        self.save()
+        self.run_pending()
+
+    def get_destinations(self):
+        return set(job['destination'] for job in self.jobs)
+
+    def get_pending(self):
+        return [job for job in self.jobs if job['state'] == PENDING]
+
+    def get_failed(self):
+        return [job for job in self.jobs if job['state'] == FAILED]
+
+    def retry_failed(self):
+        for job in self.get_failed():
+            job['state'] = PENDING
+        self.save()
+        self.run_pending()
+
+    def start(self):
+        if not self.started:
+            self.started = True
+            # Running jobs are started over on the next run rather than left to orphaned processes
+            atexit.register(self.stop)
+        self.run_pending()
+
+    def stop(self):
+        """Stops the worker processes, their jobs are started again on the next start()."""
+        self.started = False
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+
+    def run_pending(self):
+        """Starts pending jobs while fewer than workers processes are running."""
+        if not self.started:
+            return
+
+        threads = get_thread_budget(self.workers)
+        for job in self.get_pending():
+            if len(self.processes) >= self.workers:
+                break
+
+            if not os.path.exists(job['source']):
+                log.error("Intermediate file %s is gone, dropping its transcoding job.", job['source'])
+                self.jobs.remove(job)
+                continue
+
+            if not job.get('started') and os.path.exists(job['destination']):
+                # Something else took the name since the job was queued, never overwrite it
+                destinations = self.get_destinations() - set([job['destination']])
+                job['destination'] = get_rendition_path(job['source'], job['format'], destinations)
+
+            args = get_launch_args(job['source'], job['destination'], job['format'],
+                                   job['audio'], job['video'], threads)
+            # A file rather than a pipe, which a chatty gst-launch could fill up and block on
+            error_file = tempfile.TemporaryFile(prefix='freeseer-transcode-')
+            try:
+                with open(os.devnull, 'w') as devnull:
+                    process = subprocess.Popen(args, preexec_fn=_lower_priority, stdout=devnull, stderr=error_file)
+            except OSError:
+                error_file.close()
+                log.error("Failed to run %s, is GStreamer installed?", GST_LAUNCH)
+                break
+
+            job['state'] = RUNNING
+            # From now on the destination file is this job's own
+            job['started'] = True
+            self.processes[process.pid] = process
+            self.error_files[process.pid] = error_file
+            gobject.child_watch_add(process.pid, self._on_exit, job)
+            log.debug("Transcoding %s to %s", job['source'], job['destination'])
+        self.save()
+
+    def _on_exit(self, pid, condition, job):
+        self.processes.pop(pid)
+        error_file = self.error_files.pop(pid)
+        error_file.seek(0, os.SEEK_END)
+        error_file.seek(max(error_file.tell() - MAX_ERROR_LENGTH, 0))
+        error = error_file.read()
+        error_file.close()
+
+        if not self.started:
+            # Stopped on purpose, start the job over next time
+            job['state'] = PENDING
+            self._remove_partial(job)
+            self.save()
+            return
+
+        success = (os.WIFEXITED(condition) and os.WEXITSTATUS(condition) == 0 and
+                   os.path.exists(job['destination']) and os.path.getsize(job['destination']) > 0)
+        if success:
+            log.info("Transcoded %s to %s", job['source'], job['destination'])
+            self.jobs.remove(job)
+            self._delete_intermediate(job['source'])
+        else:
+            log.error("Failed to transcode %s to %s: %s", job['source'], job['format'], error.strip())
+            job['state'] = FAILED
+            self._remove_partial(job)
+
+        self.save()
+        for callback in self.listeners:
+            callback(job, success)
+        self.run_pending()
+
+    def _remove_partial(self, job):
+        """Removes what a job wrote to its destination, never a file it did not create."""
+        if job.pop('started', False) and os.path.exists(job['destination']):
+            os.remove(job['destination'])
+
+    def _delete_intermediate(self, source):
+        """Deletes source once no job needs it or failed with it."""
+        if not self.delete_intermediates or any(job['source'] == source for job in self.jobs):
+            return
+        try:
+            os.remove(source)
+            log.debug("Deleted intermediate file %s", source)
+        except OSError:
+            log.warning("Failed to delete intermediate file %s", source)
@@ -53,12 +53,14 @@ def get_free_space(directory):
 ###
 
 
-def get_record_name(extension, presentation=None, filename=None, path="."):
+def get_record_name(extension, presentation=None, filename=None, path=".", reserved=()):
     """Returns the filename to use when recording.
 
     If a record name with a .None extension is returned, the record name
     will just be ignored by the output plugin (e.g. Video Preview plugin).
 
+    Absolute paths in reserved are treated as existing files.
+
     Function will return None if neither presentation nor filename is passed.
     """
     if presentation is not None:
@@ -73,7 +75,8 @@ def get_record_name(extension, presentation=None, filename=None, path="."):
 
     # Add a number to the end of a duplicate record name so we don't
     # overwrite existing files
-    while(os.path.exists(os.path.join(path, "%s.%s" % (tempname, extension)))):
+    while(os.path.exists(os.path.join(path, "%s.%s" % (tempname, extension))) or
+          os.path.abspath(os.path.join(path, "%s.%s" % (tempname, extension))) in reserved):
         tempname = "{0}-{1}".format(recordname, count)
         count += 1
 
@@ -24,6 +24,7 @@
 
 
 import argparse
+import json
 import signal
 import sys
 import textwrap
@@ -70,6 +71,7 @@ def setup_parser():
     setup_parser_report(subparsers)
     setup_parser_upload(subparsers)
     setup_parser_server(subparsers)
+    setup_parser_benchmark(subparsers)
     return parser
 
 
@@ -80,6 +82,7 @@ def setup_parser_record(subparsers):
     parser.add_argument("-f", "--filename", type=unicode, help="Record to filename")
     parser.add_argument("-p", "--profile", type=unicode, help="Use profile")
     parser.add_argument("-s", "--show-talks", help="Shows all talks", action="store_true")
+    parser.add_argument("-m", "--meter", help="Show audio levels while recording", action="store_true")
 
 
 ###
@@ -158,6 +161,62 @@ def setup_parser_server(subparsers):
     parser.add_argument("-f", "--filename", type=unicode, help="file to load recordings")
 
 
+def setup_parser_benchmark(subparsers):
+    """Setup benchmark command parser"""
+    parser = subparsers.add_parser("benchmark", help="Freeseer pipeline benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", help="Benchmark to run")
+    setup_parser_benchmark_rooms(subparsers)
+    setup_parser_benchmark_matrix(subparsers)
+
+
+def setup_parser_benchmark_rooms(subparsers):
+    """Setup rooms benchmark command parser"""
+    parser = subparsers.add_parser("rooms", help="Measure how CPU usage scales with each extra room recorded")
+    parser.add_argument("-n", "--rooms", type=int, default=4, help="Number of rooms to record at once (Default: 4)")
+    parser.add_argument("-d", "--duration", type=int, default=10, help="Seconds to record for each number of rooms (Default: 10)")
+    parser.add_argument("-o", "--output", type=unicode, help="Write the results to this file as JSON")
+
+
+def setup_parser_benchmark_matrix(subparsers):
+    """Setup mixer/output/resolution benchmark command parser"""
+    parser = subparsers.add_parser("matrix", help="Measure every video mixer, output and resolution combination")
+    parser.add_argument("-d", "--duration", type=int, default=10, help="Seconds to measure each combination for (Default: 10)")
+    parser.add_argument("-m", "--mixer", action="append", help="Only benchmark this video mixer (can be repeated)")
+    parser.add_argument("-p", "--plugin", action="append", help="Only benchmark this output plugin (can be repeated)")
+    parser.add_argument("-r", "--resolution", action="append", help="Only benchmark this resolution, e.g. 720p (can be repeated)")
+    parser.add_argument("-o", "--output", type=unicode, help="Write the results to this file as JSON")
+
+
+def write_benchmark_results(report, output=None):
+    """Prints benchmark results as a table and optionally writes the report to output as JSON"""
+    results = report['results']
+    if results:
+        headers = sorted(set(key for result in results for key in result))
+        print(tabulate([[result.get(header) for header in headers] for result in results], headers=headers))
+    else:
+        print("No results.")
+
+    if output:
+        with open(output, 'w') as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+
+
+def print_audio_meter(meter):
+    """Prints the current audio levels on a single, continuously updated line"""
+    sys.stdout.write("\rRMS: {0:6.1f} dB  Peak: {1:6.1f} dB".format(meter.get_rms(), meter.get_peak()))
+    sys.stdout.flush()
+
+
+def run_recording(app, loop):
+    """Runs loop until Ctrl-C, then quits it once the recording is finalized"""
+    def on_interrupt(signum, frame):
+        print("\nStopping...")
+        app.stop_async(lambda *result: loop.quit())
+
+    signal.signal(signal.SIGINT, on_interrupt)
+    return loop.run()
+
+
 def parse_args(parser, parse_args=None):
     if len(sys.argv) == 1:  # No arguments passed
         launch_recordapp()
@@ -184,13 +243,15 @@ def parse_args(parser, parse_args=None):
         db = settings.profile_manager.get().get_database()
 
         app = RecordingController(profile, db, config, cli=True)
+        if args.meter:
+            app.subscribe_audio_meter(print_audio_meter)
 
         if args.talk:
             if app.record_talk_id(args.talk):
-                sys.exit(gobject.MainLoop().run())
+                sys.exit(run_recording(app, gobject.MainLoop()))
         elif args.filename:
             if app.record_filename(args.filename):
-                sys.exit(gobject.MainLoop().run())
+                sys.exit(run_recording(app, gobject.MainLoop()))
         elif args.show_talks:
             app.print_talks()
 
@@ -272,6 +333,16 @@ def parse_args(parser, parse_args=None):
         else:
             launch_server()
 
+    elif args.app == 'benchmark':
+        # Must declare after argparse otherwise GStreamer will take over the cli help
+        from freeseer.framework import benchmark
+
+        if args.benchmark == 'rooms':
+            write_benchmark_results(benchmark.benchmark_rooms(args.rooms, args.duration), args.output)
+        elif args.benchmark == 'matrix':
+            report = benchmark.benchmark_matrix(args.duration, args.mixer, args.plugin, args.resolution)
+            write_benchmark_results(report, args.output)
+
 
 def launch_recordapp():
     """Launch the Recording GUI if no arguments are passed"""
@@ -32,11 +32,13 @@ from flask import request
 from freeseer import settings
 from freeseer.framework.multimedia import Multimedia
 from freeseer.framework.plugin import PluginManager
+from freeseer.framework.transcode import TranscodeQueue
 from freeseer.frontend.controller import app
 from freeseer.frontend.controller import validate
 from freeseer.frontend.controller.server import HTTPError
 from freeseer.frontend.controller.server import ServerError
 from freeseer.frontend.controller.server import http_response
+from freeseer.frontend.controller.server import in_main_loop
 
 recording = Blueprint('recording', __name__)
 
@@ -59,6 +61,16 @@ recording.form_schema = {
             }
         },
         'required': ['filename']
+    },
+    'attach_output': {
+        'type': 'object',
+        'properties': {
+            'name': {
+                'type': 'string',
+                'minLength': 1
+            }
+        },
+        'required': ['name']
     }
 }
 
@@ -72,7 +84,16 @@ def sync(func):
     return wrapper
 
 
+def new_multimedia():
+    """Returns a Multimedia for a new recording, handing intermediate recordings to the transcoder."""
+    media = Multimedia(recording.config, recording.plugin_manager)
+    if recording.transcoder is not None:
+        media.set_transcoder(recording.transcoder)
+    return media
+
+
 @recording.before_app_first_request
+@in_main_loop
 def configure_recording():
     """Configures freeseer to record via REST server.
 
@@ -85,12 +106,18 @@ def configure_recording():
     recording.plugin_manager = PluginManager(recording.profile)
     recording.storage_file = os.path.join(settings.configdir, app.storage_file_path)
 
+    recording.transcoder = None
+    if recording.config.capture_intermediate:
+        recording.transcoder = TranscodeQueue(recording.profile.get_filepath('transcode.json'),
+                                              recording.config.transcode_workers)
+        recording.transcoder.start()
+
     media_info = shelve.open(recording.storage_file, writeback=True)
 
     recording.next_id = 1
     recording.media_dict = {}
     for key, value in media_info.iteritems():
-        new_media = Multimedia(recording.config, recording.plugin_manager)
+        new_media = new_multimedia()
         if value['null_multimeda']:
             new_media.current_state = Multimedia.NULL
         else:
@@ -110,7 +137,7 @@ def configure_recording():
 
             value['filename'] = filename
 
-            value['filepath'] = new_media.plugman.get_plugin_by_name(new_media.config.record_to_file_plugin, "Output").plugin_object.location
+            value['filepath'] = new_media.file_path
 
         recording.media_dict[media_id] = new_media
 
@@ -120,6 +147,7 @@ def configure_recording():
 
 @recording.route('/recordings', methods=['GET'])
 @http_response(200)
+@in_main_loop
 def get_all_recordings():
     """Returns list of all recordings."""
     return {'recordings': recording.media_dict.keys()}
@@ -127,6 +155,7 @@ def get_all_recordings():
 
 @recording.route('/recordings/<int:recording_id>', methods=['GET'])
 @http_response(200)
+@in_main_loop
 def get_specific_recording(recording_id):
     """Returns specific recording by id."""
 
@@ -136,7 +165,8 @@ def get_specific_recording(recording_id):
     except KeyError:
         raise HTTPError(404, 'No recording with id "{}" was found'.format(recording_id))
 
-    current_state = recording.media_dict[recording_id].current_state
+    media = recording.media_dict[recording_id]
+    current_state = media.current_state
     filename = retrieved_media_entry['filename']
 
     try:
@@ -149,11 +179,13 @@ def get_specific_recording(recording_id):
         'filename': filename,
         'filesize': filesize,
         'status': current_state,
+        'audio_level': media.audio_meter.get_levels(),
     }
 
 
 @recording.route('/recordings/<int:recording_id>', methods=['PATCH'])
 @http_response(200)
+@in_main_loop
 @sync
 def control_recording(recording_id):
     """Change the state of a recording."""
@@ -173,7 +205,7 @@ def control_recording(recording_id):
     elif command == 'pause' and media_state == Multimedia.RECORD:
         retrieved_media.pause()
     elif command == 'stop' and media_state in [Multimedia.RECORD, Multimedia.PAUSE]:
-        retrieved_media.stop()
+        retrieved_media.stop_async()
     else:
         raise HTTPError(400, 'Command "{}" could not be performed'.format(command))
 
@@ -184,8 +216,58 @@ def control_recording(recording_id):
     return ''
 
 
+@recording.route('/recordings/<int:recording_id>/outputs', methods=['GET'])
+@http_response(200)
+@in_main_loop
+def get_recording_outputs(recording_id):
+    """Returns the names of the outputs attached to a recording."""
+    try:
+        retrieved_media = recording.media_dict[recording_id]
+    except KeyError:
+        raise HTTPError(404, 'No recording with id "{}" was found'.format(recording_id))
+
+    return {'outputs': retrieved_media.get_output_names()}
+
+
+@recording.route('/recordings/<int:recording_id>/outputs', methods=['POST'])
+@http_response(201)
+@in_main_loop
+def attach_recording_output(recording_id):
+    """Attaches an output plugin to a recording, also while it is recording."""
+
+    validate.validate_form(request.form, recording.form_schema['attach_output'])
+
+    try:
+        retrieved_media = recording.media_dict[recording_id]
+    except KeyError:
+        raise HTTPError(404, 'No recording with id "{}" was found'.format(recording_id))
+
+    name = request.form['name']
+    if not retrieved_media.attach_output(name):
+        raise HTTPError(400, 'Output "{}" could not be attached'.format(name))
+
+    return {'outputs': retrieved_media.get_output_names()}
+
+
+@recording.route('/recordings/<int:recording_id>/outputs/<name>', methods=['DELETE'])
+@http_response(204)
+@in_main_loop
+def detach_recording_output(recording_id, name):
+    """Detaches an output plugin from a recording, also while it is recording."""
+    try:
+        retrieved_media = recording.media_dict[recording_id]
+    except KeyError:
+        raise HTTPError(404, 'No recording with id "{}" was found'.format(recording_id))
+
+    if not retrieved_media.detach_output(name):
+        raise HTTPError(404, 'Output "{}" is not attached'.format(name))
+
+    return ''
+
+
 @recording.route('/recordings', methods=['POST'])
 @http_response(201)
+@in_main_loop
 @sync
 def create_recording():
     """Initializes a recording and returns its id."""
@@ -193,13 +275,13 @@ def create_recording():
     validate.validate_form(request.form, recording.form_schema['create_recording'])
 
     new_filename = request.form['filename']
-    new_media = Multimedia(recording.config, recording.plugin_manager)
+    new_media = new_multimedia()
     success, filename = new_media.load_backend(None, new_filename)
 
     if not success:
         raise HTTPError(500, 'Could not load multimedia backend')
 
-    filepath = new_media.plugman.get_plugin_by_name(new_media.config.record_to_file_plugin, "Output").plugin_object.location
+    filepath = new_media.file_path
     new_recording_id = recording.next_id
     key = str(new_recording_id)
 
@@ -217,6 +299,7 @@ def create_recording():
 
 @recording.route('/recordings/<int:recording_id>', methods=['DELETE'])
 @http_response(204)
+@in_main_loop
 @sync
 def delete_recording(recording_id):
     """Deletes a recording given an id."""
@@ -228,6 +311,9 @@ def delete_recording(recording_id):
     key = str(recording_id)
     retrieved_media_entry = recording.media_info[key]
 
+    if retrieved_media.current_state == Multimedia.STOPPING:
+        raise HTTPError(409, 'Recording with id "{}" is still being finalized'.format(recording_id))
+
     if retrieved_media.current_state in [Multimedia.RECORD, Multimedia.PAUSE]:
         retrieved_media.stop()
 
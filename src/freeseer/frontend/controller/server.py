@@ -23,7 +23,10 @@
 # http://wiki.github.com/Freeseer/freeseer/
 
 import functools
+import threading
 
+import gobject
+from flask import copy_current_request_context
 from flask import jsonify
 
 from freeseer.frontend.controller import app
@@ -37,9 +40,61 @@ def start_server(storage_file):
     """
 
     app.storage_file_path = storage_file
+    start_main_loop()
     app.run()
 
 
+def start_main_loop():
+    """Runs the GLib main loop in a background thread.
+
+    The recordings' bus messages, stop timeouts and transcoder processes are
+    handled from the main loop, which Flask doesn't run.
+    """
+    global main_loop_thread
+    gobject.threads_init()
+    main_loop_thread = threading.Thread(target=gobject.MainLoop().run, name='main-loop')
+    main_loop_thread.daemon = True
+    main_loop_thread.start()
+
+
+main_loop_thread = None
+
+
+def run_in_main_loop(func, *args, **kwargs):
+    """Calls func in the main loop thread and waits for it, returning its result or raising its exception.
+
+    Multimedia isn't thread-safe, so requests use it from the main loop
+    rather than racing its bus messages and timeouts.
+    """
+    if main_loop_thread is None or threading.current_thread() is main_loop_thread:
+        return func(*args, **kwargs)
+
+    done = threading.Event()
+    outcome = {}
+
+    def call():
+        try:
+            outcome['result'] = func(*args, **kwargs)
+        except Exception as e:
+            outcome['error'] = e
+        done.set()
+        return False
+
+    gobject.idle_add(call)
+    done.wait()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def in_main_loop(func):
+    """Wraps a request handler so that it runs in the main loop thread, with the request's context."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return run_in_main_loop(copy_current_request_context(func), *args, **kwargs)
+    return wrapper
+
+
 def http_response(status_code):
     """Wraps any function that returns a dict, converts to JSON and returns an HTTP response.
 
@@ -24,6 +24,7 @@
 
 from freeseer.framework.multimedia import Multimedia
 from freeseer.framework.plugin import PluginManager
+from freeseer.framework.transcode import TranscodeQueue
 
 
 class RecordingController:
@@ -32,6 +33,13 @@ class RecordingController:
         self.db = db
         self.plugman = PluginManager(profile)
         self.media = Multimedia(self.config, self.plugman, cli=cli)
+        self.standby_talk_id = None
+
+        self.transcoder = None
+        if self.config.capture_intermediate:
+            self.transcoder = TranscodeQueue(profile.get_filepath('transcode.json'), self.config.transcode_workers)
+            self.transcoder.start()
+            self.media.set_transcoder(self.transcoder)
 
     def set_window_id(self, window_id):
         """Sets the Window ID which GStreamer should paint on"""
@@ -41,6 +49,10 @@ class RecordingController:
         """Sets the handler for Audio Feedback levels"""
         self.media.set_audio_feedback_handler(audio_feedback_handler)
 
+    def subscribe_audio_meter(self, callback):
+        """Calls callback(meter) each time the audio levels are updated"""
+        self.media.audio_meter.subscribe(callback)
+
     def record(self):
         """Start Recording"""
         self.media.record()
@@ -49,10 +61,77 @@ class RecordingController:
         """Stop Recording"""
         self.media.stop()
 
+    def stop_async(self, callback=None):
+        """Stop Recording once every output has finalized its file
+
+        callback(file_path, size, duration) is called when the recording is finalized
+        """
+        self.media.stop_async(callback)
+
+    def prepare_standby(self, talk_id):
+        """Pre-rolls the pipeline for talk_id so that it can start recording right away
+
+        Returns True if the standby pipeline is ready
+        Returns False if the talk will be loaded when recording starts
+        """
+        presentation = self.db.get_presentation(talk_id)
+        if self.media.prepare_standby(presentation):
+            self.standby_talk_id = talk_id
+            return True
+
+        self.standby_talk_id = None
+        return False
+
+    def discard_standby(self):
+        """Drops a pipeline prepared with prepare_standby()"""
+        self.media.discard_standby()
+        self.standby_talk_id = None
+
     def pause(self):
         """Pause Recording"""
         self.media.pause()
 
+    def preview(self):
+        """Starts the loaded pipeline without recording
+
+        Returns True if the pipeline is filling the pre-roll buffer
+        Returns False if pre-roll is disabled, the pipeline is paused instead
+        """
+        return self.media.preview()
+
+    def preview_talk_id(self, talk_id):
+        """Prepares the pipeline for talk_id and starts filling its pre-roll buffer
+
+        Returns True if the pipeline for talk_id is pre-rolling
+        Returns False if pre-roll is disabled or the pipeline could not be prepared
+        """
+        if self.standby_talk_id != talk_id or self.media.standby is None:
+            if not self.prepare_standby(talk_id):
+                return False
+        return self.media.preview_standby()
+
+    def get_stream_status(self):
+        """Returns the state and bitrate of each stream destination"""
+        return self.media.get_stream_status()
+
+    def get_preroll_memory(self):
+        """Returns the number of bytes held in the pre-roll buffer"""
+        return self.media.get_preroll_memory()
+
+    def set_stream_enabled(self, enabled):
+        """Attaches or detaches the stream output while the backend is loaded
+
+        Returns True if the stream output was attached or detached
+        Returns False if the backend is not loaded or the change failed
+        """
+        if not self.media.is_loaded():
+            return False
+
+        if enabled:
+            return self.media.attach_output(self.config.record_to_stream_plugin)
+        else:
+            return self.media.detach_output(self.config.record_to_stream_plugin)
+
     def load_backend(self, presentation=None):
         """Prepares the backend for recording"""
         initialized, filename_for_frontend = self.media.load_backend(presentation)
@@ -85,6 +164,15 @@ class RecordingController:
         Returns True if recording is successfully started
         Returns False if any issues arise
         """
+        if self.standby_talk_id is not None and self.standby_talk_id == talk_id and self.media.standby is not None:
+            # The pipeline for this talk is already pre-rolled, it takes over once the current one is stopped
+            if self.media.current_state in [Multimedia.RECORD, Multimedia.PAUSE]:
+                self.media.stop_async(lambda *result: self.record_standby())
+                return True
+            self.media.stop()
+            return self.record_standby()
+
+        self.standby_talk_id = None
         presentation = self.db.get_presentation(talk_id)
         if self.media.load_backend(presentation):
             # Only record if the backend successfully loaded
@@ -96,6 +184,38 @@ class RecordingController:
         else:
             return False
 
+    def record_standby(self):
+        """Records the pre-rolled standby pipeline
+
+        Returns True if the standby pipeline took over and is recording
+        Returns False if there is no standby pipeline or the current one is still running
+        """
+        self.standby_talk_id = None
+        if self.media.standby is None or self.media.current_state not in [Multimedia.NULL, Multimedia.STOP,
+                                                                           Multimedia.STOPPING]:
+            return False
+        self.record()
+        return True
+
+    def rollover_talk_id(self, talk_id):
+        """Switches the running recording over to a known Talk ID
+
+        The pipeline keeps running and only the recorded file changes. If
+        that is not possible the recording is finalized with stop_async() and
+        talk_id is recorded from scratch once it is.
+
+        Returns True if recording of talk_id is successfully started or pending
+        Returns False if any issues arise
+        """
+        presentation = self.db.get_presentation(talk_id)
+        if self.media.rollover(presentation):
+            return True
+
+        if self.media.current_state in [Multimedia.RECORD, Multimedia.PAUSE]:
+            self.media.stop_async(lambda *result: self.record_talk_id(talk_id))
+            return True
+        return self.record_talk_id(talk_id)
+
     def record_filename(self, filename):
         """Records to a specific filename
 
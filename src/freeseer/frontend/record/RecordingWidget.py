@@ -263,6 +263,12 @@ class RecordingWidget(QWidgetWithDpi):
         self.audioFeedbackCheckbox.setToolTip("Enable Audio Feedback")
         self.mainLayout.addWidget(self.audioFeedbackCheckbox)
 
+        # Stream Checkbox
+        self.streamCheckbox = QCheckBox()
+        self.streamCheckbox.setLayoutDirection(Qt.RightToLeft)
+        self.streamCheckbox.setToolTip("Enable streaming, also while recording")
+        self.mainLayout.addWidget(self.streamCheckbox)
+
     def setRecordIcon(self):
         self.is_recording = not self.is_recording
         if self.is_recording:
@@ -37,6 +37,7 @@ except AttributeError:
     _fromUtf8 = lambda s: s
 
 from freeseer.framework.presentation import Presentation
+from freeseer.framework.resilience import ResilientSender
 from freeseer.framework.failure import Failure
 from freeseer.framework.util import get_free_space
 from freeseer.frontend.qtcommon.FreeseerApp import FreeseerApp
@@ -54,6 +55,10 @@ log = logging.getLogger(__name__)
 class RecordApp(FreeseerApp):
     """Freeseer's main GUI class."""
 
+    # Talks that start at most this many seconds after the previous one are
+    # recorded by rolling over the running pipeline instead of restarting it.
+    ROLLOVER_MAX_GAP = 60
+
     def __init__(self, profile, config):
         super(RecordApp, self).__init__(config)
 
@@ -93,6 +98,10 @@ class RecordApp(FreeseerApp):
         self.timer = QtCore.QTimer(self)
         self.timer.timeout.connect(self.update_timer)
 
+        # Set timer for showing the pre-roll buffer memory use in standby
+        self.prerollTimer = QtCore.QTimer(self)
+        self.prerollTimer.timeout.connect(self.update_preroll_status)
+
         # Initialize variables for auto-recording
         self.singleID = None
         self.timeUntilStart = None
@@ -170,6 +179,7 @@ class RecordApp(FreeseerApp):
         self.connect(self.mainWidget.recordButton, QtCore.SIGNAL('clicked()'), self.record)
         self.connect(self.mainWidget.pauseButton, QtCore.SIGNAL('toggled(bool)'), self.pause)
         self.connect(self.mainWidget.audioFeedbackCheckbox, QtCore.SIGNAL('toggled(bool)'), self.toggle_audio_feedback)
+        self.connect(self.mainWidget.streamCheckbox, QtCore.SIGNAL('toggled(bool)'), self.toggle_stream)
         self.connect(self.mainWidget.playButton, QtCore.SIGNAL('clicked()'), self.play_video)
 
         self.connect(self.autoRecordWidget.leaveButton, QtCore.SIGNAL('clicked()'), functools.partial(self.auto_record, state=False))
@@ -221,9 +231,11 @@ class RecordApp(FreeseerApp):
         self.idleString = self.app.translate("RecordApp", "Idle.")
         self.readyString = self.app.translate("RecordApp", "Ready.")
         self.recordingString = self.app.translate("RecordApp", "Recording")
+        self.reconnectingString = self.app.translate("RecordApp", "reconnecting")
         self.pausedString = self.app.translate("RecordApp", "Recording Paused.")
         self.freeSpaceString = self.app.translate("RecordApp", "Free Space:")
         self.elapsedTimeString = self.app.translate("RecordApp", "Elapsed Time:")
+        self.prerollString = self.app.translate("RecordApp", "Pre-roll:")
         # --- End Reusable Strings
 
         if self.mainWidget.is_recording and self.mainWidget.pauseButton.isChecked():
@@ -274,6 +286,8 @@ class RecordApp(FreeseerApp):
         self.mainWidget.roomLabel.setText(self.app.translate("RecordApp", "Room"))
         self.mainWidget.dateLabel.setText(self.app.translate("RecordApp", "Date"))
         self.mainWidget.talkLabel.setText(self.app.translate("RecordApp", "Talk"))
+        self.mainWidget.streamCheckbox.setText(self.app.translate("RecordApp", "Stream"))
+        self.mainWidget.streamCheckbox.setToolTip(self.app.translate("RecordApp", "Enable streaming, also while recording"))
         # --- End RecordingWidget
 
         #
@@ -320,6 +334,8 @@ class RecordApp(FreeseerApp):
                 self.translate(action)
                 break
 
+        self.mainWidget.streamCheckbox.setChecked(self.config.record_to_stream)
+
         # Load Talks as a SQL Data Model.
         self.load_event_list()
 
@@ -362,15 +378,19 @@ class RecordApp(FreeseerApp):
         if state:  # Prepare the pipelines
             if self.load_backend():
                 toggle_gui(True)
-                self.controller.pause()
-                self.mainWidget.statusLabel.setText(u"{} {} --- {} ".format(self.freeSpaceString,
-                                                                            get_free_space(self.config.videodir),
-                                                                            self.readyString))
+                if self.controller.preview():
+                    self.update_preroll_status()
+                    self.prerollTimer.start(1000)
+                else:
+                    self.mainWidget.statusLabel.setText(u"{} {} --- {} ".format(self.freeSpaceString,
+                                                                                get_free_space(self.config.videodir),
+                                                                                self.readyString))
             else:
                 toggle_gui(False)
                 self.mainWidget.standbyButton.setChecked(False)
         else:
             toggle_gui(False)
+            self.prerollTimer.stop()
             self.controller.stop()
             self.mainWidget.standbyButton.setChecked(False)
 
@@ -383,6 +403,7 @@ class RecordApp(FreeseerApp):
             logo_rec = QtGui.QPixmap(":/freeseer/logo_rec.png")
             sysIcon2 = QtGui.QIcon(logo_rec)
             self.systray.setIcon(sysIcon2)
+            self.prerollTimer.stop()
             self.controller.record()
             self.mainWidget.recordButton.setToolTip(self.stopString)
             self.mainWidget.disengageButton.setEnabled(False)
@@ -402,7 +423,7 @@ class RecordApp(FreeseerApp):
             logo_rec = QtGui.QPixmap(":/freeseer/logo.png")
             sysIcon = QtGui.QIcon(logo_rec)
             self.systray.setIcon(sysIcon)
-            self.controller.stop()
+            self.controller.stop_async(self.recording_finished)
             self.mainWidget.pauseButton.setChecked(False)
             self.mainWidget.recordButton.setToolTip(self.recordString)
             self.mainWidget.disengageButton.setEnabled(True)
@@ -420,9 +441,8 @@ class RecordApp(FreeseerApp):
             self.timer.stop()
             self.reset_timer()
 
-            #Show playback button
+            #Show playback button, it is enabled once the file is finalized
             self.mainWidget.playButton.setVisible(True)
-            self.mainWidget.playButton.setEnabled(True)
 
             # Select next talk if there is one within 15 minutes.
             if self.current_event and self.current_room:
@@ -436,6 +456,12 @@ class RecordApp(FreeseerApp):
                         if talkid == self.mainWidget.talkComboBox.model().index(i, 1).data(QtCore.Qt.DisplayRole).toString():
                             self.mainWidget.talkComboBox.setCurrentIndex(i)
 
+    def recording_finished(self, file_path, size, duration):
+        """Called once the recorded file is finalized."""
+        log.info("Recording finished: %s (%d bytes, %s seconds)", file_path, size, duration)
+        if not self.mainWidget.is_recording:
+            self.mainWidget.playButton.setEnabled(True)
+
     def _enable_disable_gui(self, state):
         """Disables GUI components when Auto Record is pressed, and enables them when Auto Record is released"""
         self.mainWidget.standbyButton.setDisabled(state)
@@ -479,7 +505,8 @@ class RecordApp(FreeseerApp):
         else:
             self.beforeStartTimer.stop()
             self.beforeEndTimer.stop()
-            self.controller.stop()
+            self.controller.stop_async()
+            self.controller.discard_standby()
             self.stop_auto_record_gui()
 
         self.mainWidget.playButton.setEnabled(False)
@@ -490,9 +517,12 @@ class RecordApp(FreeseerApp):
         Stops the recording of the last talk if it exists, displays the countdown until the start of
         the next talk, and when the talk begins, records the talk while displaying the countdown until
         the end of the talk.
+
+        If the next talk starts within ROLLOVER_MAX_GAP seconds, the recording keeps running
+        and is rolled over to the next talk when it starts.
         """
-        if self.recorded:
-            self.controller.stop()
+        if self.recorded and not self.next_auto_record_starts_within(self.ROLLOVER_MAX_GAP):
+            self.controller.stop_async()
             self.recorded = False
             log.debug("Auto-recording for the current talk stopped.")
 
@@ -511,6 +541,10 @@ class RecordApp(FreeseerApp):
                 # Time (in seconds) from the starttime to endtime of this talk
                 self.timeUntilEnd = starttime.secsTo(endtime)
 
+                # Fill the pre-roll buffer while waiting for the talk to start
+                if not self.recorded and self.config.preroll_time > 0:
+                    self.controller.preview_talk_id(self.singleID)
+
                 # Display fullscreen countdown and talk info until talk starts
                 self.autoRecordWidget.set_recording(False)
                 self.autoRecordWidget.set_display_message(title, speaker)
@@ -532,12 +566,40 @@ class RecordApp(FreeseerApp):
         self.autoRecordWidget.set_recording(True)
         self.autoRecordWidget.set_display_message()
         self.autoRecordWidget.start_timer(self.timeUntilEnd)
-        if self.controller.record_talk_id(self.singleID):
+        if self.recorded:
+            if self.controller.rollover_talk_id(self.singleID):
+                log.debug("Auto-recording rolled over to the current talk.")
+            else:
+                self.recorded = False
+        elif self.controller.record_talk_id(self.singleID):
             log.debug("Auto-recording for the current talk started.")
             self.recorded = True
         self.beforeEndTimer.setInterval((self.timeUntilEnd + 1) * 1000)
         self.beforeEndTimer.setSingleShot(True)
         self.beforeEndTimer.start()
+        self.prepare_next_auto_record()
+
+    def next_auto_record_starts_within(self, seconds):
+        """Returns True if the next auto-record talk starts within the given number of seconds"""
+        if self.autoTalks.next():
+            starttime = QtCore.QTime.fromString(self.autoTalks.value(8).toString())
+            self.autoTalks.previous()
+            return 0 <= QtCore.QTime.currentTime().secsTo(starttime) <= seconds
+        return False
+
+    def prepare_next_auto_record(self):
+        """Pre-rolls the pipeline of the next talk so that it starts recording as soon as the current one ends"""
+        endtime = QtCore.QTime.fromString(self.autoTalks.value(9).toString())
+        if self.autoTalks.next():
+            starttime = QtCore.QTime.fromString(self.autoTalks.value(8).toString())
+            next_id = self.autoTalks.value(0).toString()
+            # Leave the cursor on the current talk for single_auto_record
+            self.autoTalks.previous()
+            if endtime.secsTo(starttime) <= self.ROLLOVER_MAX_GAP:
+                # Back-to-back talks are rolled over, the running pipeline is reused
+                return
+            if self.controller.prepare_standby(next_id):
+                log.debug("Standby pipeline ready for the next talk.")
 
     def pause(self, state):
         """Pause the recording"""
@@ -580,11 +642,35 @@ class RecordApp(FreeseerApp):
             self.time_seconds = 0
             self.time_minutes += 1
 
-        self.mainWidget.statusLabel.setText(u"{} {} --- {} {} --- {}".format(self.elapsedTimeString,
-                                                                             frmt_time,
-                                                                             self.freeSpaceString,
-                                                                             get_free_space(self.config.videodir),
-                                                                             self.recordingString))
+        status = u"{} {} --- {} {} --- {}".format(self.elapsedTimeString,
+                                                  frmt_time,
+                                                  self.freeSpaceString,
+                                                  get_free_space(self.config.videodir),
+                                                  self.recordingString)
+        streams = self.get_stream_status_string()
+        if streams:
+            status = u"{} --- {}".format(status, streams)
+        self.mainWidget.statusLabel.setText(status)
+
+    def get_stream_status_string(self):
+        """Returns the output bitrate of each stream destination, or that it is reconnecting."""
+        destinations = []
+        for name, stats in sorted(self.controller.get_stream_status().items()):
+            if stats['state'] == ResilientSender.CONNECTING:
+                destinations.append(u"{} {}".format(name, self.reconnectingString))
+            else:
+                destinations.append(u"{} {:.0f} kb/s".format(name, stats['bitrate'] / 1000))
+        return u", ".join(destinations)
+
+    def update_preroll_status(self):
+        """Shows how much memory the pre-roll buffer uses while in standby."""
+        used = self.controller.get_preroll_memory() / (1024.0 * 1024.0)
+        self.mainWidget.statusLabel.setText(u"{} {} --- {} {:.1f}/{} MB --- {} ".format(self.freeSpaceString,
+                                                                                   get_free_space(self.config.videodir),
+                                                                                   self.prerollString,
+                                                                                   used,
+                                                                                   self.config.preroll_memory_limit,
+                                                                                   self.readyString))
 
     def reset_timer(self):
         """Resets the Elapsed Time."""
@@ -595,6 +681,16 @@ class RecordApp(FreeseerApp):
         """Enables or disables audio feedback according to checkbox state"""
         self.config.audio_feedback = enabled
 
+    def toggle_stream(self, enabled):
+        """Enables or disables streaming according to checkbox state
+
+        If the backend is already loaded, the stream output is attached or
+        detached right away without interrupting the recording.
+        """
+        self.config.record_to_stream = enabled
+        if self.controller.set_stream_enabled(enabled):
+            log.info("Streaming %s.", "started" if enabled else "stopped")
+
     ###
     ### Talk Related
     ###
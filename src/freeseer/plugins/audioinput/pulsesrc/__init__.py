@@ -42,6 +42,7 @@ from PyQt4.QtCore import SIGNAL
 # Freeseer
 from freeseer.framework.plugin import IAudioInput
 from freeseer.framework.config import Config, options
+from freeseer.framework.devices import device_registry
 
 # .freeseer-plugin custom
 import widget
@@ -52,21 +53,15 @@ log = logging.getLogger(__name__)
 def get_sources():
     """
     Get a list of pairs in the form (name, description) for each pulseaudio source.
+
+    Sources are cached by the device registry until PulseAudio reports a change.
     """
-    audiosrc = gst.element_factory_make("pulsesrc", "audiosrc")
-    audiosrc.probe_property_name('device')
-    names = audiosrc.probe_get_values_name('device')
-    # TODO: should be getting actual device description, but .get_property('device-name') does not work
-    return zip(names, names)
+    return [(device, name) for name, device in device_registry.get_devices('pulse')]
 
 
 def get_default_source():
     """Returns the default audio source."""
-    sources = get_sources()
-    if not sources:
-        return ''
-    else:
-        return sources[0][0]
+    return device_registry.get_default('pulse')
 
 
 class PulseSrcConfig(Config):
@@ -111,16 +106,26 @@ class PulseSrc(IAudioInput):
     def widget_load_config(self, plugman):
         self.load_config(plugman)
 
-        sources = get_sources()
+        self.load_sources()
+        # Sources plugged in or out while the widget is shown
+        device_registry.add_listener(self.on_devices_changed)
+
+        # Finally connect the signals
+        self.__enable_connections()
 
+    def load_sources(self):
+        """Fills the source combobox, without changing the configured source."""
+        self.widget.source_combobox.blockSignals(True)
         self.widget.source_combobox.clear()
-        for i, source in enumerate(sources):
+        for i, source in enumerate(get_sources()):
             self.widget.source_combobox.addItem(source[1], userData=source[0])
             if self.config.source == source[0]:
                 self.widget.source_combobox.setCurrentIndex(i)
+        self.widget.source_combobox.blockSignals(False)
 
-        # Finally connect the signals
-        self.__enable_connections()
+    def on_devices_changed(self, kind):
+        if kind == 'pulse' and self.widget is not None:
+            self.load_sources()
 
     def set_source(self, index):
         self.config.source = self.widget.source_combobox.itemData(index).toString()
@@ -0,0 +1,156 @@
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://github.com/Freeseer/freeseer/
+
+
+'''
+DV Output
+---------
+
+An output plugin that records the compressed DV stream of a FireWire source
+straight to a DV or Matroska file, without decoding or encoding it.
+
+@author: Free and Open Source Software Learning Centre
+'''
+
+# Python
+import logging
+
+# GStreamer
+import pygst
+pygst.require("0.10")
+import gst
+
+# PyQt
+from PyQt4.QtCore import SIGNAL
+
+# Freeseer
+from freeseer.framework.plugin import IOutput
+from freeseer.framework.config import Config, options
+
+# .freeseer-plugin custom
+import widget
+
+log = logging.getLogger(__name__)
+
+
+class DVOutputConfig(Config):
+    """Configuration class for DVOutput plugin."""
+    container = options.ChoiceOption(widget.containers.keys(), "DV")
+
+
+class DVOutput(IOutput):
+    name = "DV Output"
+    os = ["linux", "linux2"]
+    type = IOutput.BOTH
+    recordto = IOutput.FILE
+    CONFIG_CLASS = DVOutputConfig
+
+    def get_extension(self):
+        self.get_config()
+        return widget.containers[str(self.config.container)]
+
+    def get_compressed_caps(self):
+        return "video/x-dv, systemstream=(boolean)true"
+
+    def get_output_bin(self, audio=True, video=True, metadata=None):
+        """Returns a bin writing the DV stream on its compressedsink pad to a file
+
+        The raw streams on the audiosink and videosink pads are discarded, so
+        only the audio carried in the DV stream itself is recorded.
+
+        Pipeline:
+            compressedsink > filesink
+        or, for Matroska:
+            compressedsink > dvdemux > queue > matroskamux > filesink
+        """
+        if audio:
+            log.warning("DV Output keeps only the DV stream's own audio, "
+                        "the configured audio input and mixer will not be recorded.")
+
+        bin = gst.Bin()
+
+        filesink = gst.element_factory_make('filesink', 'filesink')
+        filesink.set_property('location', self.location)
+        bin.add(filesink)
+
+        if self.config.container == "Matroska":
+            dvdemux = gst.element_factory_make("dvdemux", "dvdemux")
+            bin.add(dvdemux)
+
+            muxer = gst.element_factory_make("matroskamux", "muxer")
+            bin.add(muxer)
+            muxer.link(filesink)
+
+            # dvdemux only adds its audio and video pads once it sees the stream
+            dvdemux.connect("pad-added", self._on_demuxer_pad_added, bin, muxer)
+            compressedpad = dvdemux.get_pad("sink")
+        else:
+            compressedpad = filesink.get_pad("sink")
+
+        bin.add_pad(gst.GhostPad("compressedsink", compressedpad))
+
+        # The raw streams still have to be consumed for the tees to flow
+        for kind, record in [("audio", audio), ("video", video)]:
+            if record:
+                fakesink = gst.element_factory_make("fakesink", kind + "fakesink")
+                fakesink.set_property("sync", False)
+                fakesink.set_property("async", False)
+                bin.add(fakesink)
+                bin.add_pad(gst.GhostPad(kind + "sink", fakesink.get_pad("sink")))
+
+        return bin
+
+    def _on_demuxer_pad_added(self, dvdemux, pad, bin, muxer):
+        queue = gst.element_factory_make("queue")
+        bin.add(queue)
+        queue.sync_state_with_parent()
+        pad.link(queue.get_pad("sink"))
+        queue.link(muxer)
+
+    def get_widget(self):
+        if self.widget is None:
+            self.widget = widget.ConfigWidget()
+
+        return self.widget
+
+    def __enable_connections(self):
+        self.widget.connect(self.widget.containerComboBox, SIGNAL('currentIndexChanged(const QString&)'),
+                            self.set_container)
+
+    def widget_load_config(self, plugman):
+        self.get_config()
+
+        self.widget.containerComboBox.setCurrentIndex(self.widget.containerComboBox.findText(self.config.container))
+
+        # Finally enable connections
+        self.__enable_connections()
+
+    def set_container(self, container):
+        self.config.container = container
+        self.config.save()
+
+    ###
+    ### Translations
+    ###
+    def retranslate(self):
+        self.widget.containerLabel.setText(self.gui.app.translate('plugin-dv-output', 'Container'))
+        self.widget.audioNoteLabel.setText(self.gui.app.translate(
+            'plugin-dv-output', 'Only the audio in the DV stream is recorded, the audio mixer is ignored.'))
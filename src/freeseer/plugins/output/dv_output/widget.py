@@ -0,0 +1,65 @@
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://github.com/Freeseer/freeseer/
+
+
+'''
+DV Output
+---------
+
+Configuration widget for the DV Output plugin.
+
+@author: Free and Open Source Software Learning Centre
+'''
+
+from collections import OrderedDict
+
+from PyQt4.QtGui import QComboBox
+from PyQt4.QtGui import QFormLayout
+from PyQt4.QtGui import QLabel
+from PyQt4.QtGui import QWidget
+
+
+# Container -> file extension
+containers = OrderedDict([
+    ('DV', 'dv'),
+    ('Matroska', 'mkv'),
+])
+
+AUDIO_NOTE = "Only the audio in the DV stream is recorded, the audio mixer is ignored."
+
+
+class ConfigWidget(QWidget):
+
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent)
+
+        layout = QFormLayout()
+        self.setLayout(layout)
+
+        self.containerLabel = QLabel("Container")
+        self.containerComboBox = QComboBox()
+        for container in containers:
+            self.containerComboBox.addItem(container)
+        layout.addRow(self.containerLabel, self.containerComboBox)
+
+        self.audioNoteLabel = QLabel(AUDIO_NOTE)
+        self.audioNoteLabel.setWordWrap(True)
+        layout.addRow(self.audioNoteLabel)
@@ -0,0 +1,567 @@
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://github.com/Freeseer/freeseer/
+
+
+'''
+HLS Output
+----------
+
+An output plugin which streams to the local network, for overflow rooms and
+hallway screens, without needing a streaming server. H.264/AAC is muxed into
+MPEG-TS segments of a few seconds each, written to a folder along with a
+rolling HLS playlist, and a small built-in HTTP server serves the folder
+while recording.
+
+Only the last few segments are kept so that disk use stays constant however
+long the recording is. Players on the LAN open:
+
+    http://<recording machine>:<port>/stream.m3u8
+
+@author: Free and Open Source Software Learning Centre
+'''
+
+# Python modules
+import BaseHTTPServer
+import fnmatch
+import logging
+import math
+import os
+import posixpath
+import SimpleHTTPServer
+import socket
+import SocketServer
+import tempfile
+import threading
+import time
+import urlparse
+
+# GStreamer modules
+import gobject
+import pygst
+pygst.require("0.10")
+import gst
+
+# PyQt modules
+from PyQt4.QtCore import SIGNAL
+
+# Freeseer modules
+from freeseer.framework.encoding import PRESETS, drop_gaps, get_preset_properties, set_encoder_properties
+from freeseer.framework.multimedia import Quality
+from freeseer.framework.plugin import IOutput
+from freeseer.framework.config import Config, options
+
+# .freeseer-plugin custom modules
+import widget
+
+log = logging.getLogger(__name__)
+
+PLAYLIST = 'stream.m3u8'
+SEGMENT_EXTENSION = '.ts'
+# Segments are named segment-<recording start>-<index>.ts
+SEGMENT_PATTERN = 'segment-*' + SEGMENT_EXTENSION
+
+MIME_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    SEGMENT_EXTENSION: 'video/mp2t',
+}
+
+# multifilesink next-file mode starting a new file on each force key unit event
+NEXT_FILE_KEY_UNIT_EVENT = 3
+
+# x264enc tune flag minimizing the encoder latency
+TUNE_ZEROLATENCY = 0x4
+
+
+def clear_folder(folder):
+    """Deletes the playlist and segments left in folder by a previous recording, and nothing else."""
+    for filename in os.listdir(folder):
+        if filename in [PLAYLIST, PLAYLIST + '.tmp'] or fnmatch.fnmatch(filename, SEGMENT_PATTERN):
+            try:
+                os.remove(os.path.join(folder, filename))
+            except OSError as e:
+                log.warning("Failed to delete %s: %s", filename, e)
+
+
+class Playlist(object):
+    """A rolling HLS playlist of the last length segments of a live stream.
+
+    Segments dropping off the playlist are kept on disk for RETAINED_SEGMENTS
+    more segments, as clients may still be downloading them, then deleted.
+    """
+
+    RETAINED_SEGMENTS = 2
+
+    def __init__(self, folder, length=5, target_duration=2):
+        self.folder = folder
+        self.length = max(1, length)
+        self.target_duration = target_duration
+        self.path = os.path.join(folder, PLAYLIST)
+        # (filename, duration in seconds) of the segments on disk, oldest first
+        self.segments = []
+        # Media sequence number of the oldest segment on disk
+        self.sequence = 0
+        self.ended = False
+
+    def add_segment(self, filename, duration):
+        """Publishes a finished segment, deleting the segments no longer needed."""
+        self.segments.append((filename, duration))
+        while len(self.segments) > self.length + self.RETAINED_SEGMENTS:
+            old, _ = self.segments.pop(0)
+            self.sequence += 1
+            try:
+                os.remove(os.path.join(self.folder, old))
+            except OSError as e:
+                log.warning("Failed to delete segment %s: %s", old, e)
+        self.write()
+
+    def end(self):
+        """Marks the stream as finished, so players stop polling the playlist."""
+        self.ended = True
+        self.write()
+
+    def get_live_segments(self):
+        return self.segments[-self.length:]
+
+    def render(self):
+        live = self.get_live_segments()
+        # Players may not fetch segments longer than the target duration
+        target = max([self.target_duration] + [int(math.ceil(duration)) for _, duration in live])
+
+        lines = [
+            '#EXTM3U',
+            '#EXT-X-VERSION:3',
+            '#EXT-X-TARGETDURATION:{0}'.format(target),
+            '#EXT-X-MEDIA-SEQUENCE:{0}'.format(self.sequence + len(self.segments) - len(live)),
+        ]
+        for filename, duration in live:
+            lines.append('#EXTINF:{0:.3f},'.format(duration))
+            lines.append(filename)
+        if self.ended:
+            lines.append('#EXT-X-ENDLIST')
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        # Replace the playlist in one step so clients never read half of it
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as playlist:
+            playlist.write(self.render())
+        os.rename(temp_path, self.path)
+
+
+class Segmenter(object):
+    """Cuts the stream into segments of segment_duration seconds and publishes them to a Playlist.
+
+    Every segment_duration seconds a keyframe is requested upstream of muxer;
+    the encoder answers with a force key unit event ahead of the keyframe, on
+    which multifilesink starts a new file. The event's timestamp ends the
+    previous segment. on_started is called from the main loop once data
+    first flows.
+    """
+
+    def __init__(self, muxer, sink, playlist, location, segment_duration, on_started=None):
+        self.muxer = muxer
+        self.on_started = on_started
+        self.playlist = playlist
+        self.location = location
+        self.segment_duration = segment_duration
+        self.index = 0
+        self.segment_start = None
+        self.position = None
+        self.ended = False
+        self.timer = None
+
+        pad = sink.get_static_pad('sink')
+        pad.add_buffer_probe(self._on_buffer)
+        pad.add_event_probe(self._on_event)
+
+    def _on_buffer(self, pad, buffer):
+        if buffer.timestamp != gst.CLOCK_TIME_NONE:
+            if self.segment_start is None:
+                self.segment_start = buffer.timestamp
+            self.position = buffer.timestamp
+            if buffer.duration != gst.CLOCK_TIME_NONE:
+                self.position += buffer.duration
+
+        # (Re)start requesting keyframes once data flows, e.g. after a pause
+        if self.timer is None and not self.ended:
+            self.timer = gobject.idle_add(self._start_timer)
+        return True
+
+    def _start_timer(self):
+        self.timer = gobject.timeout_add(self.segment_duration * 1000, self._request_keyframe)
+        if self.on_started is not None:
+            self.on_started()
+            self.on_started = None
+        return False
+
+    def _request_keyframe(self):
+        if self.ended or self.muxer.get_state(0)[1] != gst.STATE_PLAYING:
+            self.timer = None
+            return False
+
+        structure = gst.Structure('GstForceKeyUnit')
+        structure['all-headers'] = True
+        self.muxer.get_static_pad('src').send_event(gst.event_new_custom(gst.EVENT_CUSTOM_UPSTREAM, structure))
+        return True
+
+    def _on_event(self, pad, event):
+        if event.type == gst.EVENT_EOS:
+            self.ended = True
+            boundary = self.position
+        elif event.type == gst.EVENT_CUSTOM_DOWNSTREAM and event.get_structure().get_name() == 'GstForceKeyUnit':
+            structure = event.get_structure()
+            boundary = self.position
+            if structure.has_field('timestamp') and structure['timestamp'] != gst.CLOCK_TIME_NONE:
+                boundary = structure['timestamp']
+        else:
+            return True
+
+        # multifilesink only starts a new file once the current one has data
+        if self.segment_start is not None and boundary is not None:
+            duration = float(boundary - self.segment_start) / gst.SECOND
+            filename = os.path.basename(self.location % self.index)
+            self.index += 1
+            self.segment_start = boundary if not self.ended else None
+            gobject.idle_add(self.playlist.add_segment, filename, duration)
+
+        if self.ended:
+            gobject.idle_add(self.playlist.end)
+        return True
+
+
+class SegmentRequestHandler(SimpleHTTPServer.SimpleHTTPRequestHandler):
+    """Serves the files of the server's folder, and nothing outside of it."""
+
+    extensions_map = SimpleHTTPServer.SimpleHTTPRequestHandler.extensions_map.copy()
+    extensions_map.update(MIME_TYPES)
+
+    def translate_path(self, path):
+        filename = posixpath.basename(urlparse.urlsplit(path).path)
+        return os.path.join(self.server.folder, filename)
+
+    def end_headers(self):
+        # Let web players on other hosts fetch the stream, and always fetch the latest playlist
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if self.path.split('?')[0].endswith('.m3u8'):
+            self.send_header('Cache-Control', 'no-cache')
+        SimpleHTTPServer.SimpleHTTPRequestHandler.end_headers(self)
+
+    def log_message(self, format, *args):
+        log.debug("%s %s", self.client_address[0], format % args)
+
+
+class SegmentServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, folder, address, port):
+        BaseHTTPServer.HTTPServer.__init__(self, (address, port), SegmentRequestHandler)
+        self.folder = folder
+
+
+def serve_folder(folder, address, port):
+    """Serves folder over HTTP on address and port, in a background thread.
+
+    An empty address listens on every interface. Returns the server, to be
+    stopped with stop_server(), or None on failure.
+    """
+    try:
+        server = SegmentServer(folder, address, port)
+    except socket.error as e:
+        log.error("Failed to serve the HLS stream on port %d: %s", port, e)
+        return None
+
+    thread = threading.Thread(target=server.serve_forever, name='hls-server-{0}'.format(port))
+    thread.daemon = True
+    thread.start()
+    log.info("Serving the HLS stream at http://%s:%d/%s", address or socket.gethostname(), port, PLAYLIST)
+    return server
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+    log.info("Stopped serving the HLS stream.")
+
+
+class HLSOutputConfig(Config):
+    """Configuration class for HLSOutput plugin."""
+    folder = options.FolderOption(os.path.join(tempfile.gettempdir(), 'freeseer-hls'), auto_create=True)
+    serve = options.BooleanOption(True)
+    # Empty to serve on every interface
+    address = options.StringOption('')
+    port = options.IntegerOption(8088)
+    segment_duration = options.IntegerOption(2)
+    playlist_length = options.IntegerOption(5)
+    video_bitrate = options.IntegerOption(1200)
+    audio_bitrate = options.IntegerOption(96)
+    preset = options.ChoiceOption(PRESETS, 'realtime')
+
+
+class HLSOutput(IOutput):
+    name = "HLS Output"
+    os = ["linux", "linux2"]
+    type = IOutput.BOTH
+    recordto = IOutput.STREAM
+    CONFIG_CLASS = HLSOutputConfig
+    configurable = True
+    own_video_encoder = True
+    AUDIO_MIN = 32
+    AUDIO_RANGE = 160
+    bin = None
+    server = None
+    folder = None
+    port = None
+
+    # Folders and ports used by the HLS Outputs of this process, so that
+    # rooms streaming at the same time never share them
+    claimed_folders = set()
+    claimed_ports = set()
+
+    def get_output_bin(self, audio=True, video=True, metadata=None):
+        if not video:
+            # Segments are cut on video keyframes
+            log.error("HLS Output needs video to cut the stream into segments.")
+            return None
+
+        self.release_claims()
+        folder = self.folder = self.claim_folder()
+        self.port = self.claim_port()
+        clear_folder(folder)
+
+        bin = gst.Bin()
+
+        muxer = gst.element_factory_make("mpegtsmux", "muxer")
+        bin.add(muxer)
+
+        if audio:
+            # faac takes bits per second; outputformat 1 is ADTS, which MPEG-TS carries
+            self.add_encoder(bin, "audiosink", muxer, ["audioconvert", "audioresample"], "faac",
+                             {"bitrate": self.config.audio_bitrate * 1000, "outputformat": 1})
+
+        properties = get_preset_properties("x264enc", self.config.preset, self.encoder_threads)
+        properties.update({
+            "bitrate": self.config.video_bitrate,
+            "byte-stream": True,
+            "tune": TUNE_ZEROLATENCY,
+        })
+        self.add_encoder(bin, "videosink", muxer, ["ffmpegcolorspace"], "x264enc", properties)
+
+        # Segment names change with every recording so players don't mix up cached segments
+        location = os.path.join(folder, SEGMENT_PATTERN.replace('*', '{0}-%05d').format(int(time.time())))
+        sink = gst.element_factory_make("multifilesink", "sink")
+        sink.set_property("location", location)
+        sink.set_property("next-file", NEXT_FILE_KEY_UNIT_EVENT)
+        bin.add(sink)
+        muxer.link(sink)
+
+        playlist = Playlist(folder, self.config.playlist_length, self.config.segment_duration)
+        # The server only starts once the recording does, not while the pipeline is on standby
+        self.segmenter = Segmenter(muxer, sink, playlist, location, max(1, self.config.segment_duration),
+                                   self.start_server)
+
+        self.bin = bin
+        return bin
+
+    def claim_folder(self):
+        """Returns the configured folder, or a folder of its own if another pipeline streams to it.
+
+        The folder of its own is named after the recording, in the configured folder.
+        """
+        folder = self.config.folder
+        if folder in HLSOutput.claimed_folders:
+            name = os.path.splitext(os.path.basename(getattr(self, 'location', None) or ''))[0] or 'stream'
+            base = folder = os.path.join(self.config.folder, name)
+            count = 0
+            while folder in HLSOutput.claimed_folders:
+                folder = '{0}-{1}'.format(base, count)
+                count += 1
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            log.info("%s is used by another HLS Output, streaming from %s", self.config.folder, folder)
+        HLSOutput.claimed_folders.add(folder)
+        return folder
+
+    def claim_port(self):
+        """Returns the configured port, or the next one not used by another pipeline."""
+        port = self.config.port
+        while port in HLSOutput.claimed_ports:
+            port += 1
+        if port != self.config.port:
+            log.info("Port %d is used by another HLS Output, serving on port %d", self.config.port, port)
+        HLSOutput.claimed_ports.add(port)
+        return port
+
+    def release_claims(self):
+        HLSOutput.claimed_folders.discard(self.folder)
+        HLSOutput.claimed_ports.discard(self.port)
+        self.folder = None
+        self.port = None
+
+    def start_server(self):
+        if self.config.serve and self.bin is not None and self.server is None:
+            self.server = serve_folder(self.folder, self.config.address, self.port)
+
+    def release_output_bin(self, bin):
+        if bin is not self.bin:
+            return
+        self.bin = None
+        if self.server is not None:
+            stop_server(self.server)
+            self.server = None
+        self.release_claims()
+
+    def add_encoder(self, bin, pad_name, muxer, converters, factory, properties):
+        """Adds queue > converters > encoder to muxer, fed from a ghost pad called pad_name."""
+        elements = [gst.element_factory_make("queue")]
+        elements.extend(gst.element_factory_make(converter) for converter in converters)
+        encoder = gst.element_factory_make(factory)
+        set_encoder_properties(encoder, properties)
+        drop_gaps(encoder)
+        elements.append(encoder)
+
+        for element in elements:
+            bin.add(element)
+        gst.element_link_many(*elements)
+        encoder.link(muxer)
+        bin.add_pad(gst.GhostPad(pad_name, elements[0].get_static_pad("sink")))
+
+    def get_widget(self):
+        if self.widget is None:
+            self.widget = widget.ConfigWidget()
+
+        return self.widget
+
+    def get_video_quality_layout(self):
+        """Returns a layout with the video quality config widgets for configtool to use."""
+        return self.get_widget().get_video_quality_layout()
+
+    def get_audio_quality_layout(self):
+        """Returns a layout with the audio quality config widgets for configtool to use."""
+        return self.get_widget().get_audio_quality_layout()
+
+    def __enable_connections(self):
+        self.widget.connect(self.widget.lineedit_folder, SIGNAL('editingFinished()'), self.set_folder)
+        self.widget.connect(self.widget.checkbox_serve, SIGNAL('stateChanged(int)'), self.set_serve)
+        self.widget.connect(self.widget.lineedit_address, SIGNAL('editingFinished()'), self.set_address)
+        self.widget.connect(self.widget.spinbox_port, SIGNAL('valueChanged(int)'), self.set_port)
+        self.widget.connect(self.widget.spinbox_segment_duration, SIGNAL('valueChanged(int)'),
+                            self.set_segment_duration)
+        self.widget.connect(self.widget.spinbox_playlist_length, SIGNAL('valueChanged(int)'),
+                            self.set_playlist_length)
+        self.widget.connect(self.widget.spinbox_audio_quality, SIGNAL('valueChanged(int)'), self.audio_bitrate_changed)
+        self.widget.connect(self.widget.spinbox_video_quality, SIGNAL('valueChanged(int)'), self.video_bitrate_changed)
+        self.widget.connect(self.widget.combobox_preset, SIGNAL('currentIndexChanged(int)'), self.set_preset)
+
+    def widget_load_config(self, plugman):
+        self.get_config()
+
+        self.widget.lineedit_folder.setText(self.config.folder)
+        self.widget.checkbox_serve.setChecked(self.config.serve)
+        self.widget.lineedit_address.setText(self.config.address)
+        self.widget.spinbox_port.setValue(self.config.port)
+        self.widget.spinbox_segment_duration.setValue(self.config.segment_duration)
+        self.widget.spinbox_playlist_length.setValue(self.config.playlist_length)
+        self.widget.spinbox_audio_quality.setValue(self.config.audio_bitrate)
+        self.widget.spinbox_video_quality.setValue(self.config.video_bitrate)
+        self.widget.combobox_preset.setCurrentIndex(PRESETS.index(self.config.preset))
+
+        # Finally enable connections
+        self.__enable_connections()
+
+    def set_folder(self):
+        self.config.folder = unicode(self.widget.lineedit_folder.text())
+        self.config.save()
+
+    def set_serve(self, state):
+        self.config.serve = bool(state)
+        self.config.save()
+
+    def set_address(self):
+        self.config.address = str(self.widget.lineedit_address.text()).strip()
+        self.config.save()
+
+    def set_port(self, port):
+        self.config.port = port
+        self.config.save()
+
+    def set_segment_duration(self, duration):
+        self.config.segment_duration = duration
+        self.config.save()
+
+    def set_playlist_length(self, length):
+        self.config.playlist_length = length
+        self.config.save()
+
+    def audio_bitrate_changed(self):
+        """Called when a change to the SpinBox for audio bitrate is made"""
+        self.config.audio_bitrate = self.widget.spinbox_audio_quality.value()
+        self.config.save()
+
+    def set_audio_quality(self, quality):
+        self.get_config()
+
+        if quality == Quality.LOW:
+            self.config.audio_bitrate = int(self.AUDIO_MIN + (self.AUDIO_RANGE * Quality.LOW_AUDIO_FACTOR))
+        elif quality == Quality.MEDIUM:
+            self.config.audio_bitrate = int(self.AUDIO_MIN + (self.AUDIO_RANGE * Quality.MEDIUM_AUDIO_FACTOR))
+        elif quality == Quality.HIGH:
+            self.config.audio_bitrate = int(self.AUDIO_MIN + (self.AUDIO_RANGE * Quality.HIGH_AUDIO_FACTOR))
+
+        if self.widget_config_loaded:
+            self.widget.spinbox_audio_quality.setValue(self.config.audio_bitrate)
+
+        self.config.save()
+
+    def video_bitrate_changed(self):
+        """Called when a change to the SpinBox for video bitrate is made"""
+        self.config.video_bitrate = self.widget.spinbox_video_quality.value()
+        self.config.save()
+
+    def set_video_bitrate(self, bitrate):
+        self.get_config()
+
+        if self.widget_config_loaded:
+            self.widget.spinbox_video_quality.setValue(bitrate)
+
+        self.config.video_bitrate = bitrate
+        self.config.save()
+
+    def set_preset(self, index):
+        self.config.preset = PRESETS[index]
+        self.config.save()
+
+    ###
+    ### Translations
+    ###
+    def retranslate(self):
+        self.widget.label_folder.setText(self.gui.app.translate('plugin-hls-output', 'Folder'))
+        self.widget.label_serve.setText(self.gui.app.translate('plugin-hls-output', 'Serve over HTTP'))
+        self.widget.label_address.setText(self.gui.app.translate('plugin-hls-output', 'Address'))
+        self.widget.label_address.setToolTip(
+            self.gui.app.translate('plugin-hls-output', 'Address to serve on, empty for every interface'))
+        self.widget.label_port.setText(self.gui.app.translate('plugin-hls-output', 'Port'))
+        self.widget.label_segment_duration.setText(
+            self.gui.app.translate('plugin-hls-output', 'Segment Duration (s)'))
+        self.widget.label_playlist_length.setText(self.gui.app.translate('plugin-hls-output', 'Playlist Segments'))
+        self.widget.label_audio_quality.setText(self.gui.app.translate('plugin-hls-output', 'Audio Bitrate (kb/s)'))
+        self.widget.label_video_quality.setText(self.gui.app.translate('plugin-hls-output', 'Video Bitrate (kb/s)'))
+        self.widget.label_preset.setText(self.gui.app.translate('plugin-hls-output', 'Encoder Preset'))
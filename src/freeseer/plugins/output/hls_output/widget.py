@@ -0,0 +1,125 @@
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://github.com/Freeseer/freeseer/
+
+
+'''
+HLS Output
+----------
+
+Configuration widget for the HLS Output.
+
+@author: Free and Open Source Software Learning Centre
+'''
+
+from PyQt4.QtGui import QCheckBox
+from PyQt4.QtGui import QComboBox
+from PyQt4.QtGui import QFormLayout
+from PyQt4.QtGui import QHBoxLayout
+from PyQt4.QtGui import QLabel
+from PyQt4.QtGui import QLineEdit
+from PyQt4.QtGui import QSpinBox
+from PyQt4.QtGui import QWidget
+
+
+class ConfigWidget(QWidget):
+
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent)
+
+        layout = QFormLayout()
+        self.setLayout(layout)
+
+        self.label_folder = QLabel("Folder")
+        self.lineedit_folder = QLineEdit()
+        layout.addRow(self.label_folder, self.lineedit_folder)
+
+        self.label_serve = QLabel("Serve over HTTP")
+        self.checkbox_serve = QCheckBox()
+        layout.addRow(self.label_serve, self.checkbox_serve)
+
+        self.label_address = QLabel("Address")
+        self.label_address.setToolTip("Address to serve on, empty for every interface")
+        self.lineedit_address = QLineEdit()
+        layout.addRow(self.label_address, self.lineedit_address)
+
+        self.label_port = QLabel("Port")
+        self.spinbox_port = QSpinBox()
+        self.spinbox_port.setMinimum(1)
+        self.spinbox_port.setMaximum(65535)
+        self.spinbox_port.setValue(8088)                    # Default value 8088
+        layout.addRow(self.label_port, self.spinbox_port)
+
+        #
+        # Segments
+        #
+
+        self.label_segment_duration = QLabel("Segment Duration (s)")
+        self.spinbox_segment_duration = QSpinBox()
+        self.spinbox_segment_duration.setMinimum(1)
+        self.spinbox_segment_duration.setMaximum(10)
+        self.spinbox_segment_duration.setValue(2)           # Default value 2
+        layout.addRow(self.label_segment_duration, self.spinbox_segment_duration)
+
+        self.label_playlist_length = QLabel("Playlist Segments")
+        self.spinbox_playlist_length = QSpinBox()
+        self.spinbox_playlist_length.setMinimum(1)
+        self.spinbox_playlist_length.setMaximum(60)
+        self.spinbox_playlist_length.setValue(5)            # Default value 5
+        layout.addRow(self.label_playlist_length, self.spinbox_playlist_length)
+
+        self.label_preset = QLabel("Encoder Preset")
+        self.combobox_preset = QComboBox()
+        self.combobox_preset.addItems(["Realtime", "Balanced", "Archival"])
+        layout.addRow(self.label_preset, self.combobox_preset)
+
+        #
+        # Audio Quality
+        #
+
+        self.label_audio_quality = QLabel("Audio Bitrate (kb/s)")
+        self.spinbox_audio_quality = QSpinBox()
+        self.spinbox_audio_quality.setMinimum(8)
+        self.spinbox_audio_quality.setMaximum(320)
+        self.spinbox_audio_quality.setValue(96)             # Default value 96
+
+        #
+        # Video Quality
+        #
+
+        self.label_video_quality = QLabel("Video Bitrate (kb/s)")
+        self.spinbox_video_quality = QSpinBox()
+        self.spinbox_video_quality.setMinimum(0)
+        self.spinbox_video_quality.setMaximum(16777215)
+        self.spinbox_video_quality.setValue(1200)           # Default value 1200
+
+    def get_video_quality_layout(self):
+        layout_video_quality = QHBoxLayout()
+        layout_video_quality.addWidget(self.label_video_quality)
+        layout_video_quality.addWidget(self.spinbox_video_quality)
+
+        return layout_video_quality
+
+    def get_audio_quality_layout(self):
+        layout_audio_quality = QHBoxLayout()
+        layout_audio_quality.addWidget(self.label_audio_quality)
+        layout_audio_quality.addWidget(self.spinbox_audio_quality)
+
+        return layout_audio_quality
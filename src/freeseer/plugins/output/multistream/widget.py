@@ -0,0 +1,91 @@
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://github.com/Freeseer/freeseer/
+
+
+'''
+Multi Stream
+------------
+
+Configuration widget for the Multi Stream output.
+
+@author: Free and Open Source Software Learning Centre
+'''
+
+from PyQt4.QtGui import QComboBox
+from PyQt4.QtGui import QFormLayout
+from PyQt4.QtGui import QHBoxLayout
+from PyQt4.QtGui import QLabel
+from PyQt4.QtGui import QPlainTextEdit
+from PyQt4.QtGui import QSpinBox
+from PyQt4.QtGui import QWidget
+
+
+class ConfigWidget(QWidget):
+
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent)
+
+        layout = QFormLayout()
+        self.setLayout(layout)
+
+        self.label_destinations = QLabel("Destinations")
+        self.label_destinations.setToolTip("One rtmp:// or icecast:// URL per line")
+        self.editor_destinations = QPlainTextEdit()
+        layout.addRow(self.label_destinations, self.editor_destinations)
+
+        self.label_preset = QLabel("Encoder Preset")
+        self.combobox_preset = QComboBox()
+        self.combobox_preset.addItems(["Realtime", "Balanced", "Archival"])
+        layout.addRow(self.label_preset, self.combobox_preset)
+
+        #
+        # Audio Quality
+        #
+
+        self.label_audio_quality = QLabel("Audio Bitrate (kb/s)")
+        self.spinbox_audio_quality = QSpinBox()
+        self.spinbox_audio_quality.setMinimum(8)
+        self.spinbox_audio_quality.setMaximum(320)
+        self.spinbox_audio_quality.setValue(128)            # Default value 128
+
+        #
+        # Video Quality
+        #
+
+        self.label_video_quality = QLabel("Video Bitrate (kb/s)")
+        self.spinbox_video_quality = QSpinBox()
+        self.spinbox_video_quality.setMinimum(0)
+        self.spinbox_video_quality.setMaximum(16777215)
+        self.spinbox_video_quality.setValue(2400)           # Default value 2400
+
+    def get_video_quality_layout(self):
+        layout_video_quality = QHBoxLayout()
+        layout_video_quality.addWidget(self.label_video_quality)
+        layout_video_quality.addWidget(self.spinbox_video_quality)
+
+        return layout_video_quality
+
+    def get_audio_quality_layout(self):
+        layout_audio_quality = QHBoxLayout()
+        layout_audio_quality.addWidget(self.label_audio_quality)
+        layout_audio_quality.addWidget(self.spinbox_audio_quality)
+
+        return layout_audio_quality
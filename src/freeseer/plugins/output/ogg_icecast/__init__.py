@@ -38,6 +38,7 @@ from PyQt4.QtCore import SIGNAL
 
 # Freeseer
 from freeseer.framework.multimedia import Quality
+from freeseer.framework.encoding import EncoderSpec, PRESETS, get_preset_properties
 from freeseer.framework.plugin import IOutput
 from freeseer.framework.config import Config, options
 
@@ -53,6 +54,7 @@ class OggIcecastConfig(Config):
     mount = options.StringOption("stream.ogg")
     audio_quality = options.FloatOption(0.3)
     video_bitrate = options.IntegerOption(2400)
+    preset = options.ChoiceOption(PRESETS, 'realtime')
 
 
 class OggIcecast(IOutput):
@@ -67,7 +69,19 @@ class OggIcecast(IOutput):
     AUDIO_MIN = -0.1
     AUDIO_RANGE = 1.1
 
-    def get_output_bin(self, audio=True, video=True, metadata=None):
+    def get_encoders(self, audio=True, video=True):
+        encoders = {}
+        if audio:
+            encoders['audio'] = EncoderSpec("vorbisenc", {"quality": self.config.audio_quality}, ["audioconvert"])
+        if video:
+            properties = get_preset_properties("theoraenc", self.config.preset, self.encoder_threads)
+            properties["bitrate"] = self.config.video_bitrate
+            # Static frames flagged as gaps by Video Passthrough are encoded as duplicate frames
+            properties["dup-on-gap"] = True
+            encoders['video'] = EncoderSpec("theoraenc", properties)
+        return encoders
+
+    def get_muxer_bin(self, audio=True, video=True, metadata=None):
         bin = gst.Bin()
 
         if metadata is not None:
@@ -91,13 +105,6 @@ class OggIcecast(IOutput):
             audioqueue = gst.element_factory_make("queue", "audioqueue")
             bin.add(audioqueue)
 
-            audioconvert = gst.element_factory_make("audioconvert", "audioconvert")
-            bin.add(audioconvert)
-
-            audiocodec = gst.element_factory_make("vorbisenc", "audiocodec")
-            audiocodec.set_property("quality", self.config.audio_quality)
-            bin.add(audiocodec)
-
             # Setup metadata
             vorbistag = gst.element_factory_make("vorbistag", "vorbistag")
             # set tag merge mode to GST_TAG_MERGE_REPLACE
@@ -115,9 +122,7 @@ class OggIcecast(IOutput):
             bin.add_pad(audio_ghostpad)
 
             # Link elements
-            audioqueue.link(audioconvert)
-            audioconvert.link(audiocodec)
-            audiocodec.link(vorbistag)
+            audioqueue.link(vorbistag)
             vorbistag.link(muxer)
 
         #
@@ -127,16 +132,11 @@ class OggIcecast(IOutput):
             videoqueue = gst.element_factory_make("queue", "videoqueue")
             bin.add(videoqueue)
 
-            videocodec = gst.element_factory_make("theoraenc", "videocodec")
-            videocodec.set_property("bitrate", self.config.video_bitrate)
-            bin.add(videocodec)
-
             videopad = videoqueue.get_pad("sink")
             video_ghostpad = gst.GhostPad("videosink", videopad)
             bin.add_pad(video_ghostpad)
 
-            videoqueue.link(videocodec)
-            videocodec.link(muxer)
+            videoqueue.link(muxer)
 
         #
         # Link muxer to icecast
@@ -180,6 +180,7 @@ class OggIcecast(IOutput):
         self.widget.connect(self.widget.lineedit_mount, SIGNAL('editingFinished()'), self.set_mount)
         self.widget.connect(self.widget.spinbox_audio_quality, SIGNAL('valueChanged(double)'), self.audio_quality_changed)
         self.widget.connect(self.widget.spinbox_video_quality, SIGNAL('valueChanged(int)'), self.video_bitrate_changed)
+        self.widget.connect(self.widget.combobox_preset, SIGNAL('currentIndexChanged(int)'), self.set_preset)
 
     def widget_load_config(self, plugman):
         self.get_config()
@@ -188,6 +189,7 @@ class OggIcecast(IOutput):
         self.widget.spinbox_port.setValue(self.config.port)
         self.widget.lineedit_password.setText(self.config.password)
         self.widget.lineedit_mount.setText(self.config.mount)
+        self.widget.combobox_preset.setCurrentIndex(PRESETS.index(self.config.preset))
 
         # Finally enable connections
         self.__enable_connections()
@@ -228,6 +230,10 @@ class OggIcecast(IOutput):
 
         self.config.save()
 
+    def set_preset(self, index):
+        self.config.preset = PRESETS[index]
+        self.config.save()
+
     def video_bitrate_changed(self):
         """Called when a change to the SpinBox for video bitrate is made"""
         self.config.video_bitrate = self.widget.spinbox_video_quality.value()
@@ -250,3 +256,5 @@ class OggIcecast(IOutput):
         self.widget.label_port.setText(self.gui.app.translate('plugin-icecast', 'Port'))
         self.widget.label_password.setText(self.gui.app.translate('plugin-icecast', 'Password'))
         self.widget.label_mount.setText(self.gui.app.translate('plugin-icecast', 'Mount'))
+        self.widget.label_preset.setText(self.gui.app.translate('plugin-icecast', 'Encoder Preset'))
+        self.widget.label_preset.setToolTip(self.gui.app.translate('plugin-icecast', 'Faster presets use less CPU, slower ones make smaller files'))
@@ -26,6 +26,7 @@ http://wiki.github.com/Freeseer/freeseer/
 @author: Thanh Ha
 '''
 
+from PyQt4.QtGui import QComboBox
 from PyQt4.QtGui import QDoubleSpinBox
 from PyQt4.QtGui import QFormLayout
 from PyQt4.QtGui import QHBoxLayout
@@ -61,6 +62,15 @@ class ConfigWidget(QWidget):
         self.lineedit_mount = QLineEdit()
         layout.addRow(self.label_mount, self.lineedit_mount)
 
+        #
+        # Encoder Preset
+        #
+        self.label_preset = QLabel("Encoder Preset")
+        self.label_preset.setToolTip("Faster presets use less CPU, slower ones make smaller files")
+        self.combobox_preset = QComboBox()
+        self.combobox_preset.addItems(["Realtime", "Balanced", "Archival"])
+        layout.addRow(self.label_preset, self.combobox_preset)
+
         #
         # Audio Quality
         #
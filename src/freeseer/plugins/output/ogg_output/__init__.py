@@ -39,6 +39,7 @@ from PyQt4.QtCore import SIGNAL
 
 # Freeeseer
 from freeseer.framework.multimedia import Quality
+from freeseer.framework.encoding import EncoderSpec, PRESETS, get_preset_properties
 from freeseer.framework.plugin import IOutput
 from freeseer.framework.config import Config, options
 
@@ -51,6 +52,7 @@ class OggOutputConfig(Config):
     matterhorn = options.IntegerOption(0)
     audio_quality = options.FloatOption(0.3)
     video_bitrate = options.IntegerOption(2400)
+    preset = options.ChoiceOption(PRESETS, 'realtime')
 
 
 class OggOutput(IOutput):
@@ -65,7 +67,19 @@ class OggOutput(IOutput):
     AUDIO_MIN = -0.1
     AUDIO_RANGE = 1.1
 
-    def get_output_bin(self, audio=True, video=True, metadata=None):
+    def get_encoders(self, audio=True, video=True):
+        encoders = {}
+        if audio:
+            encoders['audio'] = EncoderSpec("vorbisenc", {"quality": self.config.audio_quality}, ["audioconvert"])
+        if video:
+            properties = get_preset_properties("theoraenc", self.config.preset, self.encoder_threads)
+            properties["bitrate"] = self.config.video_bitrate
+            # Static frames flagged as gaps by Video Passthrough are encoded as duplicate frames
+            properties["dup-on-gap"] = True
+            encoders['video'] = EncoderSpec("theoraenc", properties)
+        return encoders
+
+    def get_muxer_bin(self, audio=True, video=True, metadata=None):
         bin = gst.Bin()
 
         if metadata is not None:
@@ -89,17 +103,6 @@ class OggOutput(IOutput):
             audioqueue = gst.element_factory_make("queue", "audioqueue")
             bin.add(audioqueue)
 
-            audioconvert = gst.element_factory_make("audioconvert", "audioconvert")
-            bin.add(audioconvert)
-
-            audiolevel = gst.element_factory_make('level', 'audiolevel')
-            audiolevel.set_property('interval', 20000000)
-            bin.add(audiolevel)
-
-            audiocodec = gst.element_factory_make("vorbisenc", "audiocodec")
-            audiocodec.set_property("quality", self.config.audio_quality)
-            bin.add(audiocodec)
-
             # Setup metadata
             vorbistag = gst.element_factory_make("vorbistag", "vorbistag")
             # set tag merge mode to GST_TAG_MERGE_REPLACE
@@ -117,10 +120,7 @@ class OggOutput(IOutput):
             bin.add_pad(audio_ghostpad)
 
             # Link Elements
-            audioqueue.link(audioconvert)
-            audioconvert.link(audiolevel)
-            audiolevel.link(audiocodec)
-            audiocodec.link(vorbistag)
+            audioqueue.link(vorbistag)
             vorbistag.link(muxer)
 
         #
@@ -130,18 +130,13 @@ class OggOutput(IOutput):
             videoqueue = gst.element_factory_make("queue", "videoqueue")
             bin.add(videoqueue)
 
-            videocodec = gst.element_factory_make("theoraenc", "videocodec")
-            videocodec.set_property("bitrate", self.config.video_bitrate)
-            bin.add(videocodec)
-
             # Setup ghost pads
             videopad = videoqueue.get_pad("sink")
             video_ghostpad = gst.GhostPad("videosink", videopad)
             bin.add_pad(video_ghostpad)
 
             # Link Elements
-            videoqueue.link(videocodec)
-            videocodec.link(muxer)
+            videoqueue.link(muxer)
 
         #
         # Link muxer to filesink
@@ -181,6 +176,7 @@ class OggOutput(IOutput):
     def __enable_connections(self):
         self.widget.connect(self.widget.spinbox_audio_quality, SIGNAL('valueChanged(double)'), self.audio_quality_changed)
         self.widget.connect(self.widget.spinbox_video_quality, SIGNAL('valueChanged(int)'), self.video_bitrate_changed)
+        self.widget.connect(self.widget.combobox_preset, SIGNAL('currentIndexChanged(int)'), self.set_preset)
         self.widget.connect(self.widget.checkbox_matterhorn, SIGNAL('stateChanged(int)'), self.set_matterhorn)
 
     def widget_load_config(self, plugman):
@@ -189,6 +185,7 @@ class OggOutput(IOutput):
         self.widget.spinbox_audio_quality.setValue(self.config.audio_quality)
         self.widget.spinbox_video_quality.setValue(self.config.video_bitrate)
         self.widget.checkbox_matterhorn.setCheckState(self.config.matterhorn)
+        self.widget.combobox_preset.setCurrentIndex(PRESETS.index(self.config.preset))
 
         # Finally enable connections
         self.__enable_connections()
@@ -213,6 +210,10 @@ class OggOutput(IOutput):
 
         self.config.save()
 
+    def set_preset(self, index):
+        self.config.preset = PRESETS[index]
+        self.config.save()
+
     def video_bitrate_changed(self):
         """Called when a change to the SpinBox for video bitrate is made"""
         self.config.video_bitrate = self.widget.spinbox_video_quality.value()
@@ -245,3 +246,5 @@ class OggOutput(IOutput):
         self.widget.label_video_quality.setText(self.gui.app.translate('plugin-ogg-output', 'Video Quality (kb/s)'))
         self.widget.label_matterhorn.setText(self.gui.app.translate('plugin-ogg-output', 'Matterhorn Metadata'))
         self.widget.label_matterhorn.setToolTip(self.gui.app.translate('plugin-ogg-output', 'Generates Matterhorn Metadata in XML format'))
+        self.widget.label_preset.setText(self.gui.app.translate('plugin-ogg-output', 'Encoder Preset'))
+        self.widget.label_preset.setToolTip(self.gui.app.translate('plugin-ogg-output', 'Faster presets use less CPU, slower ones make smaller files'))
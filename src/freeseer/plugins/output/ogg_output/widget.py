@@ -27,6 +27,7 @@ http://wiki.github.com/Freeseer/freeseer/
 '''
 
 from PyQt4.QtGui import QCheckBox
+from PyQt4.QtGui import QComboBox
 from PyQt4.QtGui import QDoubleSpinBox
 from PyQt4.QtGui import QFormLayout
 from PyQt4.QtGui import QHBoxLayout
@@ -73,6 +74,15 @@ class ConfigWidget(QWidget):
         self.checkbox_matterhorn = QCheckBox()
         layout.addRow(self.label_matterhorn, self.checkbox_matterhorn)
 
+        #
+        # Encoder Preset
+        #
+        self.label_preset = QLabel("Encoder Preset")
+        self.label_preset.setToolTip("Faster presets use less CPU, slower ones make smaller files")
+        self.combobox_preset = QComboBox()
+        self.combobox_preset.addItems(["Realtime", "Balanced", "Archival"])
+        layout.addRow(self.label_preset, self.combobox_preset)
+
     def get_video_quality_layout(self):
         layout_video_quality = QHBoxLayout()
         layout_video_quality.addWidget(self.label_video_quality)
@@ -48,7 +48,7 @@ class RawOutput(IOutput):
         """Returns a bin that muxes audio and video inputs into a raw AVI file
 
         Pipeline:
-            audio_input > queue > audioconvert > audiolevel > avimux
+            audio_input > queue > audioconvert > avimux
             video_input > queue > avimux
             avimux > filesink
         """
@@ -73,10 +73,6 @@ class RawOutput(IOutput):
             audioconvert = gst.element_factory_make("audioconvert", "audioconvert")
             bin.add(audioconvert)
 
-            audiolevel = gst.element_factory_make('level', 'audiolevel')
-            audiolevel.set_property('interval', 20000000)
-            bin.add(audiolevel)
-
             # Setup ghost pads
             audiopad = audioqueue.get_pad("sink")
             audio_ghostpad = gst.GhostPad("audiosink", audiopad)
@@ -84,8 +80,7 @@ class RawOutput(IOutput):
 
             # Link Elements
             audioqueue.link(audioconvert)
-            audioconvert.link(audiolevel)
-            audiolevel.link(muxer)
+            audioconvert.link(muxer)
 
         #
         # Setup Video Pipeline
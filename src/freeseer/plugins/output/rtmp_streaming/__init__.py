@@ -36,8 +36,9 @@ To enable streaming
 4. Click the "Setup" button to access more options
 5. Specify the "Stream URL" (the location you'll be streaming to)
 
-.. note:: All outputs must be set to "leaky mode".
-          Go to "Plugins" > "Output" > "Video Preview" > "Leaky Queue".
+.. note:: Stream outputs are fed through a leaky queue by default, so a slow
+          connection drops stream buffers instead of stalling the recording.
+          This is set by the "record_to_stream_policy" option.
 
 Justin.tv
 *********
@@ -92,6 +93,7 @@ import gst
 from PyQt4 import QtGui, QtCore
 
 # Freeseer libs
+from freeseer.framework.encoding import PRESETS, drop_gaps, get_preset_properties, set_encoder_properties
 from freeseer.framework.multimedia import Quality
 from freeseer.framework.plugin import IOutput
 from freeseer.framework.plugin import PluginError
@@ -133,6 +135,7 @@ class RTMPOutputConfig(Config):
     audio_quality = options.IntegerOption(3)
     video_bitrate = options.IntegerOption(2400)
     video_tune = options.ChoiceOption(TUNE_VALUES, 'none')
+    preset = options.ChoiceOption(PRESETS, 'realtime')
     audio_codec = options.ChoiceOption(AUDIO_CODEC_VALUES, 'lame')
     streaming_destination = options.ChoiceOption(STREAMING_DESTINATION_VALUES, 'custom')
     streaming_key = options.StringOption('')
@@ -154,6 +157,7 @@ class RTMPOutput(IOutput):
     load_config_delegate = None
     CONFIG_CLASS = RTMPOutputConfig
     configurable = True
+    own_video_encoder = True
     LAME_AUDIO_MIN = 0
     LAME_AUDIO_RANGE = 9.999
     FAAC_AUDIO_MIN = 1
@@ -201,10 +205,6 @@ class RTMPOutput(IOutput):
             audioconvert = gst.element_factory_make("audioconvert", "audioconvert")
             bin.add(audioconvert)
 
-            audiolevel = gst.element_factory_make('level', 'audiolevel')
-            audiolevel.set_property('interval', 20000000)
-            bin.add(audiolevel)
-
             audiocodec = gst.element_factory_make(self.config.audio_codec, "audiocodec")
 
             if 'quality' in audiocodec.get_property_names():
@@ -221,8 +221,7 @@ class RTMPOutput(IOutput):
 
             # Link Elements
             audioqueue.link(audioconvert)
-            audioconvert.link(audiolevel)
-            audiolevel.link(audiocodec)
+            audioconvert.link(audiocodec)
             audiocodec.link(muxer)
 
         #
@@ -233,6 +232,9 @@ class RTMPOutput(IOutput):
             bin.add(videoqueue)
 
             videocodec = gst.element_factory_make("x264enc", "videocodec")
+            set_encoder_properties(videocodec, get_preset_properties("x264enc", self.config.preset,
+                                                                     self.encoder_threads))
+            drop_gaps(videocodec)
             videocodec.set_property("bitrate", self.config.video_bitrate)
             if self.config.video_tune != 'none':
                 videocodec.set_property('tune', self.config.video_tune)
@@ -356,11 +358,20 @@ class RTMPOutput(IOutput):
                                             self.set_video_tune)
 
         #
-        # Note
+        # Encoder Preset
         #
 
-        self.label_note = QtGui.QLabel(self.gui.uiTranslator.translate('rtmp', "*For RTMP streaming, all other outputs must be set to leaky"))
-        self.stream_settings_widget_layout.addRow(self.label_note)
+        self.label_preset = QtGui.QLabel("Encoder Preset")
+        self.combobox_preset = QtGui.QComboBox()
+        # Same order as PRESETS
+        self.combobox_preset.addItems([self.gui.uiTranslator.translate('rtmp', "Realtime"),
+                                       self.gui.uiTranslator.translate('rtmp', "Balanced"),
+                                       self.gui.uiTranslator.translate('rtmp', "Archival")])
+        self.stream_settings_widget_layout.addRow(self.label_preset, self.combobox_preset)
+
+        self.stream_settings_widget.connect(self.combobox_preset,
+                                            QtCore.SIGNAL('currentIndexChanged(int)'),
+                                            self.set_preset)
 
         return self.stream_settings_widget
 
@@ -527,6 +538,7 @@ class RTMPOutput(IOutput):
         self.spinbox_audio_quality.setEnabled(True)
         self.spinbox_video_quality.setEnabled(True)
         self.combobox_video_tune.setEnabled(True)
+        self.combobox_preset.setEnabled(True)
         self.combobox_audio_codec.setEnabled(True)
 
     def stream_settings_load_config(self):
@@ -538,6 +550,8 @@ class RTMPOutput(IOutput):
         tuneIndex = self.combobox_video_tune.findText(self.config.video_tune)
         self.combobox_video_tune.setCurrentIndex(tuneIndex)
 
+        self.combobox_preset.setCurrentIndex(PRESETS.index(self.config.preset))
+
         acIndex = self.combobox_audio_codec.findText(self.config.audio_codec)
         self.combobox_audio_codec.setCurrentIndex(acIndex)
 
@@ -590,6 +604,10 @@ class RTMPOutput(IOutput):
         self.config.video_tune = tune
         self.config.save()
 
+    def set_preset(self, index):
+        self.config.preset = PRESETS[index]
+        self.config.save()
+
     def set_audio_codec(self, codec):
         self.config.audio_codec = codec
         self.config.save()
@@ -35,9 +35,16 @@ pygst.require("0.10")
 import gst
 
 # Freeseer
+from freeseer.framework.config import Config, options
+from freeseer.framework.encoding import EncoderSpec, PRESETS, get_preset_properties
 from freeseer.framework.plugin import IOutput
 
 
+class WebMOutputConfig(Config):
+    """Configuration class for WebMOutput plugin."""
+    preset = options.ChoiceOption(PRESETS, 'realtime')
+
+
 class WebMOutput(IOutput):
     name = "WebM Output"
     os = ["linux", "linux2", "win32", "cygwin"]
@@ -45,8 +52,18 @@ class WebMOutput(IOutput):
     recordto = IOutput.FILE
     extension = "webm"
     tags = None
+    CONFIG_CLASS = WebMOutputConfig
+
+    def get_encoders(self, audio=True, video=True):
+        encoders = {}
+        if audio:
+            encoders['audio'] = EncoderSpec("vorbisenc", converters=["audioconvert"])
+        if video:
+            encoders['video'] = EncoderSpec("vp8enc", get_preset_properties("vp8enc", self.config.preset,
+                                                                            self.encoder_threads))
+        return encoders
 
-    def get_output_bin(self, audio=True, video=True, metadata=None):
+    def get_muxer_bin(self, audio=True, video=True, metadata=None):
         bin = gst.Bin()
 
         if metadata is not None:
@@ -67,16 +84,6 @@ class WebMOutput(IOutput):
             audioqueue = gst.element_factory_make("queue", "audioqueue")
             bin.add(audioqueue)
 
-            audioconvert = gst.element_factory_make("audioconvert", "audioconvert")
-            bin.add(audioconvert)
-
-            audiolevel = gst.element_factory_make('level', 'audiolevel')
-            audiolevel.set_property('interval', 20000000)
-            bin.add(audiolevel)
-
-            audiocodec = gst.element_factory_make("vorbisenc", "audiocodec")
-            bin.add(audiocodec)
-
             # Setup metadata
             vorbistag = gst.element_factory_make("vorbistag", "vorbistag")
             # set tag merge mode to GST_TAG_MERGE_REPLACE
@@ -94,10 +101,7 @@ class WebMOutput(IOutput):
             bin.add_pad(audio_ghostpad)
 
             # Link Elements
-            audioqueue.link(audioconvert)
-            audioconvert.link(audiolevel)
-            audiolevel.link(audiocodec)
-            audiocodec.link(vorbistag)
+            audioqueue.link(vorbistag)
             vorbistag.link(muxer)
 
         #
@@ -107,16 +111,12 @@ class WebMOutput(IOutput):
             videoqueue = gst.element_factory_make("queue", "videoqueue")
             bin.add(videoqueue)
 
-            videocodec = gst.element_factory_make("vp8enc", "videocodec")
-            bin.add(videocodec)
-
             videopad = videoqueue.get_pad("sink")
             video_ghostpad = gst.GhostPad("videosink", videopad)
             bin.add_pad(video_ghostpad)
 
             # Link Elements
-            videoqueue.link(videocodec)
-            videocodec.link(muxer)
+            videoqueue.link(muxer)
 
         #
         # Link muxer to filesink
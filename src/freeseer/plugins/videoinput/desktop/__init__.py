@@ -44,6 +44,7 @@ from PyQt4.QtGui import QDesktopWidget
 from freeseer.framework.plugin import IVideoInput
 from freeseer.framework.area_selector import AreaSelector
 from freeseer.framework.config import Config, options
+from freeseer.framework.framefilter import ChangeDetector
 
 # .freeseer-plugin custom modules
 import widget
@@ -58,6 +59,12 @@ class DesktopLinuxSrcConfig(Config):
     desktop = options.StringOption("Full")
     screen = options.IntegerOption(0)
     window = options.StringOption("")
+    use_damage = options.BooleanOption(True)
+
+    # Only capture and convert frames that changed, repeating the last one otherwise
+    skip_unchanged = options.BooleanOption(False)
+    # Blocks of each frame compared rather than the whole frame, 0 compares whole frames
+    skip_unchanged_blocks = options.IntegerOption(64)
 
     # Area Select
     start_x = options.IntegerOption(0)
@@ -70,6 +77,9 @@ class DesktopLinuxSrc(IVideoInput):
     name = "Desktop Source"
     os = ["linux", "linux2", "win32", "cygwin"]
     CONFIG_CLASS = DesktopLinuxSrcConfig
+    change_detector = None
+    # Desktop size assumed for the bitrate when it can't be found out
+    DEFAULT_RESOLUTION = (1280, 720)
 
     def get_videoinput_bin(self):
         """
@@ -81,6 +91,8 @@ class DesktopLinuxSrc(IVideoInput):
 
         if sys.platform.startswith("linux"):
             videosrc = gst.element_factory_make("ximagesrc", "videosrc")
+            # Only copy the regions X reports as damaged
+            videosrc.set_property("use-damage", self.config.use_damage)
 
             # Configure coordinates if we're not recording full desktop
             if self.config.desktop == "Area":
@@ -94,6 +106,17 @@ class DesktopLinuxSrc(IVideoInput):
                           self.config.end_x,
                           self.config.end_y)
 
+            # Full desktop only covers the selected screen of a multi-monitor desktop
+            if self.config.desktop == "Full":
+                geometry = self.get_screen_geometry()
+                if geometry is not None:
+                    x, y, width, height = geometry
+                    videosrc.set_property("startx", x)
+                    videosrc.set_property("starty", y)
+                    videosrc.set_property("endx", x + width - 1)
+                    videosrc.set_property("endy", y + height - 1)
+                    log.debug('Recording screen %s: %sx%s at %sx%s', self.config.screen, width, height, x, y)
+
             if self.config.desktop == "Window":
                 videosrc.set_property("xname", self.config.window)
 
@@ -117,9 +140,21 @@ class DesktopLinuxSrc(IVideoInput):
         colorspace = gst.element_factory_make("ffmpegcolorspace", "colorspace")
         bin.add(colorspace)
         videosrc.link(colorspace)
+        srcelement = colorspace
+
+        if self.config.skip_unchanged:
+            # Unchanged frames are dropped before conversion and the last
+            # converted frame is repeated by videorate in their place
+            self.change_detector = ChangeDetector(blocks=self.config.skip_unchanged_blocks)
+            self.change_detector.attach(videosrc.get_pad("src"))
+
+            videorate = gst.element_factory_make("videorate", "videorate")
+            bin.add(videorate)
+            colorspace.link(videorate)
+            srcelement = videorate
 
         # Setup ghost pad
-        pad = colorspace.get_pad("src")
+        pad = srcelement.get_pad("src")
         ghostpad = gst.GhostPad("videosrc", pad)
         bin.add_pad(ghostpad)
 
@@ -169,13 +204,72 @@ class DesktopLinuxSrc(IVideoInput):
 
         return self.widget
 
+    def get_screen_geometry(self):
+        """Returns the (x, y, width, height) of the configured screen, or None if it can't be found.
+
+        Needs a running QApplication to query the screens; without one (e.g.
+        recording from the command line) the whole desktop is recorded.
+        """
+        app = QApplication.instance()
+        if app is None:
+            return None
+
+        desktop = app.desktop()
+        screen = self.config.screen
+        if not 0 <= screen < desktop.screenCount():
+            log.warning("Screen %s not found, recording the primary screen.", screen)
+            screen = desktop.primaryScreen()
+
+        rect = desktop.screenGeometry(screen)
+        return rect.x(), rect.y(), rect.width(), rect.height()
+
+    def get_capture_size(self):
+        """Returns the (width, height) of the whole desktop as captured by the source element, or None.
+
+        Used without a QApplication, when the screens can't be queried.
+        """
+        if sys.platform.startswith("linux"):
+            factory = "ximagesrc"
+        elif sys.platform in ["win32", "cygwin"]:
+            factory = "dx9screencapsrc"
+        else:
+            return None
+
+        try:
+            videosrc = gst.element_factory_make(factory)
+        except gst.ElementNotFoundError:
+            return None
+
+        # The source only knows the size of the root window once it has opened the display
+        videosrc.set_state(gst.STATE_PAUSED)
+        caps = videosrc.get_pad("src").get_caps()
+        videosrc.set_state(gst.STATE_NULL)
+
+        if caps.is_empty() or caps.is_any():
+            return None
+        structure = caps[0]
+        if not (structure.has_field("width") and structure.has_field("height")):
+            return None
+        width, height = structure["width"], structure["height"]
+        if not (isinstance(width, int) and isinstance(height, int)):
+            return None
+        return width, height
+
     def get_resolution_pixels(self):
         self.get_config()
 
         if self.config.desktop == "Full":
-            app = QApplication.instance()
-            screen_rect = app.desktop().screenGeometry()
-            return screen_rect.width() * screen_rect.height()
+            geometry = self.get_screen_geometry()
+            if geometry is not None:
+                x, y, width, height = geometry
+                return width * height
+
+            size = self.get_capture_size()
+            if size is None:
+                log.warning("Failed to find the desktop size, assuming %sx%s.", *self.DEFAULT_RESOLUTION)
+                size = self.DEFAULT_RESOLUTION
+            width, height = size
+            return width * height
         elif self.config.desktop == "Area":
             width = self.config.end_x - self.config.start_x
             height = self.config.end_y - self.config.start_y
@@ -186,6 +280,8 @@ class DesktopLinuxSrc(IVideoInput):
         self.widget.connect(self.widget.areaButton, SIGNAL('clicked()'), self.set_desktop_area)
         self.widget.connect(self.widget.setAreaButton, SIGNAL('clicked()'), self.area_select)
         self.widget.connect(self.widget.screenSpinBox, SIGNAL('valueChanged(int)'), self.set_screen)
+        self.widget.connect(self.widget.skipUnchangedCheckBox, SIGNAL('toggled(bool)'), self.set_skip_unchanged)
+        self.widget.connect(self.widget.skipBlocksSpinBox, SIGNAL('valueChanged(int)'), self.set_skip_unchanged_blocks)
 
     def widget_load_config(self, plugman):
         self.get_config()
@@ -203,6 +299,9 @@ class DesktopLinuxSrc(IVideoInput):
         self.widget.regionLabel.setText("{}x{} to {}x{}".format(
             self.config.start_x, self.config.start_y, self.config.end_x, self.config.end_y))
 
+        self.widget.skipUnchangedCheckBox.setChecked(bool(self.config.skip_unchanged))
+        self.widget.skipBlocksSpinBox.setValue(self.config.skip_unchanged_blocks)
+
         # Finally enable connections
         self.__enable_connections()
 
@@ -210,6 +309,14 @@ class DesktopLinuxSrc(IVideoInput):
         self.config.screen = screen
         self.config.save()
 
+    def set_skip_unchanged(self, checked):
+        self.config.skip_unchanged = checked
+        self.config.save()
+
+    def set_skip_unchanged_blocks(self, blocks):
+        self.config.skip_unchanged_blocks = blocks
+        self.config.save()
+
     def set_desktop_full(self):
         self.config.desktop = "Full"
         self.config.save()
@@ -227,3 +334,9 @@ class DesktopLinuxSrc(IVideoInput):
         self.widget.desktopLabel.setText(self.gui.app.translate('plugin-desktop', 'Record Desktop'))
         self.widget.areaLabel.setText(self.gui.app.translate('plugin-desktop', 'Record Region'))
         self.widget.screenLabel.setText(self.gui.app.translate('plugin-desktop', 'Screen'))
+        self.widget.skipUnchangedCheckBox.setText(self.gui.app.translate('plugin-desktop', 'Skip unchanged frames'))
+        self.widget.skipUnchangedCheckBox.setToolTip(
+            self.gui.app.translate('plugin-desktop', 'Saves CPU on slides by only converting frames that changed'))
+        self.widget.skipBlocksLabel.setText(self.gui.app.translate('plugin-desktop', 'Sampled Blocks'))
+        self.widget.skipBlocksLabel.setToolTip(
+            self.gui.app.translate('plugin-desktop', 'Blocks of each frame compared to find changes, 0 compares whole frames'))
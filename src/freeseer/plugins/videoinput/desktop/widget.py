@@ -26,6 +26,7 @@ http://wiki.github.com/Freeseer/freeseer/
 @author: Thanh Ha
 '''
 
+from PyQt4.QtGui import QCheckBox
 from PyQt4.QtGui import QFormLayout
 from PyQt4.QtGui import QHBoxLayout
 from PyQt4.QtGui import QLabel
@@ -64,3 +65,13 @@ class ConfigWidget(QWidget):
         self.screenLabel = QLabel("Screen")
         self.screenSpinBox = QSpinBox()
         layout.addRow(self.screenLabel, self.screenSpinBox)
+
+        # Skip frames that did not change
+        self.skipUnchangedCheckBox = QCheckBox("Skip unchanged frames")
+        layout.addRow(QLabel(""), self.skipUnchangedCheckBox)
+
+        # Blocks of each frame compared to tell whether it changed, 0 compares whole frames
+        self.skipBlocksLabel = QLabel("Sampled Blocks")
+        self.skipBlocksSpinBox = QSpinBox()
+        self.skipBlocksSpinBox.setRange(0, 4096)
+        layout.addRow(self.skipBlocksLabel, self.skipBlocksSpinBox)
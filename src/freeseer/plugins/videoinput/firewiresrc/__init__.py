@@ -29,9 +29,6 @@ source.
 @author: Thanh Ha
 '''
 
-# python-libs
-import os
-
 # GStreamer modules
 import pygst
 pygst.require("0.10")
@@ -43,6 +40,7 @@ from PyQt4.QtCore import SIGNAL
 # Freeseer modules
 from freeseer.framework.plugin import IVideoInput
 from freeseer.framework.config import Config, options
+from freeseer.framework.devices import device_registry
 
 # .freeseer-plugin custom modules
 import widget
@@ -50,32 +48,20 @@ import widget
 
 def detect_devices():
     """
-    Return a list of available firewire devices.
+    Return a list of available firewire devices, as cached by the device registry.
     """
-    device_list = []
-    i = 1
-    path = "/dev/fw"
-    devpath = path + str(i)
-
-    while os.path.exists(devpath):
-        device_list.append(devpath)
-        i = i + 1
-        devpath = path + str(i)
-
-    return device_list
+    return [device for name, device in device_registry.get_devices('firewire')]
 
 
 def get_default_device():
     """Returns a default recording device from get_devices()."""
-    devices = detect_devices()
-    if not devices:
-        return ''
-    return devices[0]
+    return device_registry.get_default('firewire')
 
 
 class FirewireSrcConfig(Config):
     """Config settings for Firewire video source."""
     device = options.StringOption('')
+    fast_decode = options.BooleanOption(False)
 
 
 class FirewireSrc(IVideoInput):
@@ -93,20 +79,29 @@ class FirewireSrc(IVideoInput):
             self.config.device = get_default_device()
 
         videosrc = gst.element_factory_make("dv1394src", "videosrc")
+        dv1394tee = gst.element_factory_make('tee', 'dv1394tee')
         dv1394q1 = gst.element_factory_make('queue', 'dv1394q1')
         dv1394dvdemux = gst.element_factory_make('dvdemux', 'dv1394dvdemux')
         dv1394q2 = gst.element_factory_make('queue', 'dv1394q2')
         dv1394dvdec = gst.element_factory_make('dvdec', 'dv1394dvdec')
 
+        if self.config.fast_decode:
+            # When the DV stream is recorded as is, the decoded video only
+            # feeds the preview: decode every other frame at lower quality
+            dv1394dvdec.set_property('quality', 4)
+            dv1394dvdec.set_property('drop-factor', 2)
+
         # Add Elements
         bin.add(videosrc)
+        bin.add(dv1394tee)
         bin.add(dv1394q1)
         bin.add(dv1394dvdemux)
         bin.add(dv1394q2)
         bin.add(dv1394dvdec)
 
         # Link Elements
-        videosrc.link(dv1394q1)
+        videosrc.link(dv1394tee)
+        dv1394tee.link(dv1394q1)
         dv1394q1.link(dv1394dvdemux)
         dv1394dvdemux.link(dv1394q2)
         dv1394q2.link(dv1394dvdec)
@@ -116,6 +111,10 @@ class FirewireSrc(IVideoInput):
         ghostpad = gst.GhostPad("videosrc", pad)
         bin.add_pad(ghostpad)
 
+        # The DV stream before decoding, for outputs that record it as is
+        compressedpad = dv1394tee.get_request_pad("src%d")
+        bin.add_pad(gst.GhostPad("compressedsrc", compressedpad))
+
         return bin
 
     def get_widget(self):
@@ -126,26 +125,45 @@ class FirewireSrc(IVideoInput):
 
     def __enable_connections(self):
         self.widget.connect(self.widget.devicesCombobox, SIGNAL('activated(const QString&)'), self.set_device)
+        self.widget.connect(self.widget.fastDecodeCheckBox, SIGNAL('toggled(bool)'), self.set_fast_decode)
 
     def widget_load_config(self, plugman):
         self.load_config(plugman)
 
-        # Load the combobox with inputs
+        self.load_devices()
+        # Devices plugged in or out while the widget is shown
+        device_registry.add_listener(self.on_devices_changed)
+
+        self.widget.fastDecodeCheckBox.setChecked(bool(self.config.fast_decode))
+
+        # Finally enable connections
+        self.__enable_connections()
+
+    def load_devices(self):
+        """Fills the device combobox with the FireWire devices found."""
         self.widget.devicesCombobox.clear()
         for i, device in enumerate(detect_devices()):
             self.widget.devicesCombobox.addItem(device)
             if device == self.config.device:
                 self.widget.devicesCombobox.setCurrentIndex(i)
 
-        # Finally enable connections
-        self.__enable_connections()
+    def on_devices_changed(self, kind):
+        if kind == 'firewire' and self.widget is not None:
+            self.load_devices()
 
     def set_device(self, device):
         self.config.device = device
         self.config.save()
 
+    def set_fast_decode(self, checked):
+        self.config.fast_decode = checked
+        self.config.save()
+
     ###
     ### Translations
     ###
     def retranslate(self):
         self.widget.devicesLabel.setText(self.gui.app.translate('plugin-firewire', 'Video Device'))
+        self.widget.fastDecodeCheckBox.setText(self.gui.app.translate('plugin-firewire', 'Fast preview decoding'))
+        self.widget.fastDecodeCheckBox.setToolTip(
+            self.gui.app.translate('plugin-firewire', 'Decodes fewer frames at lower quality, for use with DV Output'))
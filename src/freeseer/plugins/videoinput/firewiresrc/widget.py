@@ -26,6 +26,7 @@ http://wiki.github.com/Freeseer/freeseer/
 @author: Thanh Ha
 '''
 
+from PyQt4.QtGui import QCheckBox
 from PyQt4.QtGui import QComboBox
 from PyQt4.QtGui import QFormLayout
 from PyQt4.QtGui import QLabel
@@ -44,3 +45,6 @@ class ConfigWidget(QWidget):
         self.devicesCombobox = QComboBox()
         self.devicesCombobox.setMinimumWidth(150)
         layout.addRow(self.devicesLabel, self.devicesCombobox)
+
+        self.fastDecodeCheckBox = QCheckBox("Fast preview decoding")
+        layout.addRow(QLabel(""), self.fastDecodeCheckBox)
@@ -29,6 +29,9 @@ Devices such as Webcams and vga2usb frame grabbers.
 
 @author: Thanh Ha
 '''
+from collections import namedtuple
+import logging
+import re
 import sys
 
 # GStreamer modules
@@ -42,10 +45,19 @@ from PyQt4.QtCore import SIGNAL
 # Freeseer modules
 from freeseer.framework.plugin import IVideoInput
 from freeseer.framework.config import Config, options
+from freeseer.framework.devices import device_registry
 
 # .freeseer-plugin custom modules
 import widget
 
+log = logging.getLogger(__name__)
+
+# A capture mode of a camera. format is "MJPEG", "RGB" or a YUV fourcc such as
+# "YUY2", framerate a (numerator, denominator) tuple.
+Mode = namedtuple('Mode', ['format', 'width', 'height', 'framerate'])
+
+MODE_PATTERN = re.compile(r'^(\w+) (\d+)x(\d+) @ (\d+)/(\d+)$')
+
 
 def get_devices():
     """
@@ -57,46 +69,139 @@ def get_devices():
     On Windows the dictionary is a key, value pair of:
         Device Name : Device Name
 
-    NOTE: GstPropertyProbe has been removed in later versions of Gstreamer
-          When a new method is available this function will need to be
-          redesigned:
-              https://bugzilla.gnome.org/show_bug.cgi?id=678402
+    Devices are only probed once, then cached by the device registry until
+    they are plugged in or out.
     """
+    return dict(device_registry.get_devices('video'))
 
-    devicemap = {}
 
+def make_videosrc(device):
+    """Returns the capture element for the platform, set to capture from device."""
     if sys.platform.startswith("linux"):
         videosrc = gst.element_factory_make("v4l2src", "videosrc")
-        videosrc.probe_property_name('device')
-        devices = videosrc.probe_get_values_name('device')
-
-        for device in devices:
-            videosrc.set_property('device', device)
-            devicemap[videosrc.get_property('device-name')] = device
-
+        videosrc.set_property("device", device)
     elif sys.platform in ["win32", "cygwin"]:
         videosrc = gst.element_factory_make("dshowvideosrc", "videosrc")
-        videosrc.probe_property_name('device-name')
-        devices = videosrc.probe_get_values_name('device-name')
+        videosrc.set_property("device-name", device)
+    return videosrc
+
+
+def get_values(value):
+    """Returns the fixed values a caps field allows, taking the ends of ranges."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, gst.IntRange):
+        return [value.low, value.high]
+    if isinstance(value, gst.FractionRange):
+        return [value.low, value.high]
+    return [value]
+
+
+def get_modes(device):
+    """Returns the capture modes the device supports, or an empty list if it can't be opened.
+
+    Modes are only probed once, then cached by the device registry until
+    video devices are plugged in or out.
+    """
+    return device_registry.get_capabilities('video', device, probe_modes)
+
+
+def probe_modes(device):
+    """Returns the capture modes the device supports, or an empty list if it can't be opened.
+
+    The device has to be opened to ask the driver for its modes, which fails
+    while it is capturing.
+    """
+    videosrc = make_videosrc(device)
+    if videosrc.set_state(gst.STATE_READY) == gst.STATE_CHANGE_FAILURE:
+        log.warning("Could not open %s to list its capture modes.", device)
+        videosrc.set_state(gst.STATE_NULL)
+        return []
+    caps = videosrc.get_pad("src").get_caps()
+    videosrc.set_state(gst.STATE_NULL)
+
+    modes = set()
+    for structure in caps:
+        if structure.get_name() == "image/jpeg":
+            format = "MJPEG"
+        elif structure.get_name() == "video/x-raw-rgb":
+            format = "RGB"
+        elif structure.get_name() == "video/x-raw-yuv" and structure.has_field("format"):
+            format = structure["format"].fourcc
+        else:
+            continue
+
+        if not all(structure.has_field(field) for field in ["width", "height", "framerate"]):
+            continue
+        for width in get_values(structure["width"]):
+            for height in get_values(structure["height"]):
+                for framerate in get_values(structure["framerate"]):
+                    if framerate.num > 0:
+                        modes.add(Mode(format, width, height, (framerate.num, framerate.denom)))
+    return sorted(modes)
+
+
+def get_fps(mode):
+    return float(mode.framerate[0]) / mode.framerate[1]
+
+
+def choose_mode(modes, min_framerate, max_size=None):
+    """Returns the best mode: the highest resolution reaching min_framerate, at its highest framerate.
+
+    With max_size, the (width, height) of the recorded video, larger modes
+    are only chosen if none fit; they would be scaled down anyway, after
+    decoding much larger frames. Uncompressed formats are preferred over
+    MJPEG when they are as fast, as they need no decoding. At high
+    resolutions they rarely are, as raw video quickly runs out of USB
+    bandwidth, so MJPEG ends up chosen there.
+    """
+    if not modes:
+        return None
+
+    candidates = [mode for mode in modes if get_fps(mode) >= min_framerate] or modes
+    if max_size is not None:
+        fitting = [mode for mode in candidates if mode.width <= max_size[0] and mode.height <= max_size[1]]
+        if not fitting:
+            return min(candidates, key=lambda mode: (mode.width * mode.height, -get_fps(mode), mode.format == "MJPEG"))
+        candidates = fitting
+    return max(candidates, key=lambda mode: (mode.width * mode.height, get_fps(mode), mode.format != "MJPEG"))
+
 
-        for device in devices:
-            devicemap[device] = device
+def mode_to_string(mode):
+    return "{} {}x{} @ {}/{}".format(mode.format, mode.width, mode.height, mode.framerate[0], mode.framerate[1])
 
-    return devicemap
+
+def mode_from_string(string):
+    """Returns the Mode described by mode_to_string(), or None if string doesn't describe one."""
+    match = MODE_PATTERN.match(string)
+    if match is None:
+        return None
+    format, width, height, num, denom = match.groups()
+    return Mode(format, int(width), int(height), (int(num), int(denom)))
+
+
+def mode_to_caps(mode):
+    if mode.format == "MJPEG":
+        caps = "image/jpeg"
+    elif mode.format == "RGB":
+        caps = "video/x-raw-rgb"
+    else:
+        caps = "video/x-raw-yuv, format=(fourcc){}".format(mode.format)
+    return gst.caps_from_string("{}, width={}, height={}, framerate={}/{}".format(
+        caps, mode.width, mode.height, mode.framerate[0], mode.framerate[1]))
 
 
 def get_default_device():
     """Returns a default recording device from get_devices()."""
-    devicemap = get_devices()
-    if not devicemap:
-        return ''
-    default = devicemap.itervalues().next()
-    return default
+    return device_registry.get_default('video')
 
 
 class USBSrcConfig(Config):
     """USBSrc Configuration settings."""
     device = options.StringOption('')
+    # Empty to pick the best mode the camera supports, see choose_mode()
+    mode = options.StringOption('')
+    min_framerate = options.IntegerOption(25)
 
 
 class USBSrc(IVideoInput):
@@ -113,22 +218,32 @@ class USBSrc(IVideoInput):
         """
         bin = gst.Bin()  # Do not pass a name so that we can load this input more than once.
 
-        videosrc = None
-
         if not self.config.device:
             self.config.device = get_default_device()
 
-        if sys.platform.startswith("linux"):
-            videosrc = gst.element_factory_make("v4l2src", "videosrc")
-            videosrc.set_property("device", self.config.device)
-        elif sys.platform in ["win32", "cygwin"]:
-            videosrc = gst.element_factory_make("dshowvideosrc", "videosrc")
-            videosrc.set_property("device-name", self.config.device)
+        mode = self.get_mode()
+
+        videosrc = make_videosrc(self.config.device)
         bin.add(videosrc)
+        srcelement = videosrc
+
+        if mode is not None:
+            log.debug("Capturing %s from %s", mode_to_string(mode), self.config.device)
+            capsfilter = gst.element_factory_make("capsfilter", "capsfilter")
+            capsfilter.set_property("caps", mode_to_caps(mode))
+            bin.add(capsfilter)
+            srcelement.link(capsfilter)
+            srcelement = capsfilter
+
+            if mode.format == "MJPEG":
+                jpegdec = gst.element_factory_make("jpegdec", "jpegdec")
+                bin.add(jpegdec)
+                srcelement.link(jpegdec)
+                srcelement = jpegdec
 
         colorspace = gst.element_factory_make("ffmpegcolorspace", "colorspace")
         bin.add(colorspace)
-        videosrc.link(colorspace)
+        srcelement.link(colorspace)
 
         # Setup ghost pad
         pad = colorspace.get_pad("src")
@@ -137,6 +252,16 @@ class USBSrc(IVideoInput):
 
         return bin
 
+    def get_mode(self):
+        """Returns the mode pinned in the config, or else the best mode of the device.
+
+        Returns None when the device can't be probed, leaving the choice to the driver.
+        """
+        mode = mode_from_string(self.config.mode)
+        if mode is None:
+            mode = choose_mode(get_modes(self.config.device), self.config.min_framerate, self.output_size)
+        return mode
+
     def get_widget(self):
         if self.widget is None:
             self.widget = widget.ConfigWidget()
@@ -145,11 +270,21 @@ class USBSrc(IVideoInput):
 
     def __enable_connections(self):
         self.widget.connect(self.widget.devicesCombobox, SIGNAL('activated(int)'), self.set_device)
+        self.widget.connect(self.widget.modeCombobox, SIGNAL('activated(int)'), self.set_mode)
 
     def widget_load_config(self, plugman):
         self.load_config(plugman)
 
-        # Load the combobox with inputs
+        self.load_devices()
+        self.load_modes()
+        # Cameras plugged in or out while the widget is shown
+        device_registry.add_listener(self.on_devices_changed)
+
+        # Finally enable connections
+        self.__enable_connections()
+
+    def load_devices(self):
+        """Fills the device combobox with the cameras found."""
         self.widget.devicesCombobox.clear()
         n = 0
         for device, devurl in get_devices().items():
@@ -158,11 +293,30 @@ class USBSrc(IVideoInput):
                 self.widget.devicesCombobox.setCurrentIndex(n)
             n += 1
 
-        # Finally enable connections
-        self.__enable_connections()
+    def on_devices_changed(self, kind):
+        if kind == 'video' and self.widget is not None:
+            self.load_devices()
+            self.load_modes()
+
+    def load_modes(self):
+        """Fills the mode combobox with the modes of the configured device."""
+        self.widget.modeCombobox.clear()
+        self.widget.modeCombobox.addItem("Automatic", "")
+        for mode in get_modes(self.config.device):
+            self.widget.modeCombobox.addItem(mode_to_string(mode), mode_to_string(mode))
+
+        index = self.widget.modeCombobox.findData(self.config.mode)
+        self.widget.modeCombobox.setCurrentIndex(max(index, 0))
 
     def set_device(self, device):
         self.config.device = self.widget.devicesCombobox.itemData(device).toString()
+        # Modes differ between devices
+        self.config.mode = ''
+        self.config.save()
+        self.load_modes()
+
+    def set_mode(self, index):
+        self.config.mode = str(self.widget.modeCombobox.itemData(index).toString())
         self.config.save()
 
     ###
@@ -170,3 +324,4 @@ class USBSrc(IVideoInput):
     ###
     def retranslate(self):
         self.widget.devicesLabel.setText(self.gui.app.translate('plugin-usb', 'Video Device'))
+        self.widget.modeLabel.setText(self.gui.app.translate('plugin-usb', 'Capture Mode'))
@@ -44,3 +44,8 @@ class ConfigWidget(QWidget):
         self.devicesCombobox = QComboBox()
         self.devicesCombobox.setMinimumWidth(150)
         layout.addRow(self.devicesLabel, self.devicesCombobox)
+
+        self.modeLabel = QLabel("Capture Mode")
+        self.modeCombobox = QComboBox()
+        self.modeCombobox.setMinimumWidth(150)
+        layout.addRow(self.modeLabel, self.modeCombobox)
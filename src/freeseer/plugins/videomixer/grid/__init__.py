@@ -0,0 +1,252 @@
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://github.com/Freeseer/freeseer/
+
+
+'''
+Grid
+----
+
+A video mixer plugin which lays out any number of video sources in a grid or
+side by side, compositing them with a single videomixer element.
+
+@author: Free and Open Source Software Learning Centre
+'''
+
+# Python modules
+import logging
+import math
+
+# GStreamer modules
+import pygst
+pygst.require("0.10")
+import gst
+
+# PyQt modules
+from PyQt4.QtCore import SIGNAL
+
+# Freeseer modules
+from freeseer.framework.plugin import IVideoMixer
+from freeseer.framework.config import Config, options
+
+# .freeseer-plugin custom modules
+import widget
+
+log = logging.getLogger(__name__)
+
+
+class GridConfig(Config):
+    """Configuration class for Grid plugin."""
+    inputs = options.StringOption("Video Test Source,Video Test Source,Video Test Source")
+    layout = options.ChoiceOption(widget.layouts, "Grid")
+    resolution = options.ChoiceOption(widget.resmap.keys(), "720p")
+
+
+def get_cells(count, layout, width, height):
+    """Returns the (x, y, width, height) of count cells laid out in a width x height frame.
+
+    Cells keep the aspect ratio of the frame and are centered, including an
+    incomplete last row. There are no cells without inputs.
+    """
+    if count < 1:
+        return []
+
+    if layout == "Side by Side":
+        columns, rows = count, 1
+    else:
+        columns = int(math.ceil(math.sqrt(count)))
+        rows = int(math.ceil(float(count) / columns))
+
+    # I420 needs even dimensions
+    cell_width = min(width // columns, height // rows * width // height) // 2 * 2
+    cell_height = cell_width * height // width // 2 * 2
+    top = (height - rows * cell_height) // 2
+
+    cells = []
+    for row in range(rows):
+        row_count = min(columns, count - row * columns)
+        left = (width - row_count * cell_width) // 2
+        for column in range(row_count):
+            cells.append((left + column * cell_width, top + row * cell_height, cell_width, cell_height))
+    return cells
+
+
+class Grid(IVideoMixer):
+    name = "Grid"
+    os = ["linux", "linux2", "win32", "cygwin", "darwin"]
+    widget = None
+    CONFIG_CLASS = GridConfig
+    MAX_INPUTS = 9
+
+    # Every source is scaled straight to its cell in planar YUV, so frames are
+    # scaled and converted once however many sources there are
+    CAPS = 'video/x-raw-yuv, format=(fourcc)I420, width={}, height={}'
+
+    def get_input_names(self):
+        names = [name.strip() for name in self.config.inputs.split(",") if name.strip()]
+        return names[:self.MAX_INPUTS]
+
+    def get_size(self):
+        """Returns the width and height of the composited video."""
+        return widget.resmap[str(self.config.resolution)]
+
+    def get_output_size(self):
+        return self.get_size()
+
+    def get_videomixer_bin(self):
+        if not self.get_input_names():
+            log.error("Grid has no video inputs configured.")
+            return None
+
+        bin = gst.Bin()
+
+        videomixer = gst.element_factory_make("videomixer", "videomixer")
+        bin.add(videomixer)
+
+        colorspace = gst.element_factory_make("ffmpegcolorspace", "colorspace")
+        bin.add(colorspace)
+        videomixer.link(colorspace)
+
+        width, height = self.get_size()
+
+        # A black frame the size of the output sits behind the cells, so the
+        # output keeps its size when the cells don't reach the edges
+        background = gst.element_factory_make("videotestsrc", "background")
+        background.set_property("pattern", 2)  # black
+        background.set_property("is-live", True)
+        background_caps = gst.element_factory_make("capsfilter", "background_caps")
+        background_caps.set_property("caps", gst.caps_from_string(self.CAPS.format(width, height)))
+        bin.add(background)
+        bin.add(background_caps)
+        background.link(background_caps)
+        background_pad = videomixer.get_request_pad("sink_%d")
+        background_pad.set_property("zorder", 0)
+        background_caps.get_pad("src").link(background_pad)
+
+        cells = get_cells(len(self.get_input_names()), self.config.layout, width, height)
+        for index, (x, y, cell_width, cell_height) in enumerate(cells):
+            log.debug("Grid cell %d: %sx%s at %sx%s", index, cell_width, cell_height, x, y)
+
+            # The colorspace converter only works when the source does not already produce I420
+            cell_colorspace = gst.element_factory_make("ffmpegcolorspace", "colorspace{}".format(index))
+            cell_scale = gst.element_factory_make("videoscale", "scale{}".format(index))
+            cell_caps = gst.element_factory_make("capsfilter", "caps{}".format(index))
+            cell_caps.set_property("caps", gst.caps_from_string(self.CAPS.format(cell_width, cell_height)))
+            for element in [cell_colorspace, cell_scale, cell_caps]:
+                bin.add(element)
+            gst.element_link_many(cell_colorspace, cell_scale, cell_caps)
+
+            pad = videomixer.get_request_pad("sink_%d")
+            pad.set_property("zorder", index + 1)
+            pad.set_property("xpos", x)
+            pad.set_property("ypos", y)
+            cell_caps.get_pad("src").link(pad)
+
+            bin.add_pad(gst.GhostPad("sink_{}".format(index), cell_colorspace.get_pad("sink")))
+
+        srcpad = colorspace.get_pad("src")
+        src_ghostpad = gst.GhostPad("src", srcpad)
+        bin.add_pad(src_ghostpad)
+
+        return bin
+
+    def get_inputs(self):
+        return [(name, instance) for instance, name in enumerate(self.get_input_names())]
+
+    def load_inputs(self, player, mixer, inputs):
+        for index, input in enumerate(inputs):
+            player.add(input)
+            input.get_pad("videosrc").link(mixer.get_pad("sink_{}".format(index)))
+
+    def supports_video_quality(self):
+        return True
+
+    def get_resolution_pixels(self):
+        self.get_config()
+
+        width, height = self.get_size()
+        return width * height
+
+    def get_widget(self):
+        if self.widget is None:
+            self.widget = widget.ConfigWidget()
+        return self.widget
+
+    def __enable_connections(self):
+        self.widget.connect(self.widget.layoutComboBox, SIGNAL('currentIndexChanged(const QString&)'), self.set_layout)
+        self.widget.connect(self.widget.resolutionComboBox, SIGNAL('currentIndexChanged(const QString&)'),
+                            self.set_resolution)
+        self.widget.connect(self.widget.inputCountSpinBox, SIGNAL('valueChanged(int)'), self.set_input_count)
+
+    def widget_load_config(self, plugman):
+        self.get_config()
+
+        self.widget.layoutComboBox.setCurrentIndex(self.widget.layoutComboBox.findText(self.config.layout))
+        self.widget.resolutionComboBox.setCurrentIndex(self.widget.resolutionComboBox.findText(self.config.resolution))
+        self.widget.inputCountSpinBox.setMaximum(self.MAX_INPUTS)
+        self.widget.inputCountSpinBox.setValue(len(self.get_input_names()))
+        self.load_input_combo_boxes()
+
+        # Finally enable connections
+        self.__enable_connections()
+
+    def load_input_combo_boxes(self):
+        sources = [plugin.plugin_object.get_name() for plugin in self.plugman.get_videoinput_plugins()]
+
+        for combo_box in self.widget.set_input_count(len(self.get_input_names())):
+            self.widget.connect(combo_box, SIGNAL('currentIndexChanged(const QString&)'), self.save_inputs)
+
+        for combo_box, name in zip(self.widget.inputComboBoxes, self.get_input_names()):
+            # Don't save the half filled combo boxes
+            combo_box.blockSignals(True)
+            combo_box.clear()
+            for i, source in enumerate(sources):
+                combo_box.addItem(source)
+                if source == name:
+                    combo_box.setCurrentIndex(i)
+            combo_box.blockSignals(False)
+
+    def save_inputs(self, *args):
+        self.config.inputs = ",".join(str(combo_box.currentText()) for combo_box in self.widget.inputComboBoxes)
+        self.config.save()
+
+    def set_layout(self, layout):
+        self.config.layout = layout
+        self.config.save()
+
+    def set_resolution(self, resolution):
+        self.config.resolution = resolution
+        self.config.save()
+        self.gui.update_video_quality()
+
+    def set_input_count(self, count):
+        names = self.get_input_names()
+        names = (names + [names[-1] if names else "Video Test Source"] * count)[:count]
+        self.config.inputs = ",".join(names)
+        self.config.save()
+        self.load_input_combo_boxes()
+
+    ###
+    ### Translations
+    ###
+    def retranslate(self):
+        self.widget.layoutLabel.setText(self.gui.app.translate('plugin-grid', 'Layout'))
+        self.widget.resolutionLabel.setText(self.gui.app.translate('plugin-grid', 'Resolution'))
+        self.widget.inputCountLabel.setText(self.gui.app.translate('plugin-grid', 'Sources'))
@@ -0,0 +1,96 @@
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://github.com/Freeseer/freeseer/
+
+
+'''
+Grid
+----
+
+Configuration widget for the Grid video mixer.
+
+@author: Free and Open Source Software Learning Centre
+'''
+
+from collections import OrderedDict
+
+from PyQt4.QtGui import QComboBox
+from PyQt4.QtGui import QFormLayout
+from PyQt4.QtGui import QLabel
+from PyQt4.QtGui import QSpinBox
+from PyQt4.QtGui import QWidget
+
+
+resmap = OrderedDict([
+    ('240p', (320, 240)),
+    ('360p', (480, 360)),
+    ('480p', (640, 480)),
+    ('720p', (1280, 720)),
+    ('1080p', (1920, 1080)),
+])
+
+layouts = ["Grid", "Side by Side"]
+
+
+class ConfigWidget(QWidget):
+
+    def __init__(self, parent=None):
+        QWidget.__init__(self, parent)
+
+        self.formLayout = QFormLayout()
+        self.setLayout(self.formLayout)
+
+        self.layoutLabel = QLabel("Layout")
+        self.layoutComboBox = QComboBox()
+        for layout in layouts:
+            self.layoutComboBox.addItem(layout)
+        self.formLayout.addRow(self.layoutLabel, self.layoutComboBox)
+
+        self.resolutionLabel = QLabel("Resolution")
+        self.resolutionComboBox = QComboBox()
+        for resolution in resmap:
+            self.resolutionComboBox.addItem(resolution)
+        self.formLayout.addRow(self.resolutionLabel, self.resolutionComboBox)
+
+        self.inputCountLabel = QLabel("Sources")
+        self.inputCountSpinBox = QSpinBox()
+        self.inputCountSpinBox.setMinimum(1)
+        self.formLayout.addRow(self.inputCountLabel, self.inputCountSpinBox)
+
+        self.inputComboBoxes = []
+
+    def set_input_count(self, count):
+        """Shows one source combo box per input, returning the combo boxes added."""
+        while len(self.inputComboBoxes) > count:
+            combo_box = self.inputComboBoxes.pop()
+            label = self.formLayout.labelForField(combo_box)
+            self.formLayout.removeWidget(label)
+            self.formLayout.removeWidget(combo_box)
+            label.deleteLater()
+            combo_box.deleteLater()
+
+        added = []
+        while len(self.inputComboBoxes) < count:
+            combo_box = QComboBox()
+            self.formLayout.addRow(QLabel("Source {}".format(len(self.inputComboBoxes) + 1)), combo_box)
+            self.inputComboBoxes.append(combo_box)
+            added.append(combo_box)
+
+        return added
@@ -33,6 +33,7 @@ Picture-In-Picture mode.
 import pygst
 pygst.require("0.10")
 import gst
+import logging
 
 # PyQt modules
 from PyQt4.QtCore import SIGNAL
@@ -44,11 +45,18 @@ from freeseer.framework.config import Config, options
 # .freeseer-plugin custom modules
 import widget
 
+log = logging.getLogger(__name__)
+
 
 class PictureInPictureConfig(Config):
     """Configuration class for PIP plugin."""
     main = options.StringOption("Video Test Source")
     pip = options.StringOption("Video Test Source")
+    resolution = options.ChoiceOption(widget.resmap.keys(), "480p")
+    inset_size = options.IntegerOption(30)
+    inset_position = options.ChoiceOption(widget.positions, "Top Left")
+    inset_margin = options.IntegerOption(20)
+    inset_alpha = options.FloatOption(0.6)
 
 
 class PictureInPicture(IVideoMixer):
@@ -56,8 +64,51 @@ class PictureInPicture(IVideoMixer):
     os = ["linux", "linux2", "win32", "cygwin", "darwin"]
     widget = None
     CONFIG_CLASS = PictureInPictureConfig
-    WIDTH = 640
-    HEIGHT = 480
+
+    # Both sources are scaled to and composited in planar YUV, which the
+    # encoders take as is and which needs under half the memory of RGB
+    CAPS = 'video/x-raw-yuv, format=(fourcc)I420, width={}, height={}'
+
+    def get_size(self):
+        """Returns the width and height of the composited video."""
+        return widget.resmap[str(self.config.resolution)]
+
+    def get_output_size(self):
+        return self.get_size()
+
+    def get_inset_geometry(self):
+        """Returns the x, y, width and height of the inset within the composited video."""
+        width, height = self.get_size()
+        margin = self.config.inset_margin
+
+        # I420 needs even dimensions; the inset keeps the aspect ratio of the output
+        inset_width = max(width * self.config.inset_size // 100 // 2 * 2, 2)
+        inset_height = max(inset_width * height // width // 2 * 2, 2)
+
+        x = margin
+        y = margin
+        if self.config.inset_position in ["Top Right", "Bottom Right"]:
+            x = width - inset_width - margin
+        if self.config.inset_position in ["Bottom Left", "Bottom Right"]:
+            y = height - inset_height - margin
+
+        return x, y, inset_width, inset_height
+
+    def make_scaler(self, bin, name, width, height):
+        """Adds colorspace > videoscale > capsfilter to bin and returns the first and last elements.
+
+        The colorspace converter only works when the source does not already
+        produce I420.
+        """
+        colorspace = gst.element_factory_make("ffmpegcolorspace", name + "_colorspace")
+        scale = gst.element_factory_make("videoscale", name + "_scale")
+        capsfilter = gst.element_factory_make("capsfilter", name + "_capsfilter")
+        capsfilter.set_property('caps', gst.caps_from_string(self.CAPS.format(width, height)))
+
+        for element in [colorspace, scale, capsfilter]:
+            bin.add(element)
+        gst.element_link_many(colorspace, scale, capsfilter)
+        return colorspace, capsfilter
 
     def get_videomixer_bin(self):
         bin = gst.Bin()
@@ -69,28 +120,31 @@ class PictureInPicture(IVideoMixer):
         bin.add(colorspace)
         videomixer.link(colorspace)
 
-        # Picture-In-Picture
-        videobox = gst.element_factory_make("videobox", "videobox")
-        bin.add(videobox)
-
-        videobox.link(videomixer)
-
-        videobox2 = gst.element_factory_make("videobox", "videobox2")
-        bin.add(videobox2)
-
-        videobox2.set_property("alpha", 0.6)
-        videobox2.set_property("border-alpha", 0)
-        videobox2.set_property("top", -20)
-        videobox2.set_property("left", -25)
-
-        videobox2.link(videomixer)
+        width, height = self.get_size()
+        x, y, inset_width, inset_height = self.get_inset_geometry()
+        log.debug("Picture-In-Picture at %sx%s, inset %sx%s at %sx%s", width, height, inset_width, inset_height, x, y)
+
+        # Main source fills the frame
+        main_first, main_last = self.make_scaler(bin, "main", width, height)
+        main_pad = videomixer.get_request_pad("sink_%d")
+        main_pad.set_property("zorder", 0)
+        main_last.get_pad("src").link(main_pad)
+
+        # The inset is placed and blended by the mixer pad rather than padded out with videobox
+        pip_first, pip_last = self.make_scaler(bin, "pip", inset_width, inset_height)
+        pip_pad = videomixer.get_request_pad("sink_%d")
+        pip_pad.set_property("zorder", 1)
+        pip_pad.set_property("xpos", x)
+        pip_pad.set_property("ypos", y)
+        pip_pad.set_property("alpha", self.config.inset_alpha)
+        pip_last.get_pad("src").link(pip_pad)
 
         # Setup ghost pad
-        sinkpad = videobox.get_pad("sink")
+        sinkpad = main_first.get_pad("sink")
         sink_ghostpad = gst.GhostPad("sink_main", sinkpad)
         bin.add_pad(sink_ghostpad)
 
-        pip_sinkpad = videobox2.get_pad("sink")
+        pip_sinkpad = pip_first.get_pad("sink")
         pip_ghostpad = gst.GhostPad("sink_pip", pip_sinkpad)
         bin.add_pad(pip_ghostpad)
 
@@ -105,59 +159,10 @@ class PictureInPicture(IVideoMixer):
         return inputs
 
     def load_inputs(self, player, mixer, inputs):
-        # Load main source
-        input1 = inputs[0]
-
-        # Create videoscale element in order to scale to dimensions not supported by camera
-        mainsrc_scale = gst.element_factory_make("videoscale", "mainsrc_scale")
-
-        # Create ffmpegcolorspace element to convert from what camera supports to rgb
-        mainsrc_colorspace = gst.element_factory_make("ffmpegcolorspace", "mainsrc_colorspace")
-
-        # Create capsfilter for limiting to x-raw-rgb pixel video format and setting dimensions
-        mainsrc_capsfilter = gst.element_factory_make("capsfilter", "mainsrc_capsfilter")
-        mainsrc_capsfilter.set_property('caps',
-                        gst.caps_from_string('video/x-raw-rgb, width={}, height={}'.format(self.WIDTH, self.HEIGHT)))
-
-        mainsrc_elements = [input1, mainsrc_scale, mainsrc_capsfilter, mainsrc_colorspace]
-
-        # Add elements to player in list order
-        map(lambda element: player.add(element), mainsrc_elements)
-
-        # Link elements in a specific order
-        input1.link(mainsrc_scale)
-        mainsrc_scale.link(mainsrc_capsfilter)
-        mainsrc_capsfilter.link(mainsrc_colorspace)
-
-        # Link colorspace element to sink pad for pixel format conversion
-        srcpad = mainsrc_colorspace.get_pad("src")
-        sinkpad = mixer.get_pad("sink_main")
-        srcpad.link(sinkpad)
-
-        # Load the secondary source
-        input2 = inputs[1]
-
-        # Create gst elements as above, but set smaller dimensions
-        pipsrc_scale = gst.element_factory_make("videoscale", "pipsrc_scale")
-        pipsrc_colorspace = gst.element_factory_make("ffmpegcolorspace", "pipsrc_colorspace")
-        pipsrc_capsfilter = gst.element_factory_make("capsfilter", "pipsrc_capsfilter")
-        pipsrc_capsfilter.set_property('caps',
-                        gst.caps_from_string('video/x-raw-rgb, width=200, height=150'))
-
-        pipsrc_elements = [input2, pipsrc_scale, pipsrc_capsfilter, pipsrc_colorspace]
-
-        #Add elements to player in list order
-        map(lambda element: player.add(element), pipsrc_elements)
-
-        # Link elements in specific order
-        input2.link(pipsrc_scale)
-        pipsrc_scale.link(pipsrc_capsfilter)
-        pipsrc_capsfilter.link(pipsrc_colorspace)
-
-        # Link colorspace element to sink pad for pixel format conversion
-        srcpad = pipsrc_colorspace.get_pad("src")
-        sinkpad = mixer.get_pad("sink_pip")
-        srcpad.link(sinkpad)
+        # Sources are scaled inside the mixer bin
+        for input, pad in zip(inputs, ["sink_main", "sink_pip"]):
+            player.add(input)
+            input.get_pad("videosrc").link(mixer.get_pad(pad))
 
     def get_widget(self):
 
@@ -171,6 +176,12 @@ class PictureInPicture(IVideoMixer):
         self.widget.connect(self.widget.mainInputSetupButton, SIGNAL('clicked()'), self.open_mainInputSetup)
         self.widget.connect(self.widget.pipInputComboBox, SIGNAL('currentIndexChanged(const QString&)'), self.set_pipinput)
         self.widget.connect(self.widget.pipInputSetupButton, SIGNAL('clicked()'), self.open_pipInputSetup)
+        self.widget.connect(self.widget.resolutionComboBox, SIGNAL('currentIndexChanged(const QString&)'), self.set_resolution)
+        self.widget.connect(self.widget.insetSizeSpinBox, SIGNAL('valueChanged(int)'), self.set_inset_size)
+        self.widget.connect(self.widget.insetPositionComboBox, SIGNAL('currentIndexChanged(const QString&)'),
+                            self.set_inset_position)
+        self.widget.connect(self.widget.insetMarginSpinBox, SIGNAL('valueChanged(int)'), self.set_inset_margin)
+        self.widget.connect(self.widget.insetAlphaSpinBox, SIGNAL('valueChanged(double)'), self.set_inset_alpha)
 
     def widget_load_config(self, plugman):
         self.get_config()
@@ -194,6 +205,13 @@ class PictureInPicture(IVideoMixer):
                     combo_box.setCurrentIndex(i)
                     setup(config)
 
+        self.widget.resolutionComboBox.setCurrentIndex(self.widget.resolutionComboBox.findText(self.config.resolution))
+        self.widget.insetSizeSpinBox.setValue(self.config.inset_size)
+        self.widget.insetPositionComboBox.setCurrentIndex(
+            self.widget.insetPositionComboBox.findText(self.config.inset_position))
+        self.widget.insetMarginSpinBox.setValue(self.config.inset_margin)
+        self.widget.insetAlphaSpinBox.setValue(self.config.inset_alpha)
+
         # Finally enable connections
         self.__enable_connections()
 
@@ -201,7 +219,35 @@ class PictureInPicture(IVideoMixer):
         return True
 
     def get_resolution_pixels(self):
-        return self.WIDTH * self.HEIGHT
+        self.get_config()
+
+        width, height = self.get_size()
+        return width * height
+
+    ###
+    ### Layout Functions
+    ###
+
+    def set_resolution(self, resolution):
+        self.config.resolution = resolution
+        self.config.save()
+        self.gui.update_video_quality()
+
+    def set_inset_size(self, size):
+        self.config.inset_size = size
+        self.config.save()
+
+    def set_inset_position(self, position):
+        self.config.inset_position = position
+        self.config.save()
+
+    def set_inset_margin(self, margin):
+        self.config.inset_margin = margin
+        self.config.save()
+
+    def set_inset_alpha(self, alpha):
+        self.config.inset_alpha = alpha
+        self.config.save()
 
     ###
     ### Main Input Functions
@@ -255,3 +301,8 @@ class PictureInPicture(IVideoMixer):
     def retranslate(self):
         self.widget.mainInputLabel.setText(self.gui.app.translate('plugin-pip', 'Main Source'))
         self.widget.pipInputLabel.setText(self.gui.app.translate('plugin-pip', 'PIP Source'))
+        self.widget.resolutionLabel.setText(self.gui.app.translate('plugin-pip', 'Resolution'))
+        self.widget.insetSizeLabel.setText(self.gui.app.translate('plugin-pip', 'PIP Size'))
+        self.widget.insetPositionLabel.setText(self.gui.app.translate('plugin-pip', 'PIP Position'))
+        self.widget.insetMarginLabel.setText(self.gui.app.translate('plugin-pip', 'PIP Margin'))
+        self.widget.insetAlphaLabel.setText(self.gui.app.translate('plugin-pip', 'PIP Opacity'))
@@ -26,17 +26,32 @@ http://wiki.github.com/Freeseer/freeseer/
 @author: Thanh Ha
 '''
 
+from collections import OrderedDict
+
 from PyQt4.QtCore import Qt
 from PyQt4.QtGui import QComboBox
+from PyQt4.QtGui import QDoubleSpinBox
 from PyQt4.QtGui import QGridLayout
 from PyQt4.QtGui import QIcon
 from PyQt4.QtGui import QLabel
 from PyQt4.QtGui import QSizePolicy
+from PyQt4.QtGui import QSpinBox
 from PyQt4.QtGui import QStackedWidget
 from PyQt4.QtGui import QToolButton
 from PyQt4.QtGui import QWidget
 
 
+resmap = OrderedDict([
+    ('240p', (320, 240)),
+    ('360p', (480, 360)),
+    ('480p', (640, 480)),
+    ('720p', (1280, 720)),
+    ('1080p', (1920, 1080)),
+])
+
+positions = ["Top Left", "Top Right", "Bottom Left", "Bottom Right"]
+
+
 class ConfigWidget(QWidget):
 
     def __init__(self, parent=None):
@@ -75,3 +90,38 @@ class ConfigWidget(QWidget):
         layout.addWidget(self.pipInputLabel, 1, 0)
         layout.addWidget(self.pipInputComboBox, 1, 1)
         layout.addWidget(self.pipInputSetupStack, 1, 2)
+
+        self.resolutionLabel = QLabel("Resolution")
+        self.resolutionComboBox = QComboBox()
+        for resolution in resmap:
+            self.resolutionComboBox.addItem(resolution)
+        layout.addWidget(self.resolutionLabel, 2, 0)
+        layout.addWidget(self.resolutionComboBox, 2, 1)
+
+        self.insetSizeLabel = QLabel("PIP Size")
+        self.insetSizeSpinBox = QSpinBox()
+        self.insetSizeSpinBox.setRange(5, 100)
+        self.insetSizeSpinBox.setSuffix("%")
+        layout.addWidget(self.insetSizeLabel, 3, 0)
+        layout.addWidget(self.insetSizeSpinBox, 3, 1)
+
+        self.insetPositionLabel = QLabel("PIP Position")
+        self.insetPositionComboBox = QComboBox()
+        for position in positions:
+            self.insetPositionComboBox.addItem(position)
+        layout.addWidget(self.insetPositionLabel, 4, 0)
+        layout.addWidget(self.insetPositionComboBox, 4, 1)
+
+        self.insetMarginLabel = QLabel("PIP Margin")
+        self.insetMarginSpinBox = QSpinBox()
+        self.insetMarginSpinBox.setRange(0, 200)
+        self.insetMarginSpinBox.setSuffix(" px")
+        layout.addWidget(self.insetMarginLabel, 5, 0)
+        layout.addWidget(self.insetMarginSpinBox, 5, 1)
+
+        self.insetAlphaLabel = QLabel("PIP Opacity")
+        self.insetAlphaSpinBox = QDoubleSpinBox()
+        self.insetAlphaSpinBox.setRange(0.0, 1.0)
+        self.insetAlphaSpinBox.setSingleStep(0.1)
+        layout.addWidget(self.insetAlphaLabel, 6, 0)
+        layout.addWidget(self.insetAlphaSpinBox, 6, 1)
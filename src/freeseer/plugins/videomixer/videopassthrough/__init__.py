@@ -42,6 +42,7 @@ from PyQt4.QtCore import SIGNAL
 # Freeseer modules
 from freeseer.framework.plugin import IVideoMixer
 from freeseer.framework.config import Config, options
+from freeseer.framework.framefilter import ChangeDetector
 
 # .freeseer-plugin custom modules
 import widget
@@ -52,15 +53,19 @@ log = logging.getLogger(__name__)
 class VideoPassthroughConfig(Config):
     """Configuration class for VideoPassthrough plugin."""
     input = options.StringOption("Video Test Source")
-    input_type = options.StringOption("video/x-raw-rgb")
+    input_type = options.StringOption("video/x-raw-yuv")
     framerate = options.IntegerOption(30)
     resolution = options.ChoiceOption(widget.resmap.keys(), "No Scaling")
+    skip_static = options.BooleanOption(False)
+    skip_static_blocks = options.IntegerOption(64)
+    skip_static_threshold = options.IntegerOption(0)
 
 
 class VideoPassthrough(IVideoMixer):
     name = "Video Passthrough"
     os = ["linux", "linux2", "win32", "cygwin", "darwin"]
     widget = None
+    frame_filter = None
     CONFIG_CLASS = VideoPassthroughConfig
 
     def get_videomixer_bin(self):
@@ -102,6 +107,16 @@ class VideoPassthrough(IVideoMixer):
         videoscale.link(videoscale_cap)
         videoscale_cap.link(colorspace)
 
+        # Flag static frames as gaps after videorate: Theora writes them as
+        # duplicates of the previous frame, other encoders get them dropped.
+        # One frame is still let through unflagged every half second.
+        self.frame_filter = None
+        if self.config.skip_static:
+            self.frame_filter = ChangeDetector(blocks=self.config.skip_static_blocks,
+                                               threshold=self.config.skip_static_threshold,
+                                               mark_gaps=True)
+            self.frame_filter.attach(colorspace.get_pad("src"))
+
         # Setup ghost pad
         sinkpad = videorate.get_pad("sink")
         sink_ghostpad = gst.GhostPad("sink", sinkpad)
@@ -127,11 +142,19 @@ class VideoPassthrough(IVideoMixer):
             width, height = widget.resmap[str(self.config.resolution)]
             return width * height
 
+    def get_output_size(self):
+        if self.config.resolution == "No Scaling":
+            return None
+        return widget.resmap[str(self.config.resolution)]
+
     def supports_video_quality(self):
         self.get_config()
 
         return self.config.input == "Desktop Source"
 
+    def get_frame_filter(self):
+        return self.frame_filter
+
     def load_inputs(self, player, mixer, inputs):
         # Load source
         input = inputs[0]
@@ -152,6 +175,7 @@ class VideoPassthrough(IVideoMixer):
         self.widget.connect(self.widget.framerateSpinBox, SIGNAL("valueChanged(int)"), self.set_framerate)
         self.widget.connect(self.widget.inputSettingsToolButton, SIGNAL('clicked()'), self.source1_setup)
         self.widget.connect(self.widget.videoscaleComboBox, SIGNAL("currentIndexChanged(const QString&)"), self.set_videoscale)
+        self.widget.connect(self.widget.skipStaticCheckBox, SIGNAL('toggled(bool)'), self.set_skip_static)
 
     def widget_load_config(self, plugman):
         self.get_config()
@@ -182,6 +206,8 @@ class VideoPassthrough(IVideoMixer):
         self.widget.framerateSlider.setValue(self.config.framerate)
         self.widget.framerateSpinBox.setValue(self.config.framerate)
 
+        self.widget.skipStaticCheckBox.setChecked(bool(self.config.skip_static))
+
         # Finally enable connections
         self.__enable_connections()
 
@@ -216,6 +242,10 @@ class VideoPassthrough(IVideoMixer):
         self.config.save()
         self.gui.update_video_quality()
 
+    def set_skip_static(self, checked):
+        self.config.skip_static = checked
+        self.config.save()
+
     ###
     ### Translations
     ###
@@ -224,3 +254,6 @@ class VideoPassthrough(IVideoMixer):
         self.widget.videocolourLabel.setText(self.gui.app.translate('plugin-video-passthrough', 'Colour Format'))
         self.widget.framerateLabel.setText(self.gui.app.translate('plugin-video-passthrough', 'Framerate'))
         self.widget.videoscaleLabel.setText(self.gui.app.translate('plugin-video-passthrough', 'Video Scale'))
+        self.widget.skipStaticCheckBox.setText(self.gui.app.translate('plugin-video-passthrough', 'Skip static frames'))
+        self.widget.skipStaticCheckBox.setToolTip(
+            self.gui.app.translate('plugin-video-passthrough', 'Saves encoding time on slides by not encoding frames that did not change'))
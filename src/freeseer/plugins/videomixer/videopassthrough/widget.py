@@ -29,6 +29,7 @@ http://wiki.github.com/Freeseer/freeseer/
 from collections import OrderedDict
 
 from PyQt4.QtCore import Qt
+from PyQt4.QtGui import QCheckBox
 from PyQt4.QtGui import QComboBox
 from PyQt4.QtGui import QFormLayout
 from PyQt4.QtGui import QHBoxLayout
@@ -103,3 +104,6 @@ class ConfigWidget(QWidget):
             self.videoscaleComboBox.addItem(scale)
         self.videoscaleComboBox.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Maximum)
         layout.addRow(self.videoscaleLabel, self.videoscaleComboBox)
+
+        self.skipStaticCheckBox = QCheckBox("Skip static frames")
+        layout.addRow(QLabel(""), self.skipStaticCheckBox)
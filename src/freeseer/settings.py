@@ -28,6 +28,7 @@ from PyQt4.QtCore import QLocale
 
 from freeseer.framework.config.core import Config
 from freeseer.framework.config.profile import ProfileManager
+from freeseer.framework.multimedia import OutputPolicy
 from freeseer.framework.multimedia import Quality
 import freeseer.framework.config.options as options
 
@@ -63,8 +64,22 @@ class FreeseerConfig(Config):
     audio_quality = options.IntegerOption(Quality.CUSTOM)
     record_to_file = options.BooleanOption(True)
     record_to_file_plugin = options.StringOption('Ogg Output')
+    record_to_file_policy = options.ChoiceOption(OutputPolicy.policies, OutputPolicy.BOUNDED)
     record_to_stream = options.BooleanOption(False)
     record_to_stream_plugin = options.StringOption('RTMP Streaming')
+    record_to_stream_policy = options.ChoiceOption(OutputPolicy.policies, OutputPolicy.LEAKY)
+    resilient_streaming = options.BooleanOption(True)
+    stream_spool_size = options.IntegerOption(256)
     audio_feedback = options.BooleanOption(False)
+    audio_meter_rate = options.IntegerOption(10)
+    pipeline_stats_log = options.StringOption('')
+    pipeline_stats_interval = options.IntegerOption(5)
+    preroll_time = options.IntegerOption(0)
+    preroll_memory_limit = options.IntegerOption(64)
+    plan_video_formats = options.BooleanOption(True)
+    capture_intermediate = options.BooleanOption(False)
+    intermediate_plugin = options.StringOption('Raw Output')
+    transcode_formats = options.StringOption('ogg')
+    transcode_workers = options.IntegerOption(1)
     video_preview = options.BooleanOption(True)
     default_language = options.StringOption(detect_system_language())
@@ -0,0 +1,47 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import unittest
+
+from freeseer.framework import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_environment(self):
+        environment = benchmark.get_environment()
+        self.assertIn('freeseer', environment)
+        self.assertIn('gstreamer', environment)
+
+    def test_memory_usage(self):
+        self.assertGreater(benchmark.get_memory_usage(), 0)
+
+    def test_matrix(self):
+        report = benchmark.benchmark_matrix(duration=1, mixers=['Video Passthrough'],
+                                            outputs=['Ogg Output'], resolutions=['240p'])
+        self.assertEqual(len(report['results']), 1)
+        result = report['results'][0]
+        self.assertEqual(result['resolution'], '240p')
+        self.assertGreater(result['fps'], 0)
+        self.assertIn('stop_latency', result)
@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import unittest
+
+from freeseer.framework.devices import DeviceRegistry
+
+
+class TestDeviceRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.registry = DeviceRegistry({
+            'video': lambda: self.enumerate('video', [('Webcam', '/dev/video0')]),
+            'pulse': lambda: self.enumerate('pulse', [('Microphone', 'alsa_input.usb')]),
+            'firewire': lambda: self.enumerate('firewire', []),
+        }, monitor=False)
+
+    def enumerate(self, kind, devices):
+        self.calls.append(kind)
+        return devices
+
+    def test_devices_are_cached(self):
+        self.assertEqual(self.registry.get_devices('video'), [('Webcam', '/dev/video0')])
+        self.assertEqual(self.registry.get_devices('video'), [('Webcam', '/dev/video0')])
+        self.assertEqual(self.calls, ['video'])
+
+    def test_get_default(self):
+        self.assertEqual(self.registry.get_default('video'), '/dev/video0')
+        self.assertEqual(self.registry.get_default('firewire'), '')
+
+    def test_refresh(self):
+        changed = []
+        self.registry.add_listener(changed.append)
+        self.registry.get_devices('video')
+        self.registry.refresh(['video'])
+        self.registry.get_devices('video')
+        self.assertEqual(self.calls, ['video', 'video'])
+        self.assertEqual(changed, ['video'])
+
+    def test_listener_added_once(self):
+        changed = []
+        self.registry.add_listener(changed.append)
+        self.registry.add_listener(changed.append)
+        self.registry.refresh(['video'])
+        self.assertEqual(changed, ['video'])
+
+    def test_udev_event_refreshes_its_subsystem(self):
+        self.registry.get_devices('video')
+        self.registry.get_devices('pulse')
+        self.registry.on_udev_event('UDEV  [5123.456789] add      /devices/pci0000:00/usb1/1-1/video4linux/video0 (video4linux)\n')
+        self.registry.get_devices('video')
+        self.registry.get_devices('pulse')
+        self.assertEqual(self.calls, ['video', 'pulse', 'video'])
+
+    def test_pulse_event_refreshes_sources(self):
+        self.registry.get_devices('pulse')
+        self.registry.on_pulse_event("Event 'change' on source #3\n")
+        self.registry.get_devices('pulse')
+        self.registry.on_pulse_event("Event 'new' on source #4\n")
+        self.registry.get_devices('pulse')
+        self.assertEqual(self.calls, ['pulse', 'pulse'])
+
+    def probe(self, device):
+        self.calls.append(device)
+        return ['640x480'] if device == '/dev/video0' else []
+
+    def test_capabilities_are_cached(self):
+        self.assertEqual(self.registry.get_capabilities('video', '/dev/video0', self.probe), ['640x480'])
+        self.assertEqual(self.registry.get_capabilities('video', '/dev/video0', self.probe), ['640x480'])
+        self.assertEqual(self.calls, ['/dev/video0'])
+
+    def test_failed_probe_is_not_cached(self):
+        self.assertEqual(self.registry.get_capabilities('video', '/dev/video1', self.probe), [])
+        self.assertEqual(self.registry.get_capabilities('video', '/dev/video1', self.probe), [])
+        self.assertEqual(self.calls, ['/dev/video1', '/dev/video1'])
+
+    def test_udev_event_drops_capabilities(self):
+        self.registry.get_capabilities('video', '/dev/video0', self.probe)
+        self.registry.on_udev_event('UDEV  [5123.456789] remove   /devices/pci0000:00/usb1/1-1/video4linux/video0 (video4linux)\n')
+        self.registry.get_capabilities('video', '/dev/video0', self.probe)
+        self.assertEqual(self.calls, ['/dev/video0', '/dev/video0'])
@@ -0,0 +1,52 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import unittest
+
+from freeseer.framework.encoding import EncoderSpec, get_preset_properties, get_thread_budget
+
+
+class TestEncoderPresets(unittest.TestCase):
+
+    def test_thread_budget_splits_cpus(self):
+        self.assertEqual(get_thread_budget(1, cpus=8), 8)
+        self.assertEqual(get_thread_budget(3, cpus=8), 2)
+
+    def test_thread_budget_is_at_least_one(self):
+        self.assertEqual(get_thread_budget(4, cpus=2), 1)
+        self.assertEqual(get_thread_budget(0, cpus=4), 4)
+
+    def test_preset_properties(self):
+        properties = get_preset_properties('vp8enc', 'archival', threads=4)
+        self.assertEqual(properties['threads'], 4)
+        self.assertLess(properties['speed'], get_preset_properties('vp8enc', 'realtime')['speed'])
+
+    def test_encoder_without_threads(self):
+        self.assertNotIn('threads', get_preset_properties('theoraenc', 'realtime', threads=4))
+        self.assertEqual(get_preset_properties('vorbisenc', 'realtime'), {})
+
+    def test_threads_change_encoder_spec(self):
+        # Outputs only share an encoder if they were given the same number of threads
+        self.assertNotEqual(EncoderSpec('vp8enc', get_preset_properties('vp8enc', 'realtime', 1)),
+                            EncoderSpec('vp8enc', get_preset_properties('vp8enc', 'realtime', 2)))
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import unittest
+
+import pygst
+pygst.require("0.10")
+import gst
+
+from freeseer.framework.framefilter import ChangeDetector
+
+
+class TestChangeDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = ChangeDetector(max_interval=0.5)
+
+    def test_changed_frames_pass(self):
+        self.assertTrue(self.detector.is_changed(b'slide 1', 0.0))
+        self.assertTrue(self.detector.is_changed(b'slide 2', 0.1))
+        self.assertEqual(self.detector.skipped, 0)
+
+    def test_unchanged_frames_are_skipped(self):
+        self.assertTrue(self.detector.is_changed(b'slide', 0.0))
+        self.assertFalse(self.detector.is_changed(b'slide', 0.1))
+        self.assertFalse(self.detector.is_changed(b'slide', 0.2))
+        self.assertEqual(self.detector.get_stats(), {'frames': 3, 'skipped': 2})
+
+    def test_unchanged_frame_passes_after_max_interval(self):
+        self.assertTrue(self.detector.is_changed(b'slide', 0.0))
+        self.assertFalse(self.detector.is_changed(b'slide', 0.4))
+        self.assertTrue(self.detector.is_changed(b'slide', 0.5))
+        self.assertFalse(self.detector.is_changed(b'slide', 0.6))
+
+    def make_buffer(self, data, timestamp):
+        buffer = gst.Buffer(data)
+        buffer.timestamp = int(timestamp * gst.SECOND)
+        return buffer
+
+    def test_unchanged_frames_dropped(self):
+        self.assertTrue(self.detector.process_buffer(self.make_buffer('slide', 0.0)))
+        self.assertFalse(self.detector.process_buffer(self.make_buffer('slide', 0.1)))
+
+    def test_unchanged_frames_marked_as_gaps(self):
+        self.detector.mark_gaps = True
+        changed = self.make_buffer('slide', 0.0)
+        unchanged = self.make_buffer('slide', 0.1)
+        self.assertTrue(self.detector.process_buffer(changed))
+        self.assertTrue(self.detector.process_buffer(unchanged))
+        self.assertFalse(changed.flag_is_set(gst.BUFFER_FLAG_GAP))
+        self.assertTrue(unchanged.flag_is_set(gst.BUFFER_FLAG_GAP))
+
+
+class TestSampledChangeDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = ChangeDetector(max_interval=0.5, blocks=4, block_size=2, threshold=1)
+
+    def test_offsets_spread_over_frame(self):
+        self.assertEqual(self.detector.get_offsets(16), [1, 5, 9, 13])
+
+    def test_unsampled_change_is_skipped(self):
+        self.assertTrue(self.detector.is_changed(b'aaaaaaaaaaaaaaaa', 0.0))
+        self.assertFalse(self.detector.is_changed(b'baaaaaaaaaaaaaaa', 0.1))
+
+    def test_change_within_threshold_is_skipped(self):
+        self.assertTrue(self.detector.is_changed(b'aaaaaaaaaaaaaaaa', 0.0))
+        self.assertFalse(self.detector.is_changed(b'abaaaaaaaaaaaaaa', 0.1))
+        self.assertEqual(self.detector.get_stats(), {'frames': 2, 'skipped': 1})
+
+    def test_change_over_threshold_passes(self):
+        self.assertTrue(self.detector.is_changed(b'aaaaaaaaaaaaaaaa', 0.0))
+        self.assertTrue(self.detector.is_changed(b'abaaabaaaaaaaaaa', 0.1))
+
+    def test_changes_add_up_against_last_passed_frame(self):
+        self.assertTrue(self.detector.is_changed(b'aaaaaaaaaaaaaaaa', 0.0))
+        self.assertFalse(self.detector.is_changed(b'abaaaaaaaaaaaaaa', 0.1))
+        self.assertTrue(self.detector.is_changed(b'abaaabaaaaaaaaaa', 0.2))
@@ -0,0 +1,62 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import unittest
+
+from freeseer.framework.metering import AudioMeter
+from freeseer.framework.metering import db_to_percent
+
+
+class TestAudioMeter(unittest.TestCase):
+
+    def setUp(self):
+        self.meter = AudioMeter(rate=20)
+
+    def test_interval(self):
+        self.assertEqual(self.meter.get_interval(), 50000000)
+
+    def test_update_reads_all_channels(self):
+        self.meter.update({'rms': [-20.0, -10.0], 'peak': [-5.0, -3.0]})
+        self.assertEqual(self.meter.rms, [-20.0, -10.0])
+        self.assertEqual(self.meter.get_rms(), -10.0)
+        self.assertEqual(self.meter.get_peak(), -3.0)
+        self.assertEqual(self.meter.get_percent(), 80)
+
+    def test_silence_is_clamped(self):
+        self.meter.update({'rms': [float('-inf')], 'peak': [float('-inf')]})
+        self.assertEqual(self.meter.get_levels(), {'rms': [-100.0], 'peak': [-100.0], 'percent': 0})
+
+    def test_subscribers_are_notified(self):
+        updates = []
+        self.meter.subscribe(updates.append)
+        self.meter.update({'rms': [-30.0], 'peak': [-20.0]})
+        self.meter.unsubscribe(updates.append)
+        self.meter.update({'rms': [-30.0], 'peak': [-20.0]})
+        self.assertEqual(updates, [self.meter])
+
+    def test_db_to_percent(self):
+        self.assertEqual(db_to_percent(0.0), 100)
+        self.assertEqual(db_to_percent(-25.0), 50)
+        self.assertEqual(db_to_percent(-80.0), 0)
+        self.assertEqual(db_to_percent(6.0), 100)
@@ -22,16 +22,19 @@
 # For support, questions, suggestions or any other inquiries, visit:
 # http://wiki.github.com/Freeseer/freeseer/
 
+import os
 import shutil
 import tempfile
 import unittest
 
+import gobject
 import pygst
 pygst.require("0.10")
 import gst
 
 from freeseer.framework.config.profile import ProfileManager
 from freeseer.framework.multimedia import Multimedia
+from freeseer.framework.multimedia import OutputPolicy
 from freeseer.framework.plugin import PluginManager
 from freeseer import settings
 
@@ -75,3 +78,174 @@ class TestMultimedia(unittest.TestCase):
         self.multimedia.stop()
         self.assertNotEqual(self.multimedia.current_state, self.multimedia.STOP)
         self.assertEqual(self.multimedia.player.get_state()[1], gst.STATE_NULL)
+
+    def test_standby_is_promoted_on_record(self):
+        self.multimedia.prepare_standby(filename=u"standby.ogg")
+        standby_player = self.multimedia.standby.player
+        self.multimedia.record()
+        self.assertIs(self.multimedia.player, standby_player)
+        self.assertIsNone(self.multimedia.standby)
+        self.assertEqual(self.multimedia.current_state, self.multimedia.RECORD)
+        self.multimedia.stop()
+
+    def test_discard_standby(self):
+        self.multimedia.prepare_standby(filename=u"standby.ogg")
+        self.multimedia.discard_standby()
+        self.assertIsNone(self.multimedia.standby)
+        self.assertEqual(os.listdir(self.temp_video_dir), [])
+
+    def test_rollover(self):
+        self.multimedia.load_backend(filename=u"first.ogg")
+        self.multimedia.record()
+        player = self.multimedia.player
+        old_bin = self.multimedia.file_output_bin
+        self.assertTrue(self.multimedia.rollover(filename=u"second"))
+        self.assertIs(self.multimedia.player, player)
+        self.assertIsNot(self.multimedia.file_output_bin, old_bin)
+        self.assertTrue(self.multimedia.file_path.endswith(u"second.ogg"))
+        self.multimedia.stop()
+
+    def test_rollover_requires_recording(self):
+        self.multimedia.load_backend(filename=u"first.ogg")
+        self.assertFalse(self.multimedia.rollover(filename=u"second.ogg"))
+
+    def test_pipeline_stats(self):
+        self.multimedia.load_backend(filename=u"test.ogg")
+        stats = self.multimedia.get_pipeline_stats()
+        self.assertIn('audio', stats['pads'])
+        self.assertIn('video', stats['pads'])
+        self.assertTrue(any(name.startswith('Ogg Output/') for name in stats['pads']))
+
+    def test_plan_video_formats(self):
+        self.multimedia.load_backend(filename=u"test.ogg")
+        colorspace = self.multimedia.videomixer.get_by_name('colorspace')
+        capsfilter = colorspace.get_static_pad('src').get_peer().get_parent_element()
+        self.assertEqual(capsfilter.get_factory().get_name(), 'capsfilter')
+        self.assertEqual(capsfilter.get_property('caps')[0]['format'], gst.Fourcc('I420'))
+
+    def test_compressed_output_needs_compressed_input(self):
+        self.multimedia.config.record_to_file_plugin = "DV Output"
+        self.assertFalse(self.multimedia.load_backend(filename=u"test.dv"))
+        self.assertEqual(self.multimedia.compressed_outputs, [])
+
+    def test_compressed_output_without_video(self):
+        self.multimedia.config.record_to_file_plugin = "DV Output"
+        self.multimedia.config.enable_video_recording = False
+        self.multimedia.load_backend(filename=u"test.dv")
+        self.assertEqual(self.multimedia.video_input_plugins, [])
+        self.assertEqual(self.multimedia.compressed_outputs, [])
+        self.assertEqual(self.multimedia.compressed_tees, {})
+
+    def test_output_policy_queues(self):
+        self.multimedia.load_backend(filename=u"test.ogg")
+        bin = self.multimedia.file_output_bin
+        for tee, teepad, queue in self.multimedia.output_links[bin]:
+            self.assertEqual(queue.get_property('leaky'), 0)
+        self.assertEqual(self.multimedia.get_output_drops()['Ogg Output'], 0)
+
+    def test_stream_outputs_are_leaky_by_default(self):
+        self.assertEqual(self.multimedia.config.record_to_stream_policy, OutputPolicy.LEAKY)
+
+    def test_attach_and_detach_output(self):
+        self.multimedia.load_backend(filename=u"test.ogg")
+        self.multimedia.record()
+        self.assertTrue(self.multimedia.attach_output("Audio Feedback"))
+        self.assertIn("Audio Feedback", self.multimedia.get_output_names())
+        self.assertFalse(self.multimedia.attach_output("Audio Feedback"))
+        self.assertTrue(self.multimedia.detach_output("Audio Feedback"))
+        self.assertNotIn("Audio Feedback", self.multimedia.get_output_names())
+        self.multimedia.stop()
+
+    def test_attach_output_requires_backend(self):
+        self.assertFalse(self.multimedia.attach_output("Audio Feedback"))
+
+    def test_outputs_share_encoders(self):
+        self.multimedia.load_backend(filename=u"test.ogg")
+        stages = dict(self.multimedia.encoder_stages)
+        self.assertTrue(stages)
+        self.assertTrue(self.multimedia.attach_output("Ogg Icecast"))
+        self.assertEqual(self.multimedia.encoder_stages, stages)
+        self.assertTrue(all(stage.users == 2 for stage in stages.values()))
+        self.assertTrue(self.multimedia.detach_output("Ogg Icecast"))
+        self.assertTrue(all(stage.users == 1 for stage in stages.values()))
+        pads = self.multimedia.get_pipeline_stats()['pads']
+        self.assertFalse([name for name in pads if name.startswith('Ogg Icecast/')])
+
+    def test_preview_without_preroll_pauses(self):
+        self.multimedia.load_backend(filename=u"test.ogg")
+        self.assertFalse(self.multimedia.preview())
+        self.assertEqual(self.multimedia.current_state, Multimedia.PAUSE)
+
+    def test_preview_preroll(self):
+        self.multimedia.config.preroll_time = 5
+        self.multimedia.load_backend(filename=u"test.ogg")
+        self.assertTrue(self.multimedia.preview())
+        self.assertEqual(self.multimedia.current_state, Multimedia.PREVIEW)
+        self.assertTrue(self.multimedia.preroll_queues)
+        self.assertGreaterEqual(self.multimedia.get_preroll_memory(), 0)
+        self.multimedia.record()
+        self.assertEqual(self.multimedia.current_state, Multimedia.RECORD)
+        self.assertEqual(self.multimedia.preroll_queues, [])
+        self.assertIsNotNone(self.multimedia.start_latency)
+        self.multimedia.stop()
+
+    def test_detach_file_output_while_previewing(self):
+        self.multimedia.config.preroll_time = 5
+        self.multimedia.load_backend(filename=u"test.ogg")
+        self.assertTrue(self.multimedia.preview())
+        self.assertTrue(self.multimedia.detach_output("Ogg Output"))
+        self.assertEqual(self.multimedia.preroll_queues, [])
+        self.assertIsNone(self.multimedia.file_output_bin)
+        self.assertIsNone(self.multimedia.file_path)
+        self.multimedia.stop()
+
+    def test_preview_holds_stream_outputs(self):
+        self.multimedia.config.preroll_time = 5
+        self.multimedia.load_backend(filename=u"test.ogg")
+        self.assertTrue(self.multimedia.attach_output("Ogg Icecast"))
+        self.assertTrue(self.multimedia.preview())
+        self.assertTrue(self.multimedia.held_stream_pads)
+        self.assertTrue(self.multimedia.detach_output("Ogg Icecast"))
+        self.assertEqual(self.multimedia.held_stream_pads, [])
+        self.assertTrue(self.multimedia.attach_output("Ogg Icecast"))
+        self.assertTrue(self.multimedia.held_stream_pads)
+        self.multimedia.record()
+        self.assertEqual(self.multimedia.held_stream_pads, [])
+        self.multimedia.stop()
+
+    def test_stop_async_without_recording(self):
+        results = []
+        self.multimedia.load_backend(filename=u"test.ogg")
+        self.assertFalse(self.multimedia.stop_async(lambda *result: results.append(result)))
+        self.assertEqual(len(results), 1)
+
+    def test_stop_async_waits_for_eos(self):
+        results = []
+        loop = gobject.MainLoop()
+
+        def on_stopped(*result):
+            results.append(result)
+            loop.quit()
+
+        self.multimedia.load_backend(filename=u"test.ogg")
+        self.multimedia.record()
+        self.assertTrue(self.multimedia.stop_async(on_stopped, timeout=5))
+        self.assertEqual(self.multimedia.current_state, Multimedia.STOPPING)
+        self.multimedia.stop()
+        self.assertEqual(self.multimedia.current_state, Multimedia.STOPPING)
+        # The stop finishes on EOS, or on the stop timeout at the latest
+        gobject.timeout_add(10000, loop.quit)
+        loop.run()
+        self.assertEqual(self.multimedia.current_state, Multimedia.STOP)
+        self.assertEqual(len(results), 1)
+
+    def test_rooms_record_to_separate_files(self):
+        other = Multimedia(self.multimedia.config, self.multimedia.plugman)
+        self.multimedia.load_backend(filename=u"room")
+        other.load_backend(filename=u"room")
+        self.assertNotEqual(self.multimedia.file_path, other.file_path)
+        self.assertIsNot(self.multimedia.file_output_plugin, other.file_output_plugin)
+        self.multimedia.record()
+        other.record()
+        self.multimedia.stop()
+        other.stop()
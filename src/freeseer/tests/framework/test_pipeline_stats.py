@@ -0,0 +1,59 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import unittest
+
+from freeseer.framework.pipeline_stats import BufferCounter
+
+
+class TestBufferCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.counter = BufferCounter()
+
+    def test_totals_and_rates(self):
+        for i in range(11):
+            self.counter.add(100, timestamp=i * 0.1, duration=0.1, now=i * 0.1)
+        stats = self.counter.get_stats(now=1.0)
+        self.assertEqual(stats['buffers'], 11)
+        self.assertEqual(stats['bytes'], 1100)
+        self.assertAlmostEqual(stats['buffers_per_sec'], 11.0)
+        self.assertEqual(stats['gaps'], 0)
+
+    def test_rates_fall_off_when_stalled(self):
+        self.counter.add(100, now=0.0)
+        self.counter.add(100, now=1.0)
+        self.assertEqual(self.counter.get_stats(now=11.0)['buffers_per_sec'], 0.0)
+
+    def test_gaps(self):
+        self.counter.add(100, timestamp=0.0, duration=0.1, now=0.0)
+        self.counter.add(100, timestamp=0.3, duration=0.1, now=0.1)
+        self.counter.add(100, timestamp=0.4, duration=0.1, discont=True, now=0.2)
+        self.assertEqual(self.counter.gaps, 2)
+
+    def test_late_buffers_and_drift(self):
+        self.counter.add(100, timestamp=1.0, running_time=1.05, now=0.0)
+        self.counter.add(100, timestamp=2.0, running_time=2.5, now=0.0)
+        self.assertEqual(self.counter.late, 1)
+        self.assertAlmostEqual(self.counter.drift, 0.5)
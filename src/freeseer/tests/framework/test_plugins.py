@@ -267,3 +267,15 @@ def test_load_fake_plugin_config(plugin_manager):
     assert fake_config.integer == 0
     assert fake_config.number == 3.14
     assert not fake_config.boolean
+
+
+def test_new_instance(plugin_manager):
+    """Tests that a plugin instance keeps its own per-pipeline state."""
+    plugin = plugin_manager.get_plugin_by_name("Ogg Output", "Output").plugin_object
+    first = plugin.new_instance()
+    second = plugin.new_instance()
+    first.set_recording_location('/tmp/room1.ogg')
+    second.set_recording_location('/tmp/room2.ogg')
+    assert first.location == '/tmp/room1.ogg'
+    assert second.location == '/tmp/room2.ogg'
+    assert first is not plugin
@@ -0,0 +1,184 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import socket
+import threading
+import time
+import unittest
+
+import gobject
+
+import pygst
+pygst.require("0.10")
+import gst
+
+from freeseer.framework.resilience import ResilientSender
+from freeseer.framework.resilience import StreamSpool
+
+
+class TestStreamSpool(unittest.TestCase):
+
+    def setUp(self):
+        self.spool = StreamSpool(1024)
+
+    def tearDown(self):
+        self.spool.close()
+
+    def test_starts_at_keyframe(self):
+        self.assertFalse(self.spool.write('delta', keyframe=False))
+        self.assertTrue(self.spool.write('key', keyframe=True))
+        self.assertTrue(self.spool.write('delta', keyframe=False, flags=8))
+        self.assertEqual(self.spool.read(), (0, 'key'))
+        self.assertEqual(self.spool.read(), (8, 'delta'))
+        self.assertEqual(self.spool.read(), None)
+
+    def test_drops_backlog_when_full(self):
+        self.spool.write('a' * 600, keyframe=True)
+        self.assertFalse(self.spool.write('b' * 600, keyframe=False))
+        self.assertTrue(self.spool.is_empty())
+        self.assertTrue(self.spool.write('c' * 600, keyframe=True))
+        self.assertEqual(self.spool.read(), (0, 'c' * 600))
+
+    def test_discard_to_keyframe(self):
+        self.spool.write('key1', keyframe=True)
+        self.spool.write('delta', keyframe=False)
+        self.spool.write('key2', keyframe=True)
+        self.spool.read()
+        self.spool.discard_to_keyframe()
+        self.assertEqual(self.spool.read(), (0, 'key2'))
+
+    def test_discard_without_keyframe_waits_for_one(self):
+        self.spool.write('key', keyframe=True)
+        self.spool.write('delta', keyframe=False)
+        self.spool.read()
+        self.spool.discard_to_keyframe()
+        self.assertTrue(self.spool.is_empty())
+        self.assertFalse(self.spool.write('delta', keyframe=False))
+
+
+class FlakyServer(object):
+    """A local TCP server dropping its first connection after drop_after bytes, then accepting another one."""
+
+    def __init__(self, drop_after):
+        self.drop_after = drop_after
+        self.connections = []
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(1)
+        self.port = self.server.getsockname()[1]
+
+        self.thread = threading.Thread(target=self._serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _serve(self):
+        for limit in [self.drop_after, None]:
+            connection, address = self.server.accept()
+            received = []
+            self.connections.append(received)
+            while limit is None or sum(len(data) for data in received) < limit:
+                data = connection.recv(4096)
+                if not data:
+                    break
+                received.append(data)
+            connection.close()
+
+    def get_data(self, index):
+        if index >= len(self.connections):
+            return ''
+        return ''.join(self.connections[index])
+
+    def close(self):
+        self.server.close()
+
+
+class TestResilientSender(unittest.TestCase):
+
+    TIMEOUT = 15
+
+    def setUp(self):
+        self.server = FlakyServer(drop_after=200)
+
+        sink = gst.element_factory_make('tcpclientsink')
+        sink.set_property('host', '127.0.0.1')
+        sink.set_property('port', self.server.port)
+        self.sender = ResilientSender('test', sink, 1024 * 1024)
+
+        # Stands in for an output bin, ending in the appsink the sender takes buffers from
+        self.source = gst.Pipeline()
+        self.appsrc = gst.element_factory_make('appsrc')
+        self.appsrc.set_property('caps', gst.Caps('application/x-freeseer-test'))
+        appsink = gst.element_factory_make('appsink')
+        self.source.add(self.appsrc, appsink)
+        self.appsrc.link(appsink)
+        self.sender.connect_appsink(appsink)
+        self.source.set_state(gst.STATE_PLAYING)
+
+        self.pushed = 0
+        # Buffers pushed while the sender was reconnecting, which go to the spool
+        self.spooled = []
+
+    def tearDown(self):
+        self.source.set_state(gst.STATE_NULL)
+        self.sender.stop()
+        self.server.close()
+
+    def push_buffer(self):
+        data = 'buffer{0:05d}\n'.format(self.pushed)
+        if self.sender.state == ResilientSender.CONNECTING and self.sender.reconnects:
+            self.spooled.append(data)
+        self.appsrc.emit('push-buffer', gst.Buffer(data))
+        self.pushed += 1
+        return True
+
+    def is_done(self):
+        return (self.sender.state == ResilientSender.LIVE and len(self.spooled) > 0 and
+                self.spooled[-1] in self.server.get_data(1))
+
+    def test_reconnects_and_sends_backlog(self):
+        loop = gobject.MainLoop()
+        pusher = gobject.timeout_add(20, self.push_buffer)
+        started = time.time()
+
+        def check():
+            if self.is_done() or time.time() - started > self.TIMEOUT:
+                loop.quit()
+                return False
+            return True
+
+        gobject.timeout_add(50, check)
+        loop.run()
+        gobject.source_remove(pusher)
+
+        self.assertEqual(self.sender.state, ResilientSender.LIVE)
+        self.assertEqual(self.sender.reconnects, 1)
+        self.assertTrue(self.server.get_data(0))
+
+        # The backlog is sent, in order, ahead of the live buffers
+        resent = self.server.get_data(1)
+        positions = [resent.find(data) for data in self.spooled]
+        self.assertTrue(self.spooled)
+        self.assertNotIn(-1, positions)
+        self.assertEqual(positions, sorted(positions))
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+#  Copyright (C) 2014  Free and Open Source Software Learning Centre
+#  http://fosslc.org
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import gobject
+
+from freeseer.framework import transcode
+from freeseer.framework.transcode import TranscodeQueue, get_launch_args, get_rendition_path
+
+
+class TestTranscodeQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'transcode.json')
+        self.source = os.path.join(self.folder, 'talk.avi')
+        open(self.source, 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_rendition_path(self):
+        self.assertEqual(get_rendition_path('/videos/talk.avi', 'webm'), '/videos/talk.webm')
+
+    def test_rendition_path_keeps_earlier_takes(self):
+        open(os.path.join(self.folder, 'talk.ogg'), 'w').close()
+        reserved = [os.path.join(self.folder, 'talk-0.ogg')]
+        self.assertEqual(get_rendition_path(self.source, 'ogg', reserved), os.path.join(self.folder, 'talk-1.ogg'))
+
+    def test_queued_destinations_are_unique(self):
+        queue = TranscodeQueue(self.path)
+        queue.add(self.source, ['ogg'])
+        queue.add(self.source, ['ogg'])
+        self.assertEqual(len(queue.get_destinations()), 2)
+
+    def test_launch_args(self):
+        args = get_launch_args('/videos/talk.avi', '/videos/talk.ogg', 'ogg', audio=False)
+        self.assertIn('location=/videos/talk.avi', args)
+        self.assertIn('theoraenc', args)
+        self.assertIn('oggmux', args)
+        self.assertNotIn('vorbisenc', args)
+
+    def test_queue_is_persisted(self):
+        queue = TranscodeQueue(self.path)
+        queue.add(self.source, ['ogg', 'webm', 'mp4'])
+        self.assertEqual(len(queue.get_pending()), 2)
+
+        queue = TranscodeQueue(self.path)
+        self.assertEqual([job['format'] for job in queue.get_pending()], ['ogg', 'webm'])
+
+    def test_running_jobs_restart(self):
+        queue = TranscodeQueue(self.path)
+        queue.add(self.source, ['ogg'])
+        queue.jobs[0]['state'] = transcode.RUNNING
+        queue.save()
+
+        self.assertEqual(len(TranscodeQueue(self.path).get_pending()), 1)
+
+    def test_intermediate_kept_while_needed(self):
+        queue = TranscodeQueue(self.path)
+        queue.add(self.source, ['ogg', 'webm'])
+
+        queue.jobs.pop(0)
+        queue._delete_intermediate(self.source)
+        self.assertTrue(os.path.exists(self.source))
+
+        queue.jobs.pop(0)
+        queue._delete_intermediate(self.source)
+        self.assertFalse(os.path.exists(self.source))
+
+    def test_noisy_process_does_not_block(self):
+        earlier_take = os.path.join(self.folder, 'talk.ogg')
+        open(earlier_take, 'w').close()
+        # More error output than a pipe holds, then a failure
+        noisy = ['sh', '-c', 'head -c 1000000 /dev/zero | tr "\\0" x >&2; exit 1']
+        get_launch_args = transcode.get_launch_args
+        transcode.get_launch_args = lambda *args: noisy
+        try:
+            loop = gobject.MainLoop()
+            results = []
+
+            def on_finished(job, success):
+                results.append(success)
+                loop.quit()
+
+            queue = TranscodeQueue(self.path)
+            queue.add_listener(on_finished)
+            queue.add(self.source, ['ogg'])
+            queue.start()
+            gobject.timeout_add(10000, loop.quit)
+            loop.run()
+            queue.stop()
+        finally:
+            transcode.get_launch_args = get_launch_args
+
+        self.assertEqual(results, [False])
+        self.assertEqual(len(queue.get_failed()), 1)
+        self.assertTrue(os.path.exists(earlier_take))
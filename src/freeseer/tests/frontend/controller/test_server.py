@@ -29,6 +29,7 @@ import pytest
 
 from freeseer import settings
 from freeseer.framework.config.profile import ProfileManager
+from freeseer.framework.metering import AudioMeter
 from freeseer.framework.multimedia import Multimedia
 from freeseer.framework.plugin import PluginManager
 from freeseer.frontend.controller import server
@@ -37,6 +38,8 @@ from freeseer.frontend.controller import server
 class MockMedia:
     def __init__(self):
         self.current_state = Multimedia.NULL
+        self.audio_meter = AudioMeter()
+        self.outputs = ['Ogg Output']
         self.num_times_record_called = 0
         self.num_times_stop_called = 0
         self.num_times_pause_called = 0
@@ -50,6 +53,25 @@ class MockMedia:
     def stop(self):
         self.num_times_stop_called += 1
 
+    def stop_async(self, callback=None):
+        self.num_times_stop_called += 1
+        return True
+
+    def get_output_names(self):
+        return self.outputs
+
+    def attach_output(self, name):
+        if name in self.outputs:
+            return False
+        self.outputs.append(name)
+        return True
+
+    def detach_output(self, name):
+        if name not in self.outputs:
+            return False
+        self.outputs.remove(name)
+        return True
+
 
 class TestServerApp:
     '''
@@ -147,6 +169,7 @@ class TestServerApp:
             'filesize': 'NA',
             'id': 1,
             'status': 'NULL',
+            'audio_level': {'rms': [], 'peak': [], 'percent': 0},
         }
 
     def test_get_invalid_recording_id(self, test_client, mock_media_dict):
@@ -246,6 +269,45 @@ class TestServerApp:
         assert response.status_code == 400
         assert mock_media_dict[1].num_times_stop_called == 0
 
+    def test_get_outputs(self, test_client, mock_media_dict):
+        '''
+        Tests GET request listing the outputs of a recording
+        '''
+        response = test_client.get('/recordings/1/outputs')
+        assert response.status_code == 200
+        assert json.loads(response.data) == {'outputs': ['Ogg Output']}
+
+    def test_attach_output(self, test_client, mock_media_dict):
+        '''
+        Tests POST request attaching an output to a recording
+        '''
+        mock_media_dict[1].current_state = Multimedia.RECORD
+        response = test_client.post('/recordings/1/outputs', data={'name': 'RTMP Streaming'})
+        assert response.status_code == 201
+        assert mock_media_dict[1].outputs == ['Ogg Output', 'RTMP Streaming']
+
+    def test_attach_output_twice(self, test_client, mock_media_dict):
+        '''
+        Tests POST request attaching an output that is already attached
+        '''
+        response = test_client.post('/recordings/1/outputs', data={'name': 'Ogg Output'})
+        assert response.status_code == 400
+
+    def test_detach_output(self, test_client, mock_media_dict):
+        '''
+        Tests DELETE request detaching an output from a recording
+        '''
+        response = test_client.delete('/recordings/1/outputs/Ogg Output')
+        assert response.status_code == 204
+        assert mock_media_dict[1].outputs == []
+
+    def test_detach_missing_output(self, test_client, mock_media_dict):
+        '''
+        Tests DELETE request detaching an output that is not attached
+        '''
+        response = test_client.delete('/recordings/1/outputs/RTMP Streaming')
+        assert response.status_code == 404
+
     def test_post_no_filename(self, test_client):
         '''
         Tests a POST request without a filename
@@ -313,6 +375,15 @@ class TestServerApp:
         assert del_media.num_times_stop_called == 1
         assert recording.media_dict.keys() == [2]
 
+    def test_delete_stopping_recording(self, test_client, recording, mock_media_dict):
+        '''
+        Tests a DELETE request for a recording whose file is still being finalized
+        '''
+        mock_media_dict[1].current_state = Multimedia.STOPPING
+        response = test_client.delete('/recordings/1')
+        assert response.status_code == 409
+        assert 1 in recording.media_dict
+
     def test_delete_recording_id_and_file(self, test_client, recording, mock_media_dict):
         '''
         Tests a DELETE request where the recording has a specified file
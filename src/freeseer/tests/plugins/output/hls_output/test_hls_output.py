@@ -0,0 +1,109 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+# Copyright (C) 2014 Free and Open Source Software Learning Centre
+# http://fosslc.org
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+import os
+
+from freeseer.plugins.output.hls_output import HLSOutput
+from freeseer.plugins.output.hls_output import HLSOutputConfig
+from freeseer.plugins.output.hls_output import clear_folder
+from freeseer.plugins.output.hls_output import Playlist
+
+
+def read_playlist(playlist):
+    with open(playlist.path) as playlist_file:
+        return playlist_file.read().splitlines()
+
+
+def add_segments(tmpdir, playlist, count):
+    for index in range(count):
+        filename = 'segment-{0}.ts'.format(index)
+        tmpdir.join(filename).write('data')
+        playlist.add_segment(filename, 2.0)
+
+
+def test_playlist_lists_last_segments(tmpdir):
+    playlist = Playlist(str(tmpdir), length=3, target_duration=2)
+    add_segments(tmpdir, playlist, 5)
+
+    lines = read_playlist(playlist)
+    assert '#EXT-X-MEDIA-SEQUENCE:2' in lines
+    assert [line for line in lines if line.endswith('.ts')] == ['segment-2.ts', 'segment-3.ts', 'segment-4.ts']
+    assert '#EXT-X-ENDLIST' not in lines
+
+
+def test_playlist_deletes_old_segments(tmpdir):
+    playlist = Playlist(str(tmpdir), length=3, target_duration=2)
+    add_segments(tmpdir, playlist, 10)
+
+    # The live segments plus those kept for clients still downloading them
+    segments = sorted(name for name in os.listdir(str(tmpdir)) if name.endswith('.ts'))
+    assert len(segments) == 3 + Playlist.RETAINED_SEGMENTS
+    assert 'segment-0.ts' not in segments
+    assert 'segment-9.ts' in segments
+
+
+def test_playlist_target_duration_covers_segments(tmpdir):
+    playlist = Playlist(str(tmpdir), length=3, target_duration=2)
+    playlist.add_segment('segment-0.ts', 3.2)
+
+    assert '#EXT-X-TARGETDURATION:4' in read_playlist(playlist)
+
+
+def test_playlist_end(tmpdir):
+    playlist = Playlist(str(tmpdir), length=3, target_duration=2)
+    add_segments(tmpdir, playlist, 1)
+    playlist.end()
+
+    assert read_playlist(playlist)[-1] == '#EXT-X-ENDLIST'
+
+
+def test_clear_folder_keeps_other_files(tmpdir):
+    tmpdir.join('segment-1400000000-00000.ts').write('data')
+    tmpdir.join('stream.m3u8').write('#EXTM3U')
+    tmpdir.join('notes.txt').write('keep me')
+    tmpdir.join('talk.ts').write('a recording')
+
+    clear_folder(str(tmpdir))
+    assert sorted(os.listdir(str(tmpdir))) == ['notes.txt', 'talk.ts']
+
+
+def test_rooms_get_their_own_folder_and_port(tmpdir):
+    outputs = []
+    for name in ['room1-talk', 'room2-talk']:
+        output = HLSOutput()
+        output.config = HLSOutputConfig()
+        output.config.folder = str(tmpdir)
+        output.location = str(tmpdir.join(name + '.None'))
+        outputs.append(output)
+
+    try:
+        for output in outputs:
+            output.folder = output.claim_folder()
+            output.port = output.claim_port()
+        assert (outputs[0].folder, outputs[0].port) == (str(tmpdir), 8088)
+        assert (outputs[1].folder, outputs[1].port) == (str(tmpdir.join('room2-talk')), 8089)
+        assert tmpdir.join('room2-talk').check(dir=True)
+    finally:
+        for output in outputs:
+            output.release_claims()
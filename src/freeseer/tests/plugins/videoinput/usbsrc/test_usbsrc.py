@@ -0,0 +1,45 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+# Copyright (C) 2014 Free and Open Source Software Learning Centre
+# http://fosslc.org
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+from freeseer.plugins.videoinput.usbsrc import Mode
+from freeseer.plugins.videoinput.usbsrc import choose_mode
+
+MODES = [
+    Mode('MJPEG', 3840, 2160, (30, 1)),
+    Mode('MJPEG', 1280, 720, (30, 1)),
+    Mode('YUY2', 1280, 720, (10, 1)),
+    Mode('YUY2', 640, 480, (30, 1)),
+]
+
+
+def test_choose_largest_mode():
+    assert choose_mode(MODES, 25) == Mode('MJPEG', 3840, 2160, (30, 1))
+
+
+def test_choose_mode_fitting_output_size():
+    assert choose_mode(MODES, 25, (1280, 720)) == Mode('MJPEG', 1280, 720, (30, 1))
+
+
+def test_choose_smallest_mode_when_none_fit():
+    assert choose_mode(MODES, 25, (320, 240)) == Mode('YUY2', 640, 480, (30, 1))
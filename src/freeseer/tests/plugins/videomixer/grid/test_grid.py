@@ -0,0 +1,35 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# freeseer - vga/presentation capture software
+#
+# Copyright (C) 2014 Free and Open Source Software Learning Centre
+# http://fosslc.org
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+# For support, questions, suggestions or any other inquiries, visit:
+# http://wiki.github.com/Freeseer/freeseer/
+
+from freeseer.plugins.videomixer.grid import get_cells
+
+
+def test_grid_cells():
+    assert get_cells(4, "Grid", 1280, 720) == [(0, 0, 640, 360), (640, 0, 640, 360),
+                                               (0, 360, 640, 360), (640, 360, 640, 360)]
+
+
+def test_no_cells_without_inputs():
+    assert get_cells(0, "Grid", 1280, 720) == []
+    assert get_cells(0, "Side by Side", 1280, 720) == []